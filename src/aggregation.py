@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Opal Vanguard - Application Message Aggregation (v1.0)
+
+TYPE_AGG = 4 # frame type of an aggregate DATA frame (plain DATA is 0)
+
+def pack(messages):
+    """Aggregate payload: every message behind a 1-byte length sub-header."""
+    out = bytearray()
+    for m in messages:
+        if not 0 < len(m) <= 255: raise ValueError(f"Cannot aggregate a {len(m)}-byte message (1-255)")
+        out.append(len(m)); out += m
+    return bytes(out)
+
+def unpack(payload):
+    """Inverse of pack(). Raises ValueError if a sub-header runs past the end of the payload."""
+    messages, i = [], 0
+    while i < len(payload):
+        n = payload[i]; i += 1
+        if n == 0 or i + n > len(payload): raise ValueError(f"Malformed aggregate at byte {i - 1}")
+        messages.append(bytes(payload[i:i + n])); i += n
+    return messages
+
+class Aggregator:
+    """
+    Collects small messages for one destination into frame-sized groups.
+    A group closes when the next message would not fit `capacity` bytes (sub-headers included),
+    when no message has arrived for window_s, or once its oldest message has waited budget_s,
+    whichever comes first. The caller supplies `now` and sends each returned group as one frame.
+    """
+    def __init__(self, capacity, window_s=0.02, budget_s=0.1):
+        self.capacity, self.window_s, self.budget_s = capacity, window_s, max(window_s, budget_s)
+        self.pending, self.size = [], 0
+        self.first_t = self.last_t = 0.0
+        self.stats = {"messages": 0, "frames": 0}
+
+    def __len__(self):
+        return len(self.pending)
+
+    def add(self, msg, now):
+        """Queues msg (bytes, not empty). Returns the groups that are ready to send, oldest first."""
+        if not msg: raise ValueError("Cannot aggregate an empty message")
+        ready = []
+        # A message too long for a sub-header never joins the open group: it must go out alone
+        if self.pending and (self.size + 1 + len(msg) > self.capacity or len(msg) > 255): ready.append(self._close())
+        if not self.pending: self.first_t = now
+        self.pending.append(msg); self.size += 1 + len(msg); self.last_t = now
+        self.stats["messages"] += 1
+        # A message that alone fills the frame (or cannot be aggregated) goes out at once
+        if self.size >= self.capacity - 1 or len(msg) > 255: ready.append(self._close())
+        return ready
+
+    def due(self, now):
+        """Deadline (seconds) at which the open group closes on its own, or None."""
+        if not self.pending: return None
+        return min(self.last_t + self.window_s, self.first_t + self.budget_s)
+
+    def poll(self, now):
+        """The open group if its window or latency budget has run out, else []."""
+        if self.pending and now >= self.due(now): return [self._close()]
+        return []
+
+    def flush(self):
+        return [self._close()] if self.pending else []
+
+    def _close(self):
+        group, self.pending, self.size = self.pending, [], 0
+        self.stats["frames"] += 1
+        return group
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Opal Vanguard - Selective-Repeat ARQ Engine (v1.0)
+
+import math
+import struct
+from collections import deque
+
+SEQ_MOD = 256 # 8-bit sequence field in the link header
+ACK_BITMAP_BITS = 32
+
+def seq_diff(a, b):
+    """(a - b) mod 256."""
+    return (a - b) % SEQ_MOD
+
+def encode_ack(cum, bitmap):
+    """Selective ACK payload: b'S' + next expected seq (everything before it received) + 32-bit bitmap of cum+1..cum+32."""
+    return struct.pack('>cBI', b'S', cum, bitmap)
+
+def parse_ack(payload):
+    """(cum, bitmap) for a selective ACK payload, None for anything else (e.g. the handshake b"ACK")."""
+    if len(payload) != 6 or payload[:1] != b'S': return None
+    _, cum, bitmap = struct.unpack('>cBI', payload)
+    return cum, bitmap
+
+class TimerWheel:
+    """
+    Hashed timing wheel: O(1) schedule/cancel, expiry resolved to tick_s.
+    Keys live in the slot of their deadline tick; advance() walks only the slots between
+    the last call and now, so per-sequence timeouts cost nothing while idle. Slots are
+    insertion-ordered, so keys due in the same tick expire in the order they were scheduled
+    (runs replay exactly for a given seed, whatever the interpreter's hash seed).
+    """
+    def __init__(self, tick_s=0.01, slots=512, now=0.0):
+        self.tick_s, self.n_slots = tick_s, slots
+        self.slots = [{} for _ in range(slots)]
+        self.deadlines = {}
+        self.cursor = int(now / tick_s)
+
+    def __len__(self):
+        return len(self.deadlines)
+
+    def schedule(self, key, delay_s, now):
+        self.cancel(key)
+        tick = max(int(now / self.tick_s) + 1, self.cursor + 1, int(math.ceil((now + delay_s) / self.tick_s)))
+        self.deadlines[key] = tick
+        self.slots[tick % self.n_slots][key] = None
+
+    def cancel(self, key):
+        tick = self.deadlines.pop(key, None)
+        if tick is not None: self.slots[tick % self.n_slots].pop(key, None)
+
+    def advance(self, now):
+        """Returns keys whose deadline has passed, in deadline order."""
+        target, expired = int(now / self.tick_s), []
+        if target < self.cursor or not self.deadlines:
+            self.cursor = max(self.cursor, target); return expired
+        # Never walk more than one full revolution, however long the gap since the last call
+        start = max(self.cursor + 1, target - self.n_slots + 1)
+        for tick in range(start, target + 1):
+            slot = self.slots[tick % self.n_slots]
+            for key in [k for k in slot if self.deadlines[k] <= target]:
+                del slot[key]; del self.deadlines[key]; expired.append(key)
+        self.cursor = target
+        return expired
+
+class SelectiveRepeatARQ:
+    """
+    GNU Radio-free sliding-window selective-repeat ARQ (one peer, both directions).
+    Sender: up to `window` DATA frames in flight, each with its own retransmission timer on a
+    TimerWheel (exponential backoff from rto_s); a frame is abandoned after max_retries resends.
+    Receiver: buffers out-of-order frames inside the window, delivers in sequence and answers
+    every DATA frame with one cumulative + bitmap ACK. Holes left by an abandoned frame are
+    skipped once a later frame proves the sender moved on, or after hold_s.
+    send(seq, obj) puts a DATA frame on the air, deliver(obj) hands a frame up; the caller
+    supplies `now` (seconds) so the engine runs equally on wall-clock or simulated time.
+    """
+    def __init__(self, send, deliver, window=16, max_retries=3, rto_s=0.5, hold_s=None, tick_s=0.01, now=0.0):
+        if not 1 <= window <= ACK_BITMAP_BITS: raise ValueError(f"ARQ window must be 1-{ACK_BITMAP_BITS} (got {window})")
+        self.send, self.deliver = send, deliver
+        self.window, self.max_retries, self.rto_s = window, max_retries, rto_s
+        self.hold_s = hold_s if hold_s is not None else rto_s * (2 ** (max_retries + 1))
+        self.wheel = TimerWheel(tick_s=tick_s, now=now)
+
+        self.next_seq = 0
+        self.in_flight = {} # seq -> [obj, retries]
+        self.backlog = deque()
+        self.rx_base = 0 # next in-order seq expected
+        self.rx_buffer = {}
+        self.stats = {"sent": 0, "retransmits": 0, "acked": 0, "failed": 0, "delivered": 0,
+                      "duplicates": 0, "skipped": 0, "acks_sent": 0, "acks_received": 0}
+
+    # ---------------- Sender ----------------
+    def submit(self, obj, now):
+        """Sends obj now if the window has room, else queues it. Returns the seq used or None if queued."""
+        if not self.window_open():
+            self.backlog.append(obj); return None
+        seq = self.next_seq; self.next_seq = (seq + 1) % SEQ_MOD
+        self.in_flight[seq] = [obj, 0]
+        self.stats["sent"] += 1
+        self.wheel.schedule(('tx', seq), self.rto_s, now)
+        self.send(seq, obj)
+        return seq
+
+    def on_ack(self, cum, bitmap, now):
+        self.stats["acks_received"] += 1
+        for seq in list(self.in_flight):
+            behind, ahead = seq_diff(cum, seq), seq_diff(seq, cum)
+            if 0 < behind <= SEQ_MOD // 2 or (1 <= ahead <= ACK_BITMAP_BITS and (bitmap >> (ahead - 1)) & 1):
+                del self.in_flight[seq]; self.wheel.cancel(('tx', seq)); self.stats["acked"] += 1
+        self._fill_window(now)
+        self.poll(now)
+
+    def window_open(self):
+        """True while next_seq is less than `window` ahead of the oldest unacknowledged frame."""
+        return not self.in_flight or max(seq_diff(self.next_seq, s) for s in self.in_flight) < self.window
+
+    def _fill_window(self, now):
+        while self.backlog and self.window_open():
+            self.submit(self.backlog.popleft(), now)
+
+    def poll(self, now):
+        """Runs expired timers: retransmits, abandons after max_retries, skips stale receive holes."""
+        for key in self.wheel.advance(now):
+            if key[0] == 'hole': self._skip_hole(); continue
+            seq = key[1]; entry = self.in_flight.get(seq)
+            if entry is None: continue
+            if entry[1] >= self.max_retries:
+                del self.in_flight[seq]; self.stats["failed"] += 1
+                continue
+            entry[1] += 1; self.stats["retransmits"] += 1
+            self.wheel.schedule(('tx', seq), self.rto_s * (2 ** entry[1]), now)
+            self.send(seq, entry[0])
+        self._fill_window(now)
+
+    # ---------------- Receiver ----------------
+    def on_data(self, seq, obj, now):
+        """Accepts a DATA frame and returns the selective ACK payload to send back."""
+        d = seq_diff(seq, self.rx_base)
+        if d >= SEQ_MOD // 2:
+            self.stats["duplicates"] += 1 # already delivered; the ACK below repairs the sender's view
+        else:
+            if d >= self.window:
+                # Sender has moved past frames it gave up on: slide the window to cover seq
+                self._advance_to((seq - self.window + 1) % SEQ_MOD)
+            if seq in self.rx_buffer: self.stats["duplicates"] += 1
+            else: self.rx_buffer[seq] = obj
+            self._deliver_in_order()
+            if self.rx_buffer: self.wheel.schedule(('hole', 0), self.hold_s, now)
+            else: self.wheel.cancel(('hole', 0))
+        self.stats["acks_sent"] += 1
+        return encode_ack(self.rx_base, self._rx_bitmap())
+
+    def _rx_bitmap(self):
+        bitmap = 0
+        for seq in self.rx_buffer:
+            d = seq_diff(seq, self.rx_base)
+            if 1 <= d <= ACK_BITMAP_BITS: bitmap |= 1 << (d - 1)
+        return bitmap
+
+    def _deliver_in_order(self):
+        while self.rx_base in self.rx_buffer:
+            self.deliver(self.rx_buffer.pop(self.rx_base)); self.stats["delivered"] += 1
+            self.rx_base = (self.rx_base + 1) % SEQ_MOD
+
+    def _advance_to(self, new_base):
+        while self.rx_base != new_base:
+            if self.rx_base in self.rx_buffer:
+                self.deliver(self.rx_buffer.pop(self.rx_base)); self.stats["delivered"] += 1
+            else: self.stats["skipped"] += 1
+            self.rx_base = (self.rx_base + 1) % SEQ_MOD
+
+    def _skip_hole(self):
+        """Hold timer expired: give up on the missing frame(s) ahead of the oldest buffered one."""
+        if not self.rx_buffer: return
+        oldest = min(self.rx_buffer, key=lambda s: seq_diff(s, self.rx_base))
+        self._advance_to(oldest); self._deliver_in_order()
+
+    def snapshot(self):
+        return dict(self.stats, in_flight=len(self.in_flight), backlog=len(self.backlog))
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Opal Vanguard - Rate-Limited Asynchronous Console Logger (v1.0)
+
+import sys
+import time
+import threading
+from collections import deque
+
+class AsyncLogger:
+    """
+    Console logging that never blocks a GNU Radio message handler.
+    log() is a token-bucket check plus a deque append; formatting and the (flushed) write
+    happen on a daemon thread. Lines beyond `rate` per second (bursts up to `burst`) are
+    counted instead of queued and reported as one "suppressed" line.
+    """
+    def __init__(self, rate=20, burst=40, stream=None):
+        self.rate, self.burst = float(rate), float(burst)
+        self.tokens, self.last = float(burst), time.monotonic()
+        self.stream = stream or sys.stdout
+        self.pending = deque()
+        self.suppressed = 0; self.written = 0
+        self.lock = threading.Lock()
+        self.wake = threading.Event()
+        self.thread = threading.Thread(target=self._writer, daemon=True)
+        self.thread.start()
+
+    def log(self, fmt, *args):
+        """Queues fmt % args for the writer thread. Returns False if rate-limited."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate); self.last = now
+            if self.tokens < 1.0:
+                self.suppressed += 1; return False
+            self.tokens -= 1.0
+        self.pending.append((fmt, args))
+        self.wake.set()
+        return True
+
+    def _writer(self):
+        while True:
+            self.wake.wait(); self.wake.clear()
+            lines = []
+            while self.pending:
+                fmt, args = self.pending.popleft()
+                try: lines.append(fmt % args if args else fmt)
+                except Exception: lines.append(f"{fmt} {args}")
+            with self.lock: dropped, self.suppressed = self.suppressed, 0
+            if dropped: lines.append(f"[LOG] {dropped} message(s) suppressed by rate limit")
+            if lines:
+                self.stream.write("\n".join(lines) + "\n"); self.stream.flush()
+                self.written += len(lines)
+
+    def flush(self, timeout=1.0):
+        """Waits (bounded) until the writer has drained the queue; for shutdown and tests."""
+        end = time.monotonic() + timeout
+        self.wake.set()
+        while self.pending and time.monotonic() < end: time.sleep(0.005)
@@ -4,6 +4,7 @@
 
 import os
 import yaml
+from tdma import parse_slots, SLOTS_PER_EPOCH
 
 def validate_config(config_path):
     """Checks if the provided YAML config is physically and logically viable."""
@@ -15,10 +16,13 @@ def validate_config(config_path):
             cfg = yaml.safe_load(f)
     except Exception as e:
         return False, f"Failed to parse YAML: {e}"
+    return validate_cfg(cfg)
 
-    # 1. Hardware Constraints
+def validate_cfg(cfg):
+    """Same checks on an already-parsed config dict (used by MissionProfile)."""
+    # 1. Hardware Constraints (nodes default to 2 Msps when hardware.samp_rate is absent)
     hw = cfg.get('hardware', {})
-    samp_rate = hw.get('samp_rate', 0)
+    samp_rate = hw.get('samp_rate', 2000000)
     if samp_rate < 1e6 or samp_rate > 56e6:
         return False, f"Sample rate {samp_rate} is outside stable USRP B205/B210 limits (1M-56M)."
 
@@ -26,11 +30,13 @@ def validate_config(config_path):
     hop = cfg.get('hopping', {})
     if hop.get('enabled', False):
         dwell = hop.get('dwell_time_ms', 0)
-        lookahead = hop.get('lookahead_ms', 0)
+        lookahead = hop.get('lookahead_ms', 20) # hop_scheduler.DEFAULT_LOOKAHEAD_MS (the validator stays GNU Radio-free)
         if dwell < 10:
             return False, f"Dwell time {dwell}ms is too fast for software-timed UHD tuning (min 10ms)."
         if lookahead >= dwell:
             return False, f"Lookahead ({lookahead}ms) must be smaller than dwell time ({dwell}ms)."
+        if hop.get('retune_mode', 'lo') not in ("lo", "dsp"):
+            return False, f"retune_mode must be lo or dsp (got {hop.get('retune_mode')})."
 
     # 3. Link Layer Consistency
     link = cfg.get('link_layer', {})
@@ -38,8 +44,53 @@ def validate_config(config_path):
     rows = link.get('interleaver_rows', 0)
     if interleaving and (rows < 2 or rows > 64):
         return False, f"Interleaver rows ({rows}) should be between 2 and 64 for stability."
+    # The interleaver pads a partial last column, which would push the frame past frame_size
+    if interleaving and link.get('frame_size', 120) % rows:
+        return False, f"Interleaver rows ({rows}) must divide frame_size ({link.get('frame_size', 120)}) evenly."
+    if link.get('worker_mode', 'thread') not in ("thread", "process"):
+        return False, f"worker_mode must be thread or process (got {link.get('worker_mode')})."
+    if link.get('queue_overflow', 'drop-oldest') not in ("drop-oldest", "drop-newest", "block"):
+        return False, f"queue_overflow must be drop-oldest, drop-newest or block (got {link.get('queue_overflow')})."
 
-    # 4. Mission Specifics (Level 6 / Link-16)
+    # Burst framing: the short (connected) preamble is a prefix of the acquisition preamble
+    phy = cfg.get('physical', {})
+    preamble = phy.get('preamble_len', 1024)
+    if preamble < 0 or preamble % 2:
+        return False, f"preamble_len ({preamble}) must be a non-negative even number of bits."
+    if not 0 <= phy.get('preamble_short', 128) or phy.get('preamble_short', 128) % 2:
+        return False, f"preamble_short ({phy.get('preamble_short')}) must be a non-negative even number of bits."
+    tail = phy.get('tail_bits', "auto")
+    if tail != "auto" and not (isinstance(tail, int) and tail >= 0):
+        return False, f"tail_bits must be auto or a non-negative bit count (got {tail})."
+
+    # 4. MAC / ARQ (window limited by the 32-bit selective ACK bitmap)
+    mac = cfg.get('mac_layer', {})
+    if not 1 <= mac.get('arq_window', 16) <= 32:
+        return False, f"arq_window ({mac.get('arq_window')}) must be between 1 and 32."
+    if mac.get('arq_timeout_ms', 500) < 10:
+        return False, f"arq_timeout_ms ({mac.get('arq_timeout_ms')}) must be at least 10ms."
+    if mac.get('agg_window_ms', 0) < 0 or mac.get('agg_latency_ms', 100) < mac.get('agg_window_ms', 0):
+        return False, f"agg_latency_ms ({mac.get('agg_latency_ms', 100)}) must be at least agg_window_ms ({mac.get('agg_window_ms', 0)})."
+    if mac.get('frag_timeout_ms', 2000) <= 0 or mac.get('frag_max_pending', 4) < 1:
+        return False, "frag_timeout_ms must be positive and frag_max_pending at least 1."
+    # Node ids share the type byte's high nibble with the destination address
+    if not 0 <= mac.get('node_id', 0) <= 15:
+        return False, f"node_id ({mac.get('node_id')}) must be between 0 and 15."
+    if mac.get('tdma_enabled', False):
+        if mac.get('slot_duration_ms', 7.8125) <= 0:
+            return False, f"slot_duration_ms ({mac.get('slot_duration_ms')}) must be positive."
+        slots = mac.get('assigned_slots', f"0-{SLOTS_PER_EPOCH - 1}")
+        try: owners = {n: parse_slots(s) for n, s in slots.items()} if hasattr(slots, 'items') else {None: parse_slots(slots)}
+        except ValueError as e: return False, f"assigned_slots: {e}"
+        if any(not 1 <= n <= 15 for n in owners if n is not None):
+            return False, "assigned_slots node ids must be between 1 and 15."
+        taken = {}
+        for node, node_slots in owners.items():
+            for s in node_slots:
+                if s in taken: return False, f"TDMA slot {s} is assigned to both node {taken[s]} and node {node}."
+                taken[s] = node
+
+    # 5. Mission Specifics (Level 6 / Link-16)
     mission_id = cfg.get('mission', {}).get('id', "")
     if "LEVEL_6" in mission_id or "LINK-16" in mission_id:
         dsss_type = cfg.get('dsss', {}).get('type', "")
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Opal Vanguard - Shared CRC Engine (CRC16-CCITT / CRC32)
+
+import binascii
+import struct
+import zlib
+import numpy as np
+
+def _build_crc16_table(poly=0x1021):
+    table = np.zeros(256, dtype=np.uint16)
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ poly) if crc & 0x8000 else (crc << 1)
+        table[byte] = crc & 0xFFFF
+    return table
+
+# 256-entry CRC-CCITT (0x1021) table, built once at import
+CRC16_TABLE = _build_crc16_table()
+
+def crc16(data, init=0xFFFF):
+    """CRC-16/CCITT (poly 0x1021, init 0xFFFF). binascii.crc_hqx is the same table-driven CRC in C."""
+    return binascii.crc_hqx(bytes(data), init)
+
+def crc32(data):
+    """IEEE 802.3 CRC32 via zlib."""
+    return zlib.crc32(bytes(data)) & 0xFFFFFFFF
+
+def crc16_many(frames, init=0xFFFF):
+    """Vectorized CRC16 over ndarray[N, L] of equal-length frames: one table gather per byte column."""
+    frames = np.asarray(frames, dtype=np.uint8)
+    crc = np.full(frames.shape[0], init, dtype=np.uint16)
+    for col in frames.T:
+        crc = (crc << 8) ^ CRC16_TABLE[(crc >> 8) ^ col]
+    return crc
+
+class CRCEngine:
+    """Frame integrity check selected by link_layer.crc_type (CRC16 | CRC32)."""
+    def __init__(self, crc_type="CRC16"):
+        self.crc_type = str(crc_type).upper()
+        if self.crc_type == "CRC32":
+            self.size, self.fmt, self.func = 4, '>I', crc32
+        else:
+            self.crc_type = "CRC16"
+            self.size, self.fmt, self.func = 2, '>H', crc16
+
+    def compute(self, data):
+        return self.func(data)
+
+    def append(self, data):
+        """Returns data with its big-endian CRC attached."""
+        return data + struct.pack(self.fmt, self.func(data))
+
+    def check(self, data, crc_bytes):
+        if len(crc_bytes) != self.size: return False
+        return struct.unpack(self.fmt, crc_bytes)[0] == self.func(data)
@@ -23,7 +23,7 @@ def run_probe(config_path):
     # Node ALPHA (1) sending to Node BRAVO (2)
     pkt = packetizer(config_path=config_path, src_id=1)
     depkt = depacketizer(config_path=config_path, src_id=2, ignore_self=True)
-    session = session_manager(config_path=config_path)
+    session = session_manager(config_path=config_path, node_id=1)
     
     # 2. Simulate a Heartbeat Request
     print("[1/4] Generating Heartbeat...")
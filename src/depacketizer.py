@@ -5,184 +5,169 @@
 import numpy as np
 from gnuradio import gr
 import pmt
-import struct
 import os
-import yaml
-import time
 import threading
 from collections import deque
-from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
-from cryptography.hazmat.backends import default_backend
-from dsp_helper import MatrixInterleaver, Scrambler, NRZIEncoder, CCSKProcessor
-from numpy.lib.stride_tricks import sliding_window_view
+from fec_worker import FrameSync, LinkDecoder, ProcessWorkerPool
+from mission_profile import MissionProfile
+
+class FrameQueue:
+    """
+    Bounded handoff between the radio thread and the link-layer worker.
+    Wakes the worker on a condition variable (no polling) and applies an overflow
+    policy when full: "drop-oldest", "drop-newest" or "block" (backpressure).
+    """
+    POLICIES = ("drop-oldest", "drop-newest", "block")
+
+    def __init__(self, depth=50, policy="drop-oldest"):
+        if policy not in self.POLICIES: raise ValueError(f"Unknown queue_overflow policy: {policy}")
+        self.depth, self.policy = max(1, int(depth)), policy
+        self.items = deque()
+        self.cond = threading.Condition()
+        self.enqueued = 0; self.dropped = 0; self.high_water = 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def put(self, item):
+        """Returns False if the item (or an older one) had to be dropped."""
+        with self.cond:
+            accepted = True
+            if len(self.items) >= self.depth:
+                if self.policy == "block":
+                    while len(self.items) >= self.depth: self.cond.wait()
+                elif self.policy == "drop-newest":
+                    self.dropped += 1
+                    return False
+                else:
+                    self.items.popleft(); self.dropped += 1; accepted = False
+            self.items.append(item); self.enqueued += 1
+            self.high_water = max(self.high_water, len(self.items))
+            self.cond.notify_all()
+            return accepted
+
+    def get(self, timeout=None):
+        """Blocks until an item arrives; returns None on timeout."""
+        with self.cond:
+            if not self.items and not self.cond.wait_for(lambda: self.items, timeout): return None
+            item = self.items.popleft()
+            self.cond.notify_all()
+            return item
 
 class depacketizer(gr.basic_block):
     def __init__(self, config_path="mission_configs/level1_soft_link.yaml", src_id=0, ignore_self=False):
         gr.basic_block.__init__(self, name="depacketizer", in_sig=[np.uint8], out_sig=None)
         self.src_id, self.ignore_self = src_id, ignore_self
         
-        with open(config_path, 'r') as f: self.cfg = yaml.safe_load(f)
-        l_cfg = self.cfg.get('link_layer', {})
-        p_cfg = self.cfg.get('physical', {})
-        self.frame_size = l_cfg.get('frame_size', 120)
-        self.use_fec = l_cfg.get('use_fec', True)
-        self.use_interleaving = l_cfg.get('use_interleaving', True)
-        self.use_whitening = l_cfg.get('use_whitening', True)
+        # config_path may also be a MissionProfile or dict; derived fields come precomputed
+        self.profile = MissionProfile.resolve(config_path)
+        self.cfg = self.profile.cfg
+        l_cfg = self.profile.section('link_layer')
+        self.frame_size = self.profile.frame_size
         self.use_nrzi = l_cfg.get('use_nrzi', True)
-        self.fec_mode = self.cfg.get('mission', {}).get('id', "")
+        self.fec_mode = self.profile.mission_id
         
         # Dynamic Waveform Parameters
-        self.sync_hex = p_cfg.get('syncword', "0x3D4C5B6A")
-        self.sync_val = int(self.sync_hex, 16)
-        self.sync_len = (len(self.sync_hex) - 2) * 4
-        self.threshold = max(1, self.sync_len // 16)
-        self.target_bits = np.array([int(b) for b in format(self.sync_val, f'0{self.sync_len}b')], dtype=np.uint8)
-        self.target_inv = 1 - self.target_bits
-        
-        self.use_comsec = l_cfg.get('use_comsec', False)
-        self.comsec_key = bytes.fromhex(l_cfg.get('comsec_key', '00'*32)) if self.use_comsec else None
-        self.interleaver = MatrixInterleaver(rows=l_cfg.get('interleaver_rows', 15))
-        self.scrambler = Scrambler(mask=l_cfg.get('scrambler_mask', 0x48), seed=l_cfg.get('scrambler_seed', 0x7F))
-        self.nrzi = NRZIEncoder(); self.ccsk = CCSKProcessor()
-        if self.use_fec:
-            from rs_helper import RS1511
-            self.rs = RS1511()
+        self.sync_hex, self.sync_len = self.profile.sync_hex, self.profile.sync_len
+        self.threshold = self.profile.sync_threshold
+        self.target_bits = self.profile.sync_bits
+        self.is_tactical, self.chips_per_frame = self.profile.is_tactical, self.profile.chips_per_frame
+
+        # Sync search, the preallocated frame accumulator and CCSK/NRZI recovery live in FrameSync;
+        # de-whitening, deinterleave, RS, CRC and COMSEC in LinkDecoder (both fec_worker.py)
+        self.sync = FrameSync(self.profile)
+        self.decoder = LinkDecoder(self.cfg)
 
         # v15.9.2: Async Math Worker
         # We offload the heavy RS-FEC and Interleaving to a background thread
-        self.pdu_queue = deque(maxlen=50)
+        self.pdu_queue = FrameQueue(depth=l_cfg.get('worker_queue_depth', 50), policy=l_cfg.get('queue_overflow', 'drop-oldest'))
+        # worker_mode "process": the thread only dispatches into a shared-memory ring served
+        # by worker processes, so RS decoding no longer competes for the flowgraph's GIL.
+        self.worker_mode = l_cfg.get('worker_mode', 'thread')
+        self.pool = None
+        if self.worker_mode == "process":
+            self.pool = ProcessWorkerPool(self.profile.to_dict(), self.emit_result, n_workers=l_cfg.get('worker_processes', 2),
+                                          slot_size=max(self.frame_size, 1024))
+        self.reported_drops = 0 # drop count last sent on diagnostics
         self.worker_active = True
         self.worker_thread = threading.Thread(target=self._logic_worker, daemon=True)
         self.worker_thread.start()
 
         self.message_port_register_out(pmt.intern("out"))
         self.message_port_register_out(pmt.intern("diagnostics"))
+        self.message_port_register_out(pmt.intern("crc_fail"))
         self.message_port_register_in(pmt.intern("pdu_in"))
         self.set_msg_handler(pmt.intern("pdu_in"), self.handle_pdu)
-        
-        self.state = "SEARCH"; self.recovered_bits = []; self.is_inverted = False
 
     def _logic_worker(self):
         """Background thread that drains the PDU queue and performs heavy math."""
         while self.worker_active:
-            if not self.pdu_queue:
-                time.sleep(0.005); continue
-            data_block, confidence = self.pdu_queue.popleft()
-            self.process_recovered_block(data_block, confidence)
-
-    def verify_crc(self, payload, true_plen, sid, m_type, seq):
-        if len(payload) < (true_plen + 2): return False
-        extracted_crc = struct.unpack('>H', payload[true_plen:true_plen+2])[0]
-        crc = 0xFFFF
-        header_base = struct.pack('BBBB', sid, m_type, seq, true_plen)
-        for byte in (header_base + payload[:true_plen]):
-            crc ^= (byte << 8)
-            for _ in range(8):
-                if crc & 0x8000: crc = (crc << 1) ^ 0x1021
-                else: crc <<= 1
-            crc &= 0xFFFF
-        return crc == extracted_crc
+            item = self.pdu_queue.get(timeout=1.0)
+            if item is not None:
+                data_block, confidence = item
+                if self.pool: self.pool.submit(data_block, confidence)
+                else: self.process_recovered_block(data_block, confidence)
+            # Drops reach diagnostics even when nothing decodes (e.g. a stalled pool or a CRC storm)
+            if self.queue_drops() != self.reported_drops: self.publish_diagnostics()
+
+    def stop(self):
+        self.worker_active = False
+        if self.pool: self.pool.close()
+        return True
 
     def handle_pdu(self, msg):
         data_block = bytes(pmt.u8vector_elements(pmt.cdr(msg)))
-        self.pdu_queue.append((data_block, 1.0))
+        self.pdu_queue.put((data_block, 1.0))
 
     def process_recovered_block(self, data_block, confidence):
-        try:
-            if self.use_whitening: self.scrambler.reset(); data_block = self.scrambler.process(data_block)
-            if self.use_interleaving: data_block = self.interleaver.deinterleave(data_block)
-            
-            processed_block = data_block
-            repairs_made = 0
-            if self.use_fec:
-                healed = bytearray()
-                for j in range(0, len(data_block), 15):
-                    chunk = data_block[j:j+15]
-                    if len(chunk) < 15: break
-                    nibs = []
-                    for b in chunk: nibs.extend([(b >> 4) & 0x0F, b & 0x0F])
-                    dn1, e1 = self.rs.decode(nibs[:15]); dn2, e2 = self.rs.decode(nibs[15:])
-                    repairs_made += (e1 + e2)
-                    combined = dn1 + dn2
-                    for k in range(0, 22, 2): healed.append((combined[k] << 4) | combined[k+1])
-                processed_block = bytes(healed)
-
-            sid, m_type, seq, true_plen = struct.unpack('BBBB', processed_block[:4])
-            payload_zone = processed_block[4:4+true_plen+2]
-            crc_pass = self.verify_crc(payload_zone, true_plen, sid, m_type, seq)
-            
-            if crc_pass:
-                if not (self.ignore_self and sid == self.src_id):
-                    payload = payload_zone[:true_plen]
-                    if self.use_comsec and self.comsec_key and m_type == 0:
-                        nonce, ct = payload[:16], payload[16:]
-                        cipher = Cipher(algorithms.AES(self.comsec_key), modes.CTR(nonce), backend=default_backend())
-                        payload = cipher.decryptor().update(ct) + cipher.decryptor().finalize()
-                    
-                    payload = payload.split(b'\x00')[0]
-                    t_name = {0:"DATA", 1:"SYN", 2:"ACK", 3:"NACK"}.get(m_type, "UNK")
-                    print(f"\033[92m[OK]\033[0m ID: {seq:03} | TYPE: {t_name} | RX: {payload}")
-                    meta = pmt.make_dict(); meta = pmt.dict_add(meta, pmt.intern("type"), pmt.from_long(m_type))
-                    self.message_port_pub(pmt.intern("out"), pmt.cons(meta, pmt.init_u8vector(len(payload), list(payload))))
-            
-                diag = pmt.make_dict()
-                diag = pmt.dict_add(diag, pmt.intern("crc_ok"), pmt.PMT_T)
-                diag = pmt.dict_add(diag, pmt.intern("confidence"), pmt.from_double(confidence * 100.0))
-                diag = pmt.dict_add(diag, pmt.intern("fec_repairs"), pmt.from_long(repairs_made))
-                self.message_port_pub(pmt.intern("diagnostics"), diag)
-        except: pass
+        try: result = self.decoder.decode(data_block)
+        except Exception: result = None
+        self.emit_result(result, self.decoder.last_sid, confidence)
+
+    def emit_result(self, result, header_sid, confidence):
+        """
+        Publishes a decoded frame on out, or the failed frame's (unverified) src_id on crc_fail, plus
+        a diagnostics report either way. Called from the worker thread or the pool collector.
+        """
+        if result is None:
+            if header_sid is not None and not (self.ignore_self and header_sid == self.src_id):
+                self.message_port_pub(pmt.intern("crc_fail"), pmt.dict_add(pmt.make_dict(), pmt.intern("src_id"), pmt.from_long(header_sid)))
+            self.publish_diagnostics(False, confidence)
+            return
+        sid, type_byte, seq, payload, repairs_made = result
+        m_type, dst = type_byte & 0x0F, type_byte >> 4
+        if not (self.ignore_self and sid == self.src_id):
+            t_name = {0:"DATA", 1:"SYN", 2:"ACK", 3:"NACK", 4:"AGG", 5:"FRAG"}.get(m_type, "UNK")
+            print(f"\033[92m[OK]\033[0m ID: {seq:03} | TYPE: {t_name} | RX: {payload}")
+            meta = pmt.make_dict(); meta = pmt.dict_add(meta, pmt.intern("type"), pmt.from_long(m_type))
+            meta = pmt.dict_add(meta, pmt.intern("seq"), pmt.from_long(seq))
+            meta = pmt.dict_add(meta, pmt.intern("src_id"), pmt.from_long(sid))
+            meta = pmt.dict_add(meta, pmt.intern("dst_id"), pmt.from_long(dst))
+            self.message_port_pub(pmt.intern("out"), pmt.cons(meta, pmt.init_u8vector(len(payload), list(payload))))
+
+        self.publish_diagnostics(True, confidence, repairs_made)
+
+    def queue_drops(self):
+        return self.pdu_queue.dropped + (self.pool.oversize + self.pool.stalled if self.pool else 0)
+
+    def publish_diagnostics(self, crc_ok=None, confidence=0.0, repairs_made=0):
+        """
+        Sends queue_depth/queue_drops on diagnostics, with crc_ok/confidence/fec_repairs for a decode
+        attempt; crc_ok None is a queue-only report.
+        """
+        depth = len(self.pdu_queue) + (self.pool.in_flight() if self.pool else 0)
+        drops = self.reported_drops = self.queue_drops()
+        diag = pmt.make_dict()
+        if crc_ok is not None:
+            diag = pmt.dict_add(diag, pmt.intern("crc_ok"), pmt.PMT_T if crc_ok else pmt.PMT_F)
+            diag = pmt.dict_add(diag, pmt.intern("confidence"), pmt.from_double(confidence * 100.0))
+            diag = pmt.dict_add(diag, pmt.intern("fec_repairs"), pmt.from_long(repairs_made))
+        diag = pmt.dict_add(diag, pmt.intern("queue_depth"), pmt.from_long(depth))
+        diag = pmt.dict_add(diag, pmt.intern("queue_drops"), pmt.from_long(drops))
+        self.message_port_pub(pmt.intern("diagnostics"), diag)
 
     def general_work(self, input_items, output_items):
-        in0 = input_items[0]; n = len(in0)
-        
-        if self.state == "SEARCH":
-            if n < self.sync_len: return 0
-            bits = in0 & 1
-            try:
-                windows = sliding_window_view(bits, self.sync_len)
-                dists = np.sum(windows != self.target_bits, axis=1)
-                matches = np.where(dists <= self.threshold)[0]
-                if len(matches) > 0:
-                    idx = matches[0]; self.is_inverted, self.state = False, "COLLECT"
-                    self.consume(0, idx + self.sync_len); self.recovered_bits = []
-                    self.nrzi.reset(); self.scrambler.reset(); return 0
-                
-                dists_inv = np.sum(windows != self.target_inv, axis=1)
-                matches_inv = np.where(dists_inv <= self.threshold)[0]
-                if len(matches_inv) > 0:
-                    idx = matches_inv[0]; self.is_inverted, self.state = True, "COLLECT"
-                    self.consume(0, idx + self.sync_len); self.recovered_bits = []
-                    self.nrzi.reset(); self.scrambler.reset(); return 0
-            except: pass
-            self.consume(0, max(0, n - self.sync_len + 1)); return 0
-
-        if self.state == "COLLECT":
-            is_tactical = ("LEVEL_6" in self.fec_mode or "LEVEL_7" in self.fec_mode)
-            bits_per_frame = (self.frame_size * 8)
-            chips_per_frame = (bits_per_frame // 5) * 32 if is_tactical else bits_per_frame
-            needed = chips_per_frame - len(self.recovered_bits)
-            to_take = min(n, needed)
-            chunk = in0[:to_take] & 1
-            if self.is_inverted: chunk = chunk ^ 1
-            self.recovered_bits.extend(chunk.tolist())
-            
-            if len(self.recovered_bits) >= chips_per_frame:
-                raw_chips = np.array(self.recovered_bits[:chips_per_frame], dtype=np.uint8)
-                if is_tactical:
-                    chips_bipolar = np.where(raw_chips == 1, 1, -1)
-                    symbols_chips = chips_bipolar.reshape(-1, 32)
-                    correlations = np.abs(np.dot(symbols_chips, self.ccsk.lut_matrix.T))
-                    best_symbols = np.argmax(correlations, axis=1)
-                    mask = 2**np.arange(5)[::-1]
-                    bits_arr = ((best_symbols[:, None] & mask) > 0).astype(np.uint8).flatten()
-                else:
-                    bits_arr = raw_chips
-                
-                if self.use_nrzi and not is_tactical:
-                    bits_arr = np.array(self.nrzi.decode(bits_arr.tolist()), dtype=np.uint8)
-                
-                # v15.9.2: Offload to worker thread
-                self.pdu_queue.append((np.packbits(bits_arr).tobytes(), 1.0))
-                self.state, self.recovered_bits = "SEARCH", []
-            
-            self.consume(0, to_take); return 0
+        consumed, data_block = self.sync.work(input_items[0])
+        # v15.9.2: Offload to worker thread
+        if data_block is not None: self.pdu_queue.put((data_block, 1.0))
+        self.consume(0, consumed); return 0
@@ -54,21 +54,23 @@ class NRZIEncoder:
     def reset(self):
         self.tx_state = 0; self.rx_state = 0
     def encode(self, bits):
-        # Use NumPy to calculate transitions (1 means flip state)
-        bits_arr = np.array(bits, dtype=np.uint8)
-        # Cumulative XOR effectively implements the NRZI state machine
-        # We must include the initial state in the calculation
-        # np.bitwise_xor.accumulate is the vectorized equivalent of our loop
-        res = np.bitwise_xor.accumulate(np.insert(bits_arr, 0, self.tx_state))
-        self.tx_state = int(res[-1])
-        return res[1:].tolist()
+        return self.encode_array(np.asarray(bits, dtype=np.uint8)).tolist()
+    def encode_array(self, bits_arr):
+        """ndarray in, ndarray out. Cumulative XOR implements the NRZI state machine (1 means flip state)."""
+        res = np.bitwise_xor.accumulate(bits_arr)
+        if self.tx_state: res ^= 1
+        if len(res): self.tx_state = int(res[-1])
+        return res
     def decode(self, bits):
-        bits_arr = np.array(bits, dtype=np.uint8)
+        return self.decode_array(np.asarray(bits, dtype=np.uint8)).tolist()
+    def decode_array(self, bits_arr):
+        """ndarray in, ndarray out; reads the input as a view without converting to lists."""
         # XOR with previous bit to find transitions
-        prev = np.roll(bits_arr, 1); prev[0] = self.rx_state
-        decoded = np.bitwise_xor(bits_arr, prev)
+        decoded = np.empty_like(bits_arr)
+        decoded[0] = bits_arr[0] ^ self.rx_state
+        np.bitwise_xor(bits_arr[1:], bits_arr[:-1], out=decoded[1:])
         self.rx_state = int(bits_arr[-1])
-        return decoded.tolist()
+        return decoded
 
 class ManchesterEncoder:
     def reset(self):
@@ -99,12 +101,31 @@ class CCSKProcessor:
         self.lut_matrix = np.zeros((32, 32), dtype=np.int8)
         for i in range(32):
             self.lut_matrix[i] = np.where(np.roll(self.base_sequence, -i) == 1, 1, -1)
+        # Same LUT in 0/1 chip form for the TX side
+        self.chip_matrix = (self.lut_matrix > 0).astype(np.uint8)
+        self.sym_weights = 1 << np.arange(4, -1, -1)
+        # RX side: float LUT for one matmul per frame
+        self.lut_t = self.lut_matrix.T.astype(np.float32)
+        self.sym_shifts = np.arange(4, -1, -1)
 
     def encode_symbol(self, symbol):
         """Maps a 5-bit symbol (0-31) to a cyclic shift of the base sequence."""
         shift = symbol % 32
         return np.roll(self.base_sequence, -shift).tolist()
 
+    def encode_symbols(self, bits):
+        """
+        Vectorized encode of a whole bit array: MSB-first 5-bit groups -> symbols -> one
+        row gather from the LUT. A short trailing group is taken as a right-aligned value,
+        as encode_symbol() is fed by the legacy loop. Returns flat uint8 chips.
+        """
+        bits = np.asarray(bits, dtype=np.uint8)
+        n_full = len(bits) // 5
+        symbols = bits[:n_full * 5].reshape(-1, 5) @ self.sym_weights
+        rem = bits[n_full * 5:]
+        if len(rem): symbols = np.append(symbols, rem @ self.sym_weights[5 - len(rem):])
+        return self.chip_matrix[symbols].ravel()
+
     def decode_chips(self, chips):
         """Finds the shift with the highest magnitude correlation to recover the 5-bit symbol."""
         if len(chips) < 32: return 0, 0.0
@@ -119,6 +140,89 @@ class CCSKProcessor:
         confidence = correlations[best_shift] / 32.0
         return best_shift, confidence
 
+    def decode_array(self, chips):
+        """
+        Vectorized inverse of encode_symbols over whole 32-chip symbols: the shift with the highest
+        magnitude correlation per symbol, as MSB-first 5-bit groups. Returns flat uint8 bits.
+        """
+        chips_pm = np.asarray(chips, dtype=np.float32) * 2 - 1
+        best_symbols = np.argmax(np.abs(chips_pm.reshape(-1, 32) @ self.lut_t), axis=1)
+        return ((best_symbols[:, None] >> self.sym_shifts) & 1).astype(np.uint8).ravel()
+
+class SyncCorrelator:
+    """
+    Streaming dual-polarity syncword search.
+    Bits are mapped to +/-1 chips and correlated against the syncword once per lag:
+    corr >= L - 2*threshold is a normal hit, corr <= -(L - 2*threshold) an inverted one.
+    The last L-1 chips are carried between calls, so every lag is evaluated exactly once
+    and the caller can consume its whole input buffer.
+    """
+    def __init__(self, sync_bits, threshold):
+        self.sync_len = len(sync_bits)
+        self.kernel = np.asarray(sync_bits, dtype=np.float32) * 2 - 1
+        self.min_corr = self.sync_len - 2 * threshold
+        self.hist = np.zeros(self.sync_len - 1, dtype=np.float32); self.hist_len = 0
+        self.scratch = np.zeros(8192 + self.sync_len, dtype=np.float32)
+    def reset(self):
+        self.hist_len = 0
+    def search(self, bits):
+        """
+        Returns (consumed, inverted). On a hit, consumed counts input items up to the end of
+        the syncword and inverted is a bool; otherwise all items are consumed and inverted is None.
+        """
+        bits = np.asarray(bits); n = len(bits); h = self.hist_len; total = h + n
+        if total > len(self.scratch): self.scratch = np.zeros(2 * total, dtype=np.float32)
+        buf = self.scratch[:total]
+        buf[:h] = self.hist[:h]
+        chips = buf[h:]
+        np.bitwise_and(bits, 1, out=chips, casting='unsafe'); chips *= 2; chips -= 1
+
+        if total < self.sync_len:
+            self.hist[:total] = buf; self.hist_len = total
+            return n, None
+
+        corr = np.correlate(buf, self.kernel, mode='valid')
+        hits = np.flatnonzero(np.abs(corr, out=corr) >= self.min_corr)
+        if len(hits) == 0:
+            keep = self.sync_len - 1
+            self.hist[:] = buf[total - keep:]; self.hist_len = keep
+            return n, None
+
+        idx = hits[0]
+        inverted = bool(np.dot(buf[idx:idx + self.sync_len], self.kernel) < 0)
+        self.hist_len = 0
+        return idx + self.sync_len - h, inverted
+
+class AFHRemap:
+    """
+    Adaptive frequency hopping remap for a hop pool of num_channels.
+    The blacklist is a boolean mask; remap_table[raw] holds the first clear channel at or
+    after raw (wrapping), rebuilt only when the blacklist changes, so a hop is one lookup.
+    With nothing (or everything) blacklisted the table is the identity.
+    """
+    def __init__(self, num_channels):
+        self.num_channels = int(num_channels)
+        self.mask = np.zeros(self.num_channels, dtype=bool)
+        self.remap_table = np.arange(self.num_channels)
+    @property
+    def blacklist(self):
+        return np.flatnonzero(self.mask).tolist()
+    def update(self, indices):
+        """Replaces the blacklist; out-of-range indices are ignored. Returns False if unchanged."""
+        idx = np.asarray(indices, dtype=np.int64).ravel()
+        mask = np.zeros(self.num_channels, dtype=bool)
+        mask[idx[(idx >= 0) & (idx < self.num_channels)]] = True
+        if np.array_equal(mask, self.mask): return False
+        self.mask = mask
+        clear = np.flatnonzero(~mask)
+        if len(clear) in (0, self.num_channels):
+            self.remap_table = np.arange(self.num_channels)
+        else:
+            self.remap_table = clear[np.searchsorted(clear, np.arange(self.num_channels)) % len(clear)]
+        return True
+    def remap(self, raw_idx):
+        return int(self.remap_table[raw_idx])
+
 class Scrambler:
     def __init__(self, mask=0x48, seed=0x7F):
         self.mask = mask; self.seed = seed; self.state = seed
@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Opal Vanguard - Link-Layer Codec & Multi-Process Worker Pool (v1.0)
+
+import os
+import multiprocessing as mp
+import queue
+import struct
+import threading
+import time
+import numpy as np
+from multiprocessing import shared_memory
+from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.backends import default_backend
+from dsp_helper import MatrixInterleaver, Scrambler, NRZIEncoder, CCSKProcessor, SyncCorrelator
+from crc_helper import CRCEngine
+from mission_profile import MissionProfile
+
+COMSEC_TYPES = (0, 4, 5) # DATA, aggregate DATA and fragments are encrypted; MAC control frames are not
+
+class Comsec:
+    """AES-256-CTR payload protection: a fresh 16-byte nonce travels in front of the ciphertext."""
+    def __init__(self, key):
+        self.key = key
+
+    def encrypt(self, payload):
+        nonce = os.urandom(16)
+        cipher = Cipher(algorithms.AES(self.key), modes.CTR(nonce), backend=default_backend())
+        return nonce + cipher.encryptor().update(payload) + cipher.encryptor().finalize()
+
+    def decrypt(self, payload):
+        nonce, ct = payload[:16], payload[16:]
+        cipher = Cipher(algorithms.AES(self.key), modes.CTR(nonce), backend=default_backend())
+        return cipher.decryptor().update(ct) + cipher.decryptor().finalize()
+
+class LinkEncoder:
+    """
+    GNU Radio-free framing, the inverse of FrameSync + LinkDecoder: COMSEC -> header + CRC -> RS ->
+    interleave -> whiten -> NRZI or CCSK -> preamble/sync/tail burst. packetizer.handle_msg and
+    LinkBench both run it.
+    """
+    def __init__(self, profile):
+        self.profile = MissionProfile.resolve(profile)
+        l_cfg = self.profile.section('link_layer')
+        self.frame_size = self.profile.frame_size
+        self.use_fec = l_cfg.get('use_fec', True)
+        self.use_interleaving = l_cfg.get('use_interleaving', True)
+        self.use_whitening = l_cfg.get('use_whitening', True)
+        self.use_nrzi = l_cfg.get('use_nrzi', True) and not self.profile.is_tactical
+        self.use_ccsk = self.profile.use_ccsk
+        self.comsec = Comsec(bytes.fromhex(l_cfg.get('comsec_key', '00'*32))) if l_cfg.get('use_comsec', False) else None
+        self.interleaver = MatrixInterleaver(rows=l_cfg.get('interleaver_rows', 15))
+        self.scrambler = Scrambler(mask=l_cfg.get('scrambler_mask', 0x48), seed=l_cfg.get('scrambler_seed', 0x7F))
+        self.nrzi, self.ccsk = NRZIEncoder(), CCSKProcessor()
+        self.crc = CRCEngine(l_cfg.get('crc_type', 'CRC16'))
+        if self.use_fec:
+            from rs_helper import RS1511, RS3115
+            self.rs = RS3115() if l_cfg.get('fec_type', 'RS1511') == "RS3115" else RS1511()
+        # Burst framing is fixed per profile: preamble (a prefix of it when the MAC asks for the short one) and flush tail
+        self.preamble_bits = np.tile(np.array([1, 0], dtype=np.uint8), self.profile.preamble_len // 2)
+        self.tail_bits = np.zeros(self.profile.tail_bits, dtype=np.uint8)
+        self.last_raw = None # header + payload + CRC of the last frame before FEC (link_sim BER accounting)
+
+    def frame(self, payload, src_id=0, dst=0, m_type=0, seq=0):
+        """Payload -> frame_size bytes: COMSEC, header + CRC, RS, interleaving and whitening."""
+        if self.comsec and m_type in COMSEC_TYPES: payload = self.comsec.encrypt(payload)
+        # Type byte: frame type in the low nibble, destination node (0 = any) in the high nibble
+        header = struct.pack('BBBB', src_id, ((dst & 0x0F) << 4) | (m_type & 0x0F), seq & 0xFF, len(payload))
+        raw_block = self.last_raw = self.crc.append(header + payload)
+        data_block = self.rs.encode_block(raw_block) if self.use_fec else raw_block
+        packet = data_block.ljust(self.frame_size, b'\x00')[:self.frame_size]
+        if self.use_interleaving: packet = self.interleaver.interleave(packet)
+        if self.use_whitening: self.scrambler.reset(); packet = self.scrambler.process(packet)
+        return packet
+
+    def chips(self, packet):
+        """Frame bytes -> on-air chips. Packed bytes -> bit array in one C call; everything below stays in NumPy."""
+        bits = np.unpackbits(np.frombuffer(packet, dtype=np.uint8))
+        if self.use_nrzi: self.nrzi.reset(); bits = self.nrzi.encode_array(bits)
+        if self.use_ccsk: bits = self.ccsk.encode_symbols(bits)
+        return bits
+
+    def burst(self, payload, src_id=0, dst=0, m_type=0, seq=0, preamble_len=None):
+        """Payload -> complete burst bits: preamble, syncword, frame chips, flush tail."""
+        preamble = self.preamble_bits if preamble_len is None else self.preamble_bits[:preamble_len]
+        chips = self.chips(self.frame(payload, src_id, dst, m_type, seq))
+        return np.concatenate((preamble, self.profile.sync_bits, chips, self.tail_bits))
+
+class FrameSync:
+    """
+    RX front end shared by depacketizer.general_work and LinkBench.receive: dual-polarity sync
+    search, then chips_per_frame chips into a preallocated buffer, then CCSK despreading or NRZI
+    decoding and packing into the frame bytes LinkDecoder takes.
+    """
+    def __init__(self, profile):
+        self.profile = MissionProfile.resolve(profile)
+        self.use_ccsk, self.chips_per_frame = self.profile.use_ccsk, self.profile.chips_per_frame
+        self.use_nrzi = self.profile.section('link_layer').get('use_nrzi', True) and not self.profile.is_tactical
+        self.correlator = SyncCorrelator(self.profile.sync_bits, self.profile.sync_threshold)
+        self.nrzi, self.ccsk = NRZIEncoder(), CCSKProcessor()
+        self.frame_buf = np.zeros(self.chips_per_frame, dtype=np.uint8)
+        self.state, self.frame_fill, self.is_inverted = "SEARCH", 0, False
+
+    def reset(self):
+        self.correlator.reset()
+        self.state, self.frame_fill = "SEARCH", 0
+
+    def work(self, bits):
+        """Consumes a prefix of bits. Returns (consumed, frame bytes once a frame completes, else None)."""
+        if self.state == "SEARCH":
+            # Single-pass, both polarities; the correlator keeps the L-1 bit tail itself,
+            # so the whole buffer is consumed and no lag is ever re-examined.
+            consumed, inverted = self.correlator.search(bits)
+            if inverted is not None:
+                self.is_inverted, self.state, self.frame_fill = inverted, "COLLECT", 0
+            return consumed, None
+
+        to_take = min(len(bits), self.chips_per_frame - self.frame_fill)
+        dst = self.frame_buf[self.frame_fill:self.frame_fill + to_take]
+        np.bitwise_and(bits[:to_take], 1, out=dst)
+        if self.is_inverted: dst ^= 1
+        self.frame_fill += to_take
+        if self.frame_fill < self.chips_per_frame: return to_take, None
+        self.state, self.frame_fill = "SEARCH", 0
+        return to_take, self.to_block(self.frame_buf)
+
+    def to_block(self, chips):
+        """Collected chips -> packed frame bytes (packbits copies out of the reusable buffer)."""
+        bits = self.ccsk.decode_array(chips) if self.use_ccsk else chips
+        if self.use_nrzi: self.nrzi.reset(); bits = self.nrzi.decode_array(bits)
+        return np.packbits(bits).tobytes()
+
+class LinkDecoder:
+    """
+    GNU Radio-free frame recovery: de-whiten -> deinterleave -> RS -> CRC -> COMSEC.
+    Used in-thread by the depacketizer and inside each pool process.
+    """
+    def __init__(self, cfg):
+        l_cfg = cfg.get('link_layer', {})
+        self.use_fec = l_cfg.get('use_fec', True)
+        self.use_interleaving = l_cfg.get('use_interleaving', True)
+        self.use_whitening = l_cfg.get('use_whitening', True)
+        self.comsec = Comsec(bytes.fromhex(l_cfg.get('comsec_key', '00'*32))) if l_cfg.get('use_comsec', False) else None
+        self.interleaver = MatrixInterleaver(rows=l_cfg.get('interleaver_rows', 15))
+        self.scrambler = Scrambler(mask=l_cfg.get('scrambler_mask', 0x48), seed=l_cfg.get('scrambler_seed', 0x7F))
+        self.crc = CRCEngine(l_cfg.get('crc_type', 'CRC16'))
+        self.last_sid = None
+        if self.use_fec:
+            from rs_helper import RS1511, RS3115
+            self.rs = RS3115() if l_cfg.get('fec_type', 'RS1511') == "RS3115" else RS1511()
+
+    def verify_crc(self, payload, true_plen, sid, m_type, seq):
+        if len(payload) < (true_plen + self.crc.size): return False
+        header_base = struct.pack('BBBB', sid, m_type, seq, true_plen)
+        return self.crc.check(header_base + payload[:true_plen], payload[true_plen:true_plen+self.crc.size])
+
+    def recover(self, data_block):
+        """De-whiten, deinterleave and RS-correct a frame. Returns (block, repairs); no CRC check."""
+        if self.use_whitening: self.scrambler.reset(); data_block = self.scrambler.process(data_block)
+        if self.use_interleaving: data_block = self.interleaver.deinterleave(data_block)
+        if self.use_fec: return self.rs.decode_block(data_block)
+        return data_block, 0
+
+    def decode(self, data_block):
+        """
+        Returns (sid, m_type, seq, payload, repairs) on CRC pass, else None. Raises on malformed blocks.
+        m_type is the raw type byte (destination node in the high nibble). last_sid keeps the
+        header src_id of the last frame, verified or not, for per-peer CRC failure accounting.
+        """
+        self.last_sid = None
+        processed_block, repairs_made = self.recover(data_block)
+
+        sid, m_type, seq, true_plen = struct.unpack('BBBB', processed_block[:4])
+        self.last_sid = sid
+        payload_zone = processed_block[4:4+true_plen+self.crc.size]
+        if not self.verify_crc(payload_zone, true_plen, sid, m_type, seq): return None
+
+        payload = payload_zone[:true_plen]
+        if self.comsec and m_type & 0x0F in COMSEC_TYPES: payload = self.comsec.decrypt(payload)
+        return sid, m_type, seq, payload, repairs_made
+
+def _pool_worker(cfg, shm_name, n_slots, slot_size, tasks, results):
+    """Process entry point: attaches to the frame ring and decodes slots until a None task arrives."""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    ring = np.ndarray((n_slots, slot_size), dtype=np.uint8, buffer=shm.buf)
+    decoder = LinkDecoder(cfg)
+    try:
+        while True:
+            task = tasks.get()
+            if task is None: break
+            ticket, slot, length = task
+            try: result = decoder.decode(ring[slot, :length].tobytes())
+            except Exception: result = None
+            results.put((ticket, slot, result, decoder.last_sid))
+    finally:
+        del ring; shm.close()
+
+class ProcessWorkerPool:
+    """
+    Runs LinkDecoder in separate processes so RS decoding does not hold the flowgraph's GIL.
+    Frames travel through a shared-memory ring of fixed-size slots (only slot indices are
+    pickled); results are re-sequenced by ticket and handed to on_result(result, header_sid,
+    confidence) in arrival order from a collector thread.
+    Each worker has its own task queue, so the collector knows which tickets a worker held: if a
+    worker process dies, the frame it was decoding counts as a decode failure (it may be what
+    killed it), its queued frames move to a restarted worker and the ticket order never stalls.
+    Workers start from a forkserver (spawn where unavailable), never by forking the multithreaded
+    flowgraph process; submit() waits at most submit_timeout for a slot and counts a stall drop.
+    """
+    def __init__(self, cfg, on_result, n_workers=2, slot_size=1024, n_slots=None, submit_timeout=1.0):
+        self.on_result, self.slot_size, self.submit_timeout = on_result, int(slot_size), submit_timeout
+        self.n_slots = int(n_slots or n_workers * 4)
+        self.shm = shared_memory.SharedMemory(create=True, size=self.n_slots * self.slot_size)
+        self.ring = np.ndarray((self.n_slots, self.slot_size), dtype=np.uint8, buffer=self.shm.buf)
+        self.free_slots = queue.Queue()
+        for i in range(self.n_slots): self.free_slots.put(i)
+
+        self.cfg = cfg
+        self.ctx = mp.get_context('forkserver' if 'forkserver' in mp.get_all_start_methods() else 'spawn')
+        self.results = self.ctx.Queue()
+        self.procs, self.tasks = [None] * max(1, int(n_workers)), [None] * max(1, int(n_workers))
+        for i in range(len(self.procs)): self._spawn(i)
+
+        self.next_ticket = 0; self.next_emit = 0; self.pending = {}; self.oversize = 0; self.stalled = 0
+        self.assigned = {} # ticket -> (worker index, slot, length) until its result arrives
+        self.lock = threading.Lock()
+        self.restarts = 0
+        self.active = True
+        self.collector = threading.Thread(target=self._collect, daemon=True)
+        self.collector.start()
+
+    def submit(self, data_block, confidence):
+        """Copies a frame into a free ring slot, waiting up to submit_timeout. False if it was dropped."""
+        if len(data_block) > self.slot_size:
+            self.oversize += 1; return False
+        try: slot = self.free_slots.get(timeout=self.submit_timeout)
+        except queue.Empty:
+            self.stalled += 1; return False
+        self.ring[slot, :len(data_block)] = np.frombuffer(data_block, dtype=np.uint8)
+        ticket = self.next_ticket; self.next_ticket += 1
+        self.pending[ticket] = confidence
+        with self.lock:
+            loads = [0] * len(self.procs)
+            for w, _, _ in self.assigned.values(): loads[w] += 1
+            w = loads.index(min(loads)) # least-loaded worker
+            self.assigned[ticket] = (w, slot, len(data_block))
+            self.tasks[w].put((ticket, slot, len(data_block)))
+        return True
+
+    def _spawn(self, i):
+        self.tasks[i] = self.ctx.Queue()
+        self.procs[i] = self.ctx.Process(target=_pool_worker, daemon=True,
+                                         args=(self.cfg, self.shm.name, self.n_slots, self.slot_size, self.tasks[i], self.results))
+        self.procs[i].start()
+
+    def _reap(self, done):
+        """Restarts dead workers: the ticket each was decoding fails, the rest of its queue is re-issued."""
+        with self.lock:
+            for i, p in enumerate(self.procs):
+                if p.is_alive() or not self.active: continue
+                lost = sorted(t for t, (w, _, _) in self.assigned.items() if w == i)
+                self.restarts += 1
+                self._spawn(i)
+                if not lost: continue
+                _, slot, _ = self.assigned.pop(lost[0])
+                self.free_slots.put(slot); done[lost[0]] = (None, None)
+                for t in lost[1:]:
+                    _, slot, length = self.assigned[t]
+                    self.tasks[i].put((t, slot, length))
+
+    def _collect(self):
+        done, last_check = {}, time.monotonic()
+        while self.active:
+            # Liveness is checked every 0.5 s even while other workers keep results flowing
+            if time.monotonic() - last_check >= 0.5:
+                try: self._reap(done)
+                except Exception as e: print(f"\033[91m[POOL] Worker restart error: {e!r}\033[0m")
+                last_check = time.monotonic()
+            try: ticket, slot, result, sid = self.results.get(timeout=0.5)
+            except queue.Empty: pass
+            except (EOFError, OSError): break
+            except Exception as e: # e.g. a torn result from a worker killed mid-write; _reap writes its ticket off
+                print(f"\033[91m[POOL] Result read error: {e!r}\033[0m")
+            else:
+                with self.lock:
+                    if self.assigned.pop(ticket, None) is None: continue # already written off by _reap
+                self.free_slots.put(slot)
+                done[ticket] = (result, sid)
+            # Release strictly in submission order so payloads leave the block in sequence
+            while self.next_emit in done:
+                ticket = self.next_emit; self.next_emit += 1
+                confidence = self.pending.pop(ticket, 1.0)
+                try: self.on_result(*done.pop(ticket), confidence)
+                except Exception as e:
+                    print(f"\033[91m[POOL] Result handler error: {e!r}\033[0m")
+
+    def in_flight(self):
+        return self.n_slots - self.free_slots.qsize()
+
+    def close(self):
+        if not self.active: return
+        self.active = False
+        for q in self.tasks: q.put(None)
+        for p in self.procs:
+            p.join(timeout=1.0)
+            if p.is_alive(): p.terminate()
+        self.collector.join(timeout=1.0)
+        del self.ring
+        self.shm.close(); self.shm.unlink()
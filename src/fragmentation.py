@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Opal Vanguard - Fragmentation & Reassembly (v1.0)
+
+import struct
+from collections import OrderedDict
+
+TYPE_FRAG = 5 # frame type of one fragment of a larger message
+FRAG_HDR = struct.Struct('>BHH') # message id, fragment index, fragment count
+MAX_FRAGMENTS = 0xFFFF
+
+def split(data, capacity, msg_id):
+    """data -> fragment payloads of at most capacity bytes, each behind a FRAG_HDR sub-header."""
+    chunk = capacity - FRAG_HDR.size
+    if chunk <= 0: raise ValueError(f"Frame payload of {capacity} bytes cannot carry a fragment")
+    count = max(1, -(-len(data) // chunk))
+    if count > MAX_FRAGMENTS: raise ValueError(f"{len(data)}-byte message needs {count} fragments (max {MAX_FRAGMENTS})")
+    return [FRAG_HDR.pack(msg_id & 0xFF, i, count) + data[i * chunk:(i + 1) * chunk] for i in range(count)]
+
+class Reassembler:
+    """
+    Rebuilds fragmented messages on RX. Partial messages are keyed by (key, message id), where
+    key is normally the sender's src_id, and accept fragments in any order. Duplicates are ignored,
+    including late ones for a message completed within the last timeout_s.
+    The buffer is bounded: a partial message is dropped once timeout_s passes without a new
+    fragment, and the oldest is evicted whenever more than max_pending messages or max_bytes of
+    payload are held.
+    """
+    def __init__(self, timeout_s=2.0, max_pending=4, max_bytes=1 << 20):
+        self.timeout_s, self.max_pending, self.max_bytes = timeout_s, max_pending, max_bytes
+        self.pending = OrderedDict() # (key, msg_id) -> [count, {index: chunk}, last fragment time]
+        self.done = OrderedDict() # (key, msg_id) -> completion time
+        self.held = 0
+        self.stats = {"fragments": 0, "duplicates": 0, "completed": 0, "expired": 0, "evicted": 0, "malformed": 0}
+
+    def __len__(self):
+        return len(self.pending)
+
+    def add(self, key, payload, now):
+        """Takes one fragment payload. Returns the whole message once its last fragment arrives, else None."""
+        self.expire(now)
+        if len(payload) < FRAG_HDR.size:
+            self.stats["malformed"] += 1; return None
+        msg_id, idx, count = FRAG_HDR.unpack_from(payload)
+        if not idx < count:
+            self.stats["malformed"] += 1; return None
+        self.stats["fragments"] += 1
+        slot = (key, msg_id)
+        if slot in self.done:
+            self.stats["duplicates"] += 1; return None
+        entry = self.pending.get(slot)
+        if entry is not None and entry[0] != count: # message id reused by a new message
+            self._drop(slot); entry = None
+        if entry is None: entry = self.pending[slot] = [count, {}, now]
+        if idx in entry[1]: self.stats["duplicates"] += 1
+        else: entry[1][idx] = bytes(payload[FRAG_HDR.size:]); self.held += len(entry[1][idx])
+        entry[2] = now
+        self.pending.move_to_end(slot)
+        if len(entry[1]) == count:
+            self._drop(slot); self.done[slot] = now
+            self.stats["completed"] += 1
+            return b"".join(entry[1][i] for i in range(count))
+        while len(self.pending) > self.max_pending or self.held > self.max_bytes:
+            self._drop(next(iter(self.pending))); self.stats["evicted"] += 1
+        return None
+
+    def expire(self, now):
+        """Drops partial messages with no fragment for timeout_s. Returns how many were dropped."""
+        stale = [slot for slot, entry in self.pending.items() if now - entry[2] >= self.timeout_s]
+        for slot in stale: self._drop(slot)
+        while self.done and now - next(iter(self.done.values())) >= self.timeout_s: self.done.popitem(last=False)
+        self.stats["expired"] += len(stale)
+        return len(stale)
+
+    def forget(self, key):
+        """Drops everything held for key, e.g. when that sender restarts its message ids."""
+        for slot in [slot for slot in self.pending if slot[0] == key]: self._drop(slot)
+        for slot in [slot for slot in self.done if slot[0] == key]: del self.done[slot]
+
+    def _drop(self, slot):
+        entry = self.pending.pop(slot)
+        self.held -= sum(len(c) for c in entry[1].values())
@@ -6,12 +6,13 @@ import numpy as np
 from gnuradio import gr
 import pmt
 import time
-import struct
+import threading
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
 from cryptography.hazmat.backends import default_backend
+from dsp_helper import AFHRemap
 
 class tod_hop_generator(gr.basic_block):
-    def __init__(self, key=b'\x00'*32, num_channels=50, center_freq=915e6, channel_spacing=150e3, dwell_ms=200, lookahead_ms=0):
+    def __init__(self, key=b'\x00'*32, num_channels=50, center_freq=915e6, channel_spacing=150e3, dwell_ms=200, lookahead_ms=0, table_epochs=512):
         gr.basic_block.__init__(self, name="tod_hop_generator", in_sig=None, out_sig=None)
             
         self.num_channels = num_channels
@@ -22,7 +23,20 @@ class tod_hop_generator(gr.basic_block):
         self.lookahead_sec = lookahead_ms / 1000.0
         
         self.backend = default_backend()
-        self.blacklist = [] # List of channel indices to avoid
+        self.afh = AFHRemap(num_channels) # Blacklist mask + precomputed remap table
+
+        # Rolling hop table: raw channel indices for table_epochs consecutive epochs.
+        # One ECB encryptor is kept for the block's lifetime; a daemon thread precomputes
+        # the following window so a trigger is a single array lookup.
+        self.table_epochs = max(16, int(table_epochs))
+        self.encryptor = Cipher(algorithms.AES(self.key), modes.ECB(), backend=self.backend).encryptor()
+        self.crypto_lock = threading.Lock()
+        first_epoch = int((time.time() + self.lookahead_sec) / self.dwell_sec)
+        self.hop_table = (first_epoch, self._hop_indices(first_epoch, self.table_epochs))
+        self.next_table = None
+        self.refill_event = threading.Event()
+        self.refill_thread = threading.Thread(target=self._refill_worker, daemon=True)
+        self.refill_thread.start(); self.refill_event.set()
         
         # Message ports
         self.message_port_register_in(pmt.intern("trigger"))
@@ -33,33 +47,52 @@ class tod_hop_generator(gr.basic_block):
         
         self.message_port_register_out(pmt.intern("freq"))
 
+    @property
+    def blacklist(self):
+        return self.afh.blacklist
+
     def handle_blacklist(self, msg):
-        """Expects a list of integers."""
-        if pmt.is_vector_obj(msg):
-            self.blacklist = list(pmt.u8vector_elements(msg))
-            print(f"[AFH] Blacklist updated: {self.blacklist}")
+        """Expects a vector of channel indices (u8/u16/s32 uniform vector or PMT vector)."""
+        if pmt.is_uniform_vector(msg) or pmt.is_vector_obj(msg):
+            if self.afh.update(pmt.to_python(msg)): print(f"[AFH] Blacklist updated: {self.blacklist}")
+
+    def _hop_indices(self, first_epoch, count):
+        """Raw channel index per epoch: all counters encrypted in one ECB call, first 4 keystream bytes mod N."""
+        counters = np.zeros((count, 2), dtype='>u8')
+        counters[:, 1] = np.arange(first_epoch, first_epoch + count, dtype=np.uint64)
+        with self.crypto_lock: keystream = self.encryptor.update(counters.tobytes())
+        words = np.frombuffer(keystream, dtype='>u4')[::4]
+        return (words % self.num_channels).astype(np.int32)
+
+    def _refill_worker(self):
+        while True:
+            self.refill_event.wait(); self.refill_event.clear()
+            start, table = self.hop_table
+            self.next_table = (start + len(table), self._hop_indices(start + len(table), self.table_epochs))
+
+    def raw_index(self, epoch):
+        """O(1) table lookup; rolls to the prefetched window, or rebuilds in place after a clock jump."""
+        start, table = self.hop_table
+        if not (start <= epoch < start + len(table)):
+            nxt = self.next_table
+            if nxt is not None and nxt[0] <= epoch < nxt[0] + len(nxt[1]): self.hop_table = nxt
+            else: self.hop_table = (epoch, self._hop_indices(epoch, self.table_epochs))
+            self.next_table = None; self.refill_event.set()
+            start, table = self.hop_table
+        return int(table[epoch - start])
 
     def handle_trigger(self, msg):
         """Calculates frequency based on absolute system time with AFH remapping."""
-        now = time.time() + self.lookahead_sec
-        epoch = int(now / self.dwell_sec)
-        
-        nonce = struct.pack(">QQ", 0, epoch)
-        cipher = Cipher(algorithms.AES(self.key), modes.ECB(), backend=self.backend)
-        encryptor = cipher.encryptor()
-        keystream = encryptor.update(nonce) + encryptor.finalize()
+        # hop_scheduler supplies the epoch from the sample clock; bare triggers fall back to host time
+        if pmt.is_dict(msg) and pmt.dict_has_key(msg, pmt.intern("epoch")):
+            epoch = pmt.to_long(pmt.dict_ref(msg, pmt.intern("epoch"), pmt.from_long(0)))
+        else:
+            epoch = int((time.time() + self.lookahead_sec) / self.dwell_sec)
         
-        rand_val = struct.unpack(">I", keystream[:4])[0]
-        raw_idx = rand_val % self.num_channels
+        raw_idx = self.raw_index(epoch)
         
-        # AFH Remapping: If channel is blacklisted, find the next available clear one
-        final_idx = raw_idx
-        if self.blacklist and final_idx in self.blacklist:
-            for i in range(1, self.num_channels):
-                candidate = (raw_idx + i) % self.num_channels
-                if candidate not in self.blacklist:
-                    final_idx = candidate
-                    break
+        # AFH Remapping: blacklisted channels map to the next clear one (table lookup)
+        final_idx = self.afh.remap(raw_idx)
         
         freq = self.center_freq + (final_idx - (self.num_channels // 2)) * self.channel_spacing
         epoch_start_time = epoch * self.dwell_sec
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Opal Vanguard - Sample-Clock Hop Scheduler
+
+import numpy as np
+from gnuradio import gr
+import pmt
+import time
+
+DEFAULT_LOOKAHEAD_MS = 20 # epoch announcement lead when hopping.lookahead_ms is unset (generator and scheduler share it)
+
+class hop_scheduler(gr.sync_block):
+    """
+    Drives hop epochs from the sample clock instead of a UI timer.
+    Device time is taken from the stream's rx_time tags (anchored once to the host clock
+    if the source never tags) and advanced by the number of samples consumed. Each dwell
+    epoch is announced on "trigger" lookahead_ms before it starts as {epoch, time}, so the
+    TOD generator hops on the same epoch grid and the UHD handler can issue a timed tune.
+    """
+    def __init__(self, samp_rate, dwell_ms=200, lookahead_ms=DEFAULT_LOOKAHEAD_MS):
+        gr.sync_block.__init__(self, name="hop_scheduler", in_sig=[np.complex64], out_sig=None)
+        self.samp_rate = float(samp_rate)
+        self.dwell_sec = dwell_ms / 1000.0
+        self.lookahead_sec = lookahead_ms / 1000.0
+        self.ref_time, self.ref_offset = None, 0
+        self.next_epoch = None
+        self.rx_time_key = pmt.intern("rx_time")
+        self.message_port_register_out(pmt.intern("trigger"))
+
+    def sample_time(self, offset):
+        """Device time (s) of absolute sample offset."""
+        return self.ref_time + (offset - self.ref_offset) / self.samp_rate
+
+    def work(self, input_items, output_items):
+        n = len(input_items[0]); start = self.nitems_read(0)
+        for tag in self.get_tags_in_window(0, 0, n, self.rx_time_key):
+            self.ref_time = pmt.to_uint64(pmt.tuple_ref(tag.value, 0)) + pmt.to_double(pmt.tuple_ref(tag.value, 1))
+            self.ref_offset = tag.offset
+        if self.ref_time is None: self.ref_time, self.ref_offset = time.time(), start
+
+        last_epoch = int((self.sample_time(start + n) + self.lookahead_sec) / self.dwell_sec)
+        # Start-up, overflow gaps and rx_time jumps: resync instead of replaying stale epochs
+        if self.next_epoch is None or abs(last_epoch - self.next_epoch) > 2: self.next_epoch = last_epoch
+        while self.next_epoch <= last_epoch:
+            msg = pmt.make_dict()
+            msg = pmt.dict_add(msg, pmt.intern("epoch"), pmt.from_long(self.next_epoch))
+            msg = pmt.dict_add(msg, pmt.intern("time"), pmt.from_double(self.next_epoch * self.dwell_sec))
+            self.message_port_pub(pmt.intern("trigger"), msg)
+            self.next_epoch += 1
+        return n
@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Opal Vanguard - In-Memory Link Benchmark Harness (v1.0)
+
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import platform
+import tracemalloc
+import numpy as np
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from fec_worker import LinkEncoder, FrameSync, LinkDecoder
+from mission_profile import MissionProfile
+from arq import SelectiveRepeatARQ, parse_ack
+
+TX_STAGES = ("tx.comsec", "tx.crc", "tx.fec", "tx.interleave", "tx.scramble", "tx.nrzi", "tx.ccsk")
+RX_STAGES = ("rx.sync", "rx.ccsk", "rx.nrzi", "rx.scramble", "rx.interleave", "rx.fec", "rx.crc")
+
+class StageTimer:
+    """Accumulates perf_counter_ns totals per stage name."""
+    def __init__(self):
+        self.ns = {}
+    def add(self, stage, ns):
+        self.ns[stage] = self.ns.get(stage, 0) + ns
+    def per_frame_us(self, frames):
+        return {k: round(v / 1e3 / max(1, frames), 3) for k, v in sorted(self.ns.items())}
+
+class _Timed:
+    """Forwards to obj, timing calls of the named methods under stage (lets LinkDecoder run unmodified)."""
+    def __init__(self, obj, timer, stage, methods):
+        self._obj, self._timer, self._stage, self._methods = obj, timer, stage, methods
+    def __getattr__(self, name):
+        attr = getattr(self._obj, name)
+        if name not in self._methods: return attr
+        def timed(*args, **kwargs):
+            t0 = time.perf_counter_ns()
+            try: return attr(*args, **kwargs)
+            finally: self._timer.add(self._stage, time.perf_counter_ns() - t0)
+        return timed
+
+class LinkBench:
+    """
+    Drives one mission profile through packetizer -> [channel] -> depacketizer entirely in-process:
+    no top_block, no temp YAML, no message_debug polling. It runs the blocks' own GNU Radio-free
+    stages (LinkEncoder, FrameSync and LinkDecoder from fec_worker.py) with their helpers wrapped
+    in stage timers, so the benchmark cannot drift from the flowgraph.
+    """
+    def __init__(self, profile, chunk=4096, seed=1):
+        self.profile = MissionProfile.resolve(profile)
+        self.chunk = chunk
+        self.rng = np.random.default_rng(seed)
+        self.timer = StageTimer()
+        self.last_block = None # last synced frame bytes, for BER accounting (link_sim.py)
+
+        # TX side (packetizer)
+        e = self.encoder = LinkEncoder(self.profile)
+        if e.comsec: e.comsec = _Timed(e.comsec, self.timer, "tx.comsec", ("encrypt",))
+        e.crc = _Timed(e.crc, self.timer, "tx.crc", ("append",))
+        if e.use_fec: e.rs = _Timed(e.rs, self.timer, "tx.fec", ("encode_block",))
+        e.interleaver = _Timed(e.interleaver, self.timer, "tx.interleave", ("interleave",))
+        e.scrambler = _Timed(e.scrambler, self.timer, "tx.scramble", ("process",))
+        e.nrzi = _Timed(e.nrzi, self.timer, "tx.nrzi", ("encode_array",))
+        e.ccsk = _Timed(e.ccsk, self.timer, "tx.ccsk", ("encode_symbols",))
+
+        # RX side (depacketizer)
+        f = self.sync = FrameSync(self.profile)
+        f.correlator = _Timed(f.correlator, self.timer, "rx.sync", ("search",))
+        f.ccsk = _Timed(f.ccsk, self.timer, "rx.ccsk", ("decode_array",))
+        f.nrzi = _Timed(f.nrzi, self.timer, "rx.nrzi", ("decode_array",))
+        d = self.decoder = LinkDecoder(self.profile.cfg)
+        d.scrambler = _Timed(d.scrambler, self.timer, "rx.scramble", ("process",))
+        d.interleaver = _Timed(d.interleaver, self.timer, "rx.interleave", ("deinterleave",))
+        d.crc = _Timed(d.crc, self.timer, "rx.crc", ("check",))
+        if d.use_fec: d.rs = _Timed(d.rs, self.timer, "rx.fec", ("decode_block",))
+
+    @property
+    def last_raw(self):
+        """Header + payload + CRC of the last encoded frame before FEC."""
+        return self.encoder.last_raw
+
+    def max_payload(self, want):
+        """Largest payload <= want that still fits frame_size after COMSEC, CRC and FEC expansion."""
+        return min(want, self.profile.max_payload)
+
+    def encode(self, payload, seq=0, m_type=0, preamble_len=None, src_id=0, dst=0):
+        """Payload -> burst bits (preamble, syncword, chips, flush tail), exactly as packetizer.handle_msg."""
+        return self.encoder.burst(payload, src_id, dst, m_type, seq, preamble_len)
+
+    def channel(self, stream, ber):
+        """Binary symmetric channel: flips each bit with probability ber."""
+        if ber <= 0: return stream
+        t = time.perf_counter_ns()
+        stream = stream ^ (self.rng.random(len(stream)) < ber).astype(np.uint8)
+        self.timer.add("channel", time.perf_counter_ns() - t)
+        return stream
+
+    def modem(self, stream, bursts, snr_db=None):
+        """
+        Runs the bit stream through the mission's GNU Radio modulator, an AWGN channel_model and the
+        demodulator (mission_flowgraph.build_modem) in one top_block.run(); needs GNU Radio.
+        """
+        from gnuradio import gr, blocks, channels
+        import pmt
+        from mission_flowgraph import build_modem
+        samp_rate = self.profile.section('hardware').get('samp_rate', 2000000)
+        mod, demod, _, rx_unpack = build_modem(self.profile.section('physical'), samp_rate)
+        tags, offset = [], 0
+        for n in bursts:
+            tag = gr.tag_t(); tag.offset, tag.key, tag.value = offset, pmt.intern("packet_len"), pmt.from_long(n)
+            tags.append(tag); offset += n
+        tb = gr.top_block()
+        src = blocks.vector_source_b(stream.tolist(), False, 1, tags)
+        chan = channels.channel_model(noise_voltage=0.0 if snr_db is None else 10 ** (-snr_db / 20.0))
+        sink = blocks.vector_sink_b()
+        tb.connect(*([src, mod, chan, demod] + ([rx_unpack] if rx_unpack is not None else []) + [sink]))
+        t = time.perf_counter_ns()
+        tb.run()
+        self.timer.add("modem", time.perf_counter_ns() - t)
+        return np.array(sink.data(), dtype=np.uint8)
+
+    def receive(self, stream):
+        """Sync search + frame collection over a continuous bit stream in chunk-sized work calls, as depacketizer.general_work."""
+        results, off, n = [], 0, len(stream)
+        self.sync.reset(); self.last_block = None
+        while off < n:
+            consumed, block = self.sync.work(stream[off:off + self.chunk])
+            off += consumed
+            if block is None: continue
+            self.last_block = block
+            try: result = self.decoder.decode(block)
+            except Exception: result = None
+            if result is not None: results.append(result)
+        return results
+
+    def run(self, frames=200, payload_len=64, ber=0.0, modem=False, snr_db=None, mem_frames=20):
+        """Returns a JSON-ready dict of throughput, PER, per-stage us/frame and memory/frame."""
+        plen = self.max_payload(payload_len)
+        payloads = [self.rng.integers(1, 256, plen, dtype=np.uint8).tobytes() for _ in range(frames)]
+
+        start = time.perf_counter()
+        bursts = [self.encode(p, seq=i) for i, p in enumerate(payloads)]
+        tx_s = time.perf_counter() - start
+        stream = np.concatenate(bursts)
+        if modem: stream = self.modem(stream, [len(b) for b in bursts], snr_db)
+        stream = self.channel(stream, ber)
+        t = time.perf_counter()
+        results = self.receive(stream)
+        rx_s = time.perf_counter() - t
+        total_s = time.perf_counter() - start
+
+        expected = {}
+        for p in payloads: expected[p] = expected.get(p, 0) + 1
+        delivered = 0
+        for r in results:
+            if expected.get(r[3], 0): expected[r[3]] -= 1; delivered += 1
+        stage_us = self.timer.per_frame_us(frames)
+        prof = self.profile
+
+        return {
+            "mission": self.profile.mission_id, "frames": frames, "payload_bytes": plen,
+            "delivered": delivered, "per": round(1.0 - delivered / frames, 4) if frames else 0.0,
+            "frames_per_sec": round(frames / total_s, 1) if total_s else 0.0,
+            "tx_us_per_frame": round(tx_s * 1e6 / frames, 2), "rx_us_per_frame": round(rx_s * 1e6 / frames, 2),
+            "stage_us": stage_us, "mem_bytes_per_frame": self.memory_per_frame(payloads[:mem_frames]),
+            # Burst overhead: payload share of the bits on air with the acquisition and the connected preamble
+            "airtime_us_per_frame": round(prof.airtime_s() * 1e6, 1),
+            "air_efficiency": round(plen * 8 / prof.burst_bits(), 4),
+            "air_efficiency_short": round(plen * 8 / prof.burst_bits(prof.preamble_short), 4),
+        }
+
+    def memory_per_frame(self, payloads):
+        """Mean tracemalloc peak (bytes) of one frame's encode + receive, NumPy buffers included."""
+        if not payloads: return 0
+        saved, self.timer = self.timer, StageTimer()
+        tracemalloc.start()
+        peaks = []
+        try:
+            for i, p in enumerate(payloads):
+                tracemalloc.reset_peak(); base = tracemalloc.get_traced_memory()[0]
+                self.receive(self.encode(p, seq=i))
+                peaks.append(tracemalloc.get_traced_memory()[1] - base)
+        finally:
+            tracemalloc.stop(); self.timer = saved
+        return int(np.mean(peaks))
+
+def arq_goodput(profile, messages=200, payload_len=64, ber=0.0, seed=1, max_airtime_s=600.0):
+    """
+    Selective-repeat ARQ goodput over the benchmark link: a sender and a receiver
+    SelectiveRepeatARQ (session_manager's engine) exchange DATA and selective ACK bursts
+    through LinkBench encode -> BSC(ber) -> receive on simulated half-duplex airtime
+    (burst bits / bit rate), with mac_layer's window, retries and timeout. Like session_manager
+    on a connected link, first transmissions and ACKs use the short preamble, retransmissions the long one.
+    """
+    profile = MissionProfile.resolve(profile)
+    mac, phy = profile.section('mac_layer'), profile.section('physical')
+    bit_rate = profile.section('hardware').get('samp_rate', 2000000) / phy.get('samples_per_symbol', 10)
+    tx_bench, rx_bench = LinkBench(profile, seed=seed), LinkBench(profile, seed=seed + 1)
+    air, delivered, clock = [], [], 0.0
+    arq_kw = dict(window=mac.get('arq_window', 16), max_retries=mac.get('max_retries', 3),
+                  rto_s=mac.get('arq_timeout_ms', 500) / 1000.0)
+    sender = SelectiveRepeatARQ(lambda seq, obj: air.append((seq, obj, sender.in_flight[seq][1] > 0)), None, **arq_kw)
+    receiver = SelectiveRepeatARQ(None, delivered.append, **arq_kw)
+
+    plen = tx_bench.max_payload(payload_len)
+    payloads = [tx_bench.rng.integers(0, 256, plen, dtype=np.uint8).tobytes() for _ in range(messages)]
+    for p in payloads: sender.submit(p, clock)
+    while (sender.in_flight or sender.backlog or air) and clock < max_airtime_s:
+        if air:
+            seq, obj, retry = air.pop(0)
+            burst = tx_bench.encode(obj, seq=seq, preamble_len=None if retry else profile.preamble_short); clock += len(burst) / bit_rate
+            for _, m_type, r_seq, payload, _ in rx_bench.receive(tx_bench.channel(burst, ber)):
+                if m_type != 0: continue
+                ack = rx_bench.encode(receiver.on_data(r_seq, payload, clock), m_type=2, preamble_len=profile.preamble_short); clock += len(ack) / bit_rate
+                for _, a_type, _, a_payload, _ in tx_bench.receive(rx_bench.channel(ack, ber)):
+                    sack = parse_ack(a_payload) if a_type == 2 else None
+                    if sack: sender.on_ack(sack[0], sack[1], clock)
+        else:
+            clock += sender.wheel.tick_s # idle until the next retransmission timer
+        sender.poll(clock); receiver.poll(clock)
+
+    stats = sender.snapshot()
+    sent = iter(payloads) # delivered must be an in-order subsequence of what was sent
+    in_order = all(any(got == want for want in sent) for got in delivered)
+    return {"messages": messages, "payload_bytes": plen, "delivered": len(delivered), "in_order": in_order,
+            "airtime_s": round(clock, 3), "goodput_bps": round(len(delivered) * plen * 8 / clock, 1) if clock else 0.0,
+            "efficiency": round(len(delivered) / max(1, stats["sent"] + stats["retransmits"]), 4),
+            "retransmits": stats["retransmits"], "failed": stats["failed"], "duplicates": receiver.stats["duplicates"]}
+
+def compare(results, baseline, tolerance=0.20):
+    """Lists regressions vs a saved baseline: lower frames/sec or higher stage/memory cost beyond tolerance."""
+    regressions = []
+    for name, cur in results.items():
+        base = baseline.get("results", {}).get(name)
+        if not base: continue
+        if base["frames_per_sec"] and cur["frames_per_sec"] < base["frames_per_sec"] * (1 - tolerance):
+            regressions.append(f"{name}: frames/sec {base['frames_per_sec']} -> {cur['frames_per_sec']}")
+        if cur["per"] > base["per"] + 0.01:
+            regressions.append(f"{name}: PER {base['per']} -> {cur['per']}")
+        for stage, us in cur["stage_us"].items():
+            b_us = base["stage_us"].get(stage)
+            # Sub-microsecond stages are noise-dominated; only flag a real cost increase
+            if b_us is not None and us > 1.0 and us > b_us * (1 + tolerance):
+                regressions.append(f"{name}: {stage} {b_us} -> {us} us/frame")
+        b_arq, c_arq = base.get("arq"), cur.get("arq")
+        if b_arq and c_arq and c_arq["goodput_bps"] < b_arq["goodput_bps"] * (1 - tolerance):
+            regressions.append(f"{name}: ARQ goodput {b_arq['goodput_bps']} -> {c_arq['goodput_bps']} bps")
+        b_mem = base.get("mem_bytes_per_frame", 0)
+        if b_mem and cur["mem_bytes_per_frame"] > b_mem * (1 + tolerance):
+            regressions.append(f"{name}: memory {b_mem} -> {cur['mem_bytes_per_frame']} B/frame")
+    return regressions
+
+def print_report(name, r, clean=False):
+    # Any loss on a clean channel is a codec bug, not a channel effect
+    color = "\033[92m" if r["per"] == 0 else "\033[91m" if clean else "\033[93m"
+    print(f"{color}{name:<28}\033[0m {r['frames_per_sec']:>9.1f} fps | PER {r['per']:.3f} | "
+          f"TX {r['tx_us_per_frame']:.0f} us | RX {r['rx_us_per_frame']:.0f} us | {r['mem_bytes_per_frame'] / 1024:.1f} KiB/frame")
+    if "air_efficiency" in r:
+        print(f"    air {r['airtime_us_per_frame']:.0f} us/frame | payload share {r['air_efficiency']:.2f} (short preamble {r['air_efficiency_short']:.2f})")
+    stages = [s for s in TX_STAGES + RX_STAGES + ("channel", "modem") if r["stage_us"].get(s)]
+    print("    " + " | ".join(f"{s} {r['stage_us'][s]:.1f}" for s in stages))
+
+def main():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Opal Vanguard in-memory link benchmark")
+    parser.add_argument("configs", nargs="*", help="Mission YAMLs (default: mission_configs/level*.yaml)")
+    parser.add_argument("--frames", type=int, default=200)
+    parser.add_argument("--payload", type=int, default=64, help="Payload bytes (clamped to frame capacity)")
+    parser.add_argument("--ber", type=float, default=0.0, help="Binary symmetric channel bit error rate")
+    parser.add_argument("--modem", action="store_true", help="Include the GNU Radio modulator/demodulator")
+    parser.add_argument("--snr", type=float, default=None, help="AWGN SNR (dB) for --modem")
+    parser.add_argument("--arq", action="store_true", help="Also measure selective-repeat ARQ goodput at --ber")
+    parser.add_argument("--save", help="Write results as a JSON baseline")
+    parser.add_argument("--compare", help="Diff against a JSON baseline; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.20)
+    args = parser.parse_args()
+
+    configs = args.configs or sorted(glob.glob(os.path.join(root, "mission_configs", "level*.yaml")))
+    results, clean = {}, args.ber == 0 and not args.modem
+    print(f"\n=== Opal Vanguard Link Benchmark: {args.frames} frames/config, BER {args.ber}"
+          f"{', modem' if args.modem else ''} ===\n")
+    for path in configs:
+        name = os.path.basename(path)
+        results[name] = LinkBench(MissionProfile.load(path)).run(args.frames, args.payload, args.ber, args.modem, args.snr)
+        print_report(name, results[name], clean)
+        if args.arq:
+            a = results[name]["arq"] = arq_goodput(MissionProfile.load(path), min(args.frames, 200), args.payload, args.ber)
+            print(f"    ARQ: {a['delivered']}/{a['messages']} delivered in {a['airtime_s']:.2f}s air | goodput {a['goodput_bps'] / 1e3:.1f} kbps | "
+                  f"eff {a['efficiency']:.2f} | retx {a['retransmits']} | failed {a['failed']}{'' if a['in_order'] else ' | OUT OF ORDER'}")
+
+    broken = [name for name, r in results.items() if clean and r["per"] > 0]
+    for name in broken: print(f"\033[91m[BROKEN]\033[0m {name}: PER {results[name]['per']:.3f} on a clean channel")
+    if args.save and broken:
+        print(f"\n[BENCH] Not writing {args.save}: {len(broken)} config(s) lose frames on a clean channel")
+    elif args.save:
+        doc = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(), "numpy": np.__version__,
+               "machine": platform.machine(), "frames": args.frames, "ber": args.ber, "modem": args.modem, "snr_db": args.snr,
+               "results": results}
+        with open(args.save, 'w') as f: json.dump(doc, f, indent=2)
+        print(f"\n[BENCH] Baseline written to {args.save}")
+    if args.compare:
+        with open(args.compare, 'r') as f: regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions: print(f"\033[91m[REGRESSION]\033[0m {line}")
+        print(f"\n[BENCH] {len(regressions)} regression(s) vs {args.compare} (tolerance {args.tolerance:.0%})")
+        sys.exit(1 if regressions or broken else 0)
+    if broken: sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Opal Vanguard - Monte Carlo BER/PER Simulation Engine (v1.0)
+
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from link_benchmark import LinkBench
+from mission_profile import MissionProfile
+
+class BurstChannel:
+    """
+    Vectorized hard-decision channel over a (frames, chips) batch of bursts.
+    Chips are sent as BPSK +/-1 in AWGN at es_n0_db (a scalar, or one value per chip position when
+    parts of the burst carry different energy per chip); a pulsed jammer is on for duty of every
+    jam_period chips (random phase per burst) and adds noise jsr_db above the signal while on.
+    """
+    def __init__(self, es_n0_db, jam_duty=0.0, jam_period=512, jsr_db=10.0, rng=None):
+        self.sigma = np.sqrt(1.0 / (2.0 * 10 ** (np.asarray(es_n0_db, dtype=np.float32) / 10.0)))
+        self.jam_duty, self.jam_period = jam_duty, int(jam_period)
+        self.jam_sigma = np.sqrt(10 ** (jsr_db / 10.0))
+        self.rng = rng or np.random.default_rng()
+
+    def apply(self, bursts):
+        frames, n = bursts.shape
+        rx = bursts.astype(np.float32) * 2 - 1
+        rx += self.rng.standard_normal((frames, n), dtype=np.float32) * self.sigma
+        if self.jam_duty > 0:
+            phase = self.rng.integers(0, self.jam_period, (frames, 1))
+            on = ((np.arange(n) + phase) % self.jam_period) < self.jam_duty * self.jam_period
+            rx += self.rng.standard_normal((frames, n), dtype=np.float32) * self.jam_sigma * on
+        return (rx > 0).astype(np.uint8)
+
+def _bit_errors(a, b):
+    n = min(len(a), len(b))
+    return int(np.unpackbits(np.frombuffer(a[:n], dtype=np.uint8) ^ np.frombuffer(b[:n], dtype=np.uint8)).sum())
+
+def simulate_point(task):
+    """
+    One sweep point (process-pool entry): random frames through the packetizer/depacketizer
+    chain and BurstChannel until max_frames or max_frame_errors. Returns a JSON-ready dict.
+    """
+    cfg, source, ebn0_db, jam_duty, opts = task
+    bench = LinkBench(MissionProfile.from_dict(cfg, source=source), seed=opts["seed"])
+    rng = np.random.default_rng(opts["seed"])
+    plen = bench.max_payload(opts["payload"])
+    prof = bench.profile
+    # Eb is energy per payload bit. Preamble, sync and tail go out one chip per bit at the frame's
+    # coded bit energy; only the frame body is CCSK-spread, so only its chips divide that energy further.
+    rate = 8.0 * plen / (8 * prof.frame_size)
+    spread = prof.chips_per_frame / (8.0 * prof.frame_size)
+    es_n0 = np.full(prof.burst_bits(), ebn0_db + 10 * np.log10(rate), dtype=np.float32)
+    lo = prof.preamble_len + prof.sync_len; hi = lo + prof.chips_per_frame
+    es_n0[lo:hi] -= 10 * np.log10(spread)
+    channel = BurstChannel(es_n0, jam_duty, opts["jam_period"], opts["jsr_db"], rng)
+
+    frames = frame_errors = sync_loss = chip_errors = chips = bit_errors = bits = 0
+    repairs, decode_s = Counter(), 0.0
+    while frames < opts["max_frames"] and frame_errors < opts["max_frame_errors"]:
+        batch = min(opts["batch"], opts["max_frames"] - frames)
+        payloads = [rng.integers(1, 256, plen, dtype=np.uint8).tobytes() for _ in range(batch)]
+        rows, raws = [], []
+        for i, p in enumerate(payloads):
+            rows.append(bench.encode(p, seq=frames + i)); raws.append(bench.last_raw)
+        tx = np.stack(rows)
+        rx = channel.apply(tx)
+        # Raw BER is counted over the frame body (the chips at the spread Es/N0); sync loss is reported on its own
+        chip_errors += int(np.count_nonzero(rx[:, lo:hi] != tx[:, lo:hi])); chips += batch * (hi - lo)
+
+        for i in range(batch):
+            t = time.perf_counter()
+            results = bench.receive(rx[i])
+            decode_s += time.perf_counter() - t
+            match = next((r for r in results if r[3] == payloads[i]), None)
+            if match is not None: repairs[int(match[4])] += 1
+            else: frame_errors += 1
+            bits += 8 * len(raws[i])
+            if bench.last_block is None:
+                sync_loss += 1; bit_errors += 4 * len(raws[i]) # no sync: count half the bits wrong
+            else:
+                try: block, _ = bench.decoder.recover(bench.last_block)
+                except Exception: block = b""
+                bit_errors += _bit_errors(block, raws[i]) + 8 * max(0, len(raws[i]) - len(block))
+        frames += batch
+
+    return {
+        "mission": bench.profile.mission_id, "source": source, "ebn0_db": ebn0_db, "jam_duty": jam_duty,
+        "frames": frames, "payload_bytes": plen, "code_rate": round(rate, 4),
+        "chips_per_bit": round(spread, 3), "es_n0_db": round(float(es_n0[lo]), 3),
+        "raw_ber": chip_errors / chips if chips else 0.0, "ber": bit_errors / bits if bits else 0.0,
+        "per": frame_errors / frames if frames else 0.0, "sync_loss": sync_loss / frames if frames else 0.0,
+        "fec_repairs": {str(k): v for k, v in sorted(repairs.items())},
+        "decode_fps": round(frames / decode_s, 1) if decode_s else 0.0,
+    }
+
+def sweep(profiles, ebn0_points, jam_duties, workers=None, **opts):
+    """Runs every (profile, Eb/N0, duty) point across a process pool; results come back in task order."""
+    defaults = {"payload": 64, "max_frames": 1000, "max_frame_errors": 100, "batch": 100,
+                "jam_period": 512, "jsr_db": 10.0, "seed": 1}
+    defaults.update(opts)
+    tasks = []
+    for profile in profiles:
+        for ebn0 in ebn0_points:
+            for duty in jam_duties:
+                point_opts = dict(defaults, seed=defaults["seed"] + len(tasks))
+                tasks.append((profile.to_dict(), profile.source, float(ebn0), float(duty), point_opts))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(simulate_point, tasks))
+
+def _parse_range(spec):
+    """'0:12:2' -> 0,2,...,12 ; '1,3.5' -> [1, 3.5]"""
+    if ":" in spec:
+        start, stop, step = (float(x) for x in spec.split(":"))
+        return list(np.round(np.arange(start, stop + step / 2, step), 3))
+    return [float(x) for x in spec.split(",")]
+
+def main():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    parser = argparse.ArgumentParser(description="Opal Vanguard Monte Carlo BER/PER sweep")
+    parser.add_argument("configs", nargs="*", help="Mission YAMLs (default: mission_configs/level*.yaml)")
+    parser.add_argument("--ebn0", default="0:12:2", help="Eb/N0 points in dB, start:stop:step or a,b,c")
+    parser.add_argument("--jam-duty", default="0", help="Jammer duty cycles (0-1), start:stop:step or a,b,c")
+    parser.add_argument("--jam-period", type=int, default=512, help="Jammer pulse period in chips")
+    parser.add_argument("--jsr", type=float, default=10.0, help="Jammer-to-signal ratio while on (dB)")
+    parser.add_argument("--frames", type=int, default=1000, help="Max frames per point")
+    parser.add_argument("--max-errors", type=int, default=100, help="Stop a point after this many frame errors")
+    parser.add_argument("--payload", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=None, help="Pool size (default: all cores)")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", help="Write all points to this file")
+    args = parser.parse_args()
+
+    configs = args.configs or sorted(glob.glob(os.path.join(root, "mission_configs", "level*.yaml")))
+    profiles = [MissionProfile.load(c) for c in configs]
+    start = time.time()
+    results = sweep(profiles, _parse_range(args.ebn0), _parse_range(args.jam_duty), workers=args.workers,
+                    payload=args.payload, max_frames=args.frames, max_frame_errors=args.max_errors,
+                    jam_period=args.jam_period, jsr_db=args.jsr, seed=args.seed)
+
+    last = None
+    for r in results:
+        if r["source"] != last:
+            last = r["source"]
+            print(f"\n=== {os.path.basename(last)} [{r['mission']}] payload {r['payload_bytes']} B, rate {r['code_rate']}, {r['chips_per_bit']} chips/bit ===")
+            print(f"{'Eb/N0':>6} {'Duty':>5} {'Frames':>6} {'RawBER':>9} {'BER':>9} {'PER':>7} {'SyncLoss':>8} {'fps':>7}  Repairs")
+        hist = " ".join(f"{k}:{v}" for k, v in r["fec_repairs"].items())
+        print(f"{r['ebn0_db']:>6.1f} {r['jam_duty']:>5.2f} {r['frames']:>6} {r['raw_ber']:>9.2e} {r['ber']:>9.2e} "
+              f"{r['per']:>7.3f} {r['sync_loss']:>8.3f} {r['decode_fps']:>7.0f}  {hist}")
+    print(f"\n[SIM] {len(results)} points in {time.time() - start:.1f}s")
+
+    if args.json:
+        with open(args.json, 'w') as f: json.dump({"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "args": vars(args), "results": results}, f, indent=2)
+        print(f"[SIM] Results written to {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Opal Vanguard - PDU-Level MAC Test Harness (v1.0)
+
+import random
+import threading
+import pmt
+
+class PortCapture:
+    """
+    Records what a block publishes, per output port, by replacing its message_port_pub.
+    No flowgraph or message_debug is needed; safe against the session_manager tick thread.
+    """
+    def __init__(self, block):
+        self.msgs, self.lock = {}, threading.Lock()
+        block.message_port_pub = self.capture
+
+    def capture(self, port, msg):
+        with self.lock: self.msgs.setdefault(pmt.symbol_to_string(port), []).append(msg)
+
+    def take(self, port):
+        """Removes and returns everything published on port so far."""
+        with self.lock: return self.msgs.pop(port, [])
+
+    def peek(self, port):
+        with self.lock: return list(self.msgs.get(port, []))
+
+class Medium:
+    """
+    Shared broadcast channel between session_managers at the PDU level. Each frame reaches every
+    other node with the meta the depacketizer would produce (type, seq, src_id, dst_id), unless
+    dropped with probability loss; frames on a bad link (src, dst) fail CRC instead and arrive
+    as crc_fail {src_id}. nodes maps node id -> session_manager.
+    """
+    def __init__(self, nodes, bad_links=(), loss=0.0, seed=5):
+        self.nodes, self.bad_links, self.loss = nodes, set(bad_links), loss
+        self.ports = {nid: PortCapture(node) for nid, node in nodes.items()}
+        self.sent = {nid: 0 for nid in nodes} # frames each node put on the air
+        self.rng = random.Random(seed)
+
+    def pump(self):
+        """Delivers pkt_out frames until no node has anything left to send."""
+        moved = True
+        while moved:
+            moved = False
+            for nid, node in list(self.nodes.items()):
+                for msg in self.ports[nid].take("pkt_out"):
+                    moved = True; self.sent[nid] += 1
+                    meta = pmt.dict_add(pmt.car(msg), pmt.intern("src_id"), pmt.from_long(nid))
+                    for rid, rx in self.nodes.items():
+                        if rid == nid or self.rng.random() < self.loss: continue
+                        if (nid, rid) in self.bad_links: rx.handle_crc_fail(pmt.dict_add(pmt.make_dict(), pmt.intern("src_id"), pmt.from_long(nid)))
+                        else: rx.handle_rx(pmt.cons(meta, pmt.cdr(msg)))
+
+    def replace(self, nid, node):
+        """Swaps in a new session_manager as node nid (a restart); anything the old one had queued is lost."""
+        self.nodes[nid].stop()
+        self.nodes[nid], self.ports[nid] = node, PortCapture(node)
+
+    def received(self, nid):
+        """Payloads node nid has delivered on data_out."""
+        return [bytes(pmt.u8vector_elements(pmt.cdr(m))) for m in self.ports[nid].peek("data_out")]
+
+def pdu(blob, **meta):
+    d = pmt.make_dict()
+    for k, v in meta.items(): d = pmt.dict_add(d, pmt.intern(k), pmt.from_long(v))
+    return pmt.cons(d, pmt.init_u8vector(len(blob), list(blob)))
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Opal Vanguard - Shared Mission Flowgraph Builder
+
+import numpy as np
+from gnuradio import gr, blocks, digital, filter, pdu
+import pmt
+
+from packetizer import packetizer
+from depacketizer import depacketizer
+from hop_controller import lfsr_hop_generator
+from hop_generator_aes import aes_hop_generator
+from hop_generator_tod import tod_hop_generator
+from hop_scheduler import hop_scheduler, DEFAULT_LOOKAHEAD_MS
+from mission_profile import MissionProfile
+
+def build_modem(p_cfg, samp_rate):
+    """
+    Modulator/demodulator pair for physical.modulation.
+    Returns (mod, demod, tx_scale, rx_unpack); tx_scale rescales packet_len after
+    modulation, rx_unpack turns OFDM's packed bytes back into bits (either may be None).
+    """
+    mod_type = p_cfg.get('modulation', 'GFSK')
+    sps = p_cfg.get('samples_per_symbol', 10)
+    # v15.8.17: Use native C++ scaling for maximum performance and to resolve tP errors.
+    tx_scale = blocks.tagged_stream_multiply_length(gr.sizeof_gr_complex, "packet_len", sps)
+    rx_unpack = None
+
+    if mod_type in ("DBPSK", "DQPSK", "D8PSK"):
+        points = {"DBPSK": 2, "DQPSK": 4, "D8PSK": 8}[mod_type]
+        mod = digital.psk_mod(points, differential=True, samples_per_symbol=sps, excess_bw=0.35)
+        demod = digital.psk_demod(points, differential=True, samples_per_symbol=sps, excess_bw=0.35)
+    elif mod_type == "OFDM":
+        # OFDM handles its own scaling
+        mod = digital.ofdm_tx(fft_len=64, cp_len=16, packet_length_tag_key="packet_len")
+        demod = digital.ofdm_rx(fft_len=64, cp_len=16, packet_length_tag_key="packet_len")
+        tx_scale, rx_unpack = None, blocks.packed_to_unpacked_bb(1, gr.GR_MSB_FIRST)
+    else:
+        # GFSK / MSK / GMSK (and the default for unsupported waveforms)
+        bit_rate = samp_rate / sps
+        dev = bit_rate / 4.0 if mod_type in ("MSK", "GMSK") else p_cfg.get('freq_dev', 25000)
+        sens = (2.0 * np.pi * dev) / samp_rate
+        bt = 0.5 if mod_type == "MSK" else p_cfg.get('gmsk_bt', 0.35)
+        mod = digital.gfsk_mod(sps, sens, bt, False, False, False)
+        demod = digital.gfsk_demod(sps, sens, 0.1, 0.5, 0.005, 0.0)
+    return mod, demod, tx_scale, rx_unpack
+
+def build_rx_filter(samp_rate, cutoff=100e3, transition=50e3):
+    return filter.fir_filter_ccf(1, filter.firdes.low_pass(1.0, samp_rate, cutoff, transition))
+
+def build_hop_generator(h_cfg, center_freq):
+    """TOD generator unless hopping.sync_mode selects a free-running AES or LFSR sequence."""
+    spacing, n_ch = h_cfg.get('channel_spacing', 150000), h_cfg.get('num_channels', 50)
+    if h_cfg.get('sync_mode', "TOD") == "TOD":
+        return tod_hop_generator(key=bytes.fromhex(h_cfg.get('aes_key', '00'*32)), num_channels=n_ch, center_freq=center_freq,
+                                 channel_spacing=spacing, dwell_ms=h_cfg.get('dwell_time_ms', 500), lookahead_ms=h_cfg.get('lookahead_ms', DEFAULT_LOOKAHEAD_MS))
+    if h_cfg.get('type') == "AES":
+        return aes_hop_generator(key=bytes.fromhex(h_cfg.get('aes_key', '00'*32)), num_channels=n_ch, center_freq=center_freq, channel_spacing=spacing)
+    return lfsr_hop_generator(seed=h_cfg.get('initial_seed', 0xACE), num_channels=n_ch, center_freq=center_freq, channel_spacing=spacing)
+
+class RotatorHopHandler(gr.basic_block):
+    """Host-side de-hopping for simulation: maps hop messages (float or {freq}) onto rotator phase increments."""
+    def __init__(self, center_freq, samp_rate, rot_tx, rot_rx=None):
+        gr.basic_block.__init__(self, "RotatorHopHandler", None, None)
+        self.center_freq, self.samp_rate, self.rot_tx, self.rot_rx = center_freq, samp_rate, rot_tx, rot_rx
+        self.message_port_register_in(pmt.intern("msg")); self.set_msg_handler(pmt.intern("msg"), self.handle)
+    def handle(self, msg):
+        try:
+            if pmt.is_dict(msg): msg = pmt.dict_ref(msg, pmt.intern("freq"), pmt.from_double(self.center_freq))
+            phase_inc = 2 * np.pi * (pmt.to_double(msg) - self.center_freq) / self.samp_rate
+            self.rot_tx.set_phase_inc(phase_inc)
+            if self.rot_rx is not None: self.rot_rx.set_phase_inc(-phase_inc)
+        except: pass
+    def work(self, i, o): return 0
+
+class MissionFlowgraph:
+    """
+    The node chain shared by the GUI, headless, lab and viewer entry points.
+    Builds packetizer -> PDU-to-stream -> modulator and filter -> demodulator -> depacketizer
+    plus the hop generator from one mission profile, then wires them into the caller's
+    top block. Frontends only supply the RF source/sink (USRP, channel model, file) and UI sinks.
+    profile may be a MissionProfile, config dict or YAML path; every block shares the one instance.
+    """
+    def __init__(self, tb, profile, samp_rate, center_freq, src_id=0, ignore_self=False, rx=True, rx_cutoff=100e3, rx_transition=50e3):
+        self.tb, self.profile = tb, MissionProfile.resolve(profile)
+        self.cfg = self.profile.cfg
+        self.samp_rate, self.center_freq = samp_rate, center_freq
+        self.h_cfg = self.profile.section('hopping')
+
+        self.pkt = packetizer(config_path=self.profile, src_id=src_id)
+        self.p2s = pdu.pdu_to_tagged_stream(gr.types.byte_t, "packet_len")
+        self.mod, self.demod, self.tx_scale, self.rx_unpack = build_modem(self.profile.section('physical'), samp_rate)
+        self.depkt = depacketizer(config_path=self.profile, src_id=src_id, ignore_self=ignore_self) if rx else None
+        self.rx_filter = build_rx_filter(samp_rate, rx_cutoff, rx_transition) if rx else None
+        self.hop_ctrl = build_hop_generator(self.h_cfg, center_freq)
+        self.hop_sched = None
+
+    def connect_tx(self, *sink_chain):
+        """packetizer -> p2s -> mod [-> packet_len scaler] -> sink_chain..."""
+        self.tb.msg_connect((self.pkt, "out"), (self.p2s, "pdus"))
+        chain = [self.p2s, self.mod] + ([self.tx_scale] if self.tx_scale is not None else [])
+        self.tb.connect(*(chain + list(sink_chain)))
+
+    def connect_rx(self, *source_chain):
+        """source_chain... -> rx filter -> demod [-> unpacker] -> depacketizer"""
+        chain = list(source_chain) + [self.rx_filter, self.demod]
+        if self.rx_unpack is not None: chain.append(self.rx_unpack)
+        self.tb.connect(*(chain + [self.depkt]))
+
+    def connect_hopping(self, freq_handler, clock=None, clock_rate=None):
+        """
+        Hop generator -> freq_handler, triggered by hop_scheduler from clock's sample stream.
+        Without a continuous RF stream (simulation) a 1 kHz throttled null source is the clock.
+        """
+        self.tb.msg_connect((self.hop_ctrl, "freq"), (freq_handler, "msg"))
+        if not self.h_cfg.get('enabled', True): return
+        if clock is None:
+            clock_rate = 1000
+            self.hop_clock = blocks.null_source(gr.sizeof_gr_complex)
+            clock = blocks.throttle(gr.sizeof_gr_complex, clock_rate)
+            self.tb.connect(self.hop_clock, clock)
+        self.hop_sched = hop_scheduler(clock_rate or self.samp_rate, dwell_ms=self.h_cfg.get('dwell_time_ms', 500),
+                                       lookahead_ms=self.h_cfg.get('lookahead_ms', DEFAULT_LOOKAHEAD_MS))
+        self.tb.connect(clock, self.hop_sched)
+        self.tb.msg_connect((self.hop_sched, "trigger"), (self.hop_ctrl, "trigger"))
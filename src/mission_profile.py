@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Opal Vanguard - Parsed Mission Profile
+
+import os
+import math
+from dataclasses import dataclass, field
+from types import MappingProxyType
+import numpy as np
+import yaml
+
+from config_validator import validate_cfg
+
+TACTICAL_TAGS = ("LINK16", "LINK-16", "LEVEL_6", "LEVEL_7")
+
+def _freeze(obj):
+    if isinstance(obj, dict): return MappingProxyType({k: _freeze(v) for k, v in obj.items()})
+    if isinstance(obj, list): return tuple(_freeze(v) for v in obj)
+    return obj
+
+def _payload_capacity(l_cfg, frame_size):
+    """Largest payload whose header + COMSEC nonce + CRC block still fits frame_size after FEC."""
+    if not l_cfg.get('use_fec', True): raw = frame_size
+    elif l_cfg.get('fec_type', 'RS1511') == "RS3115": raw = (frame_size * 8 // 155) * 75 // 8 # 75 data bits per 155-bit codeword
+    else: raw = (frame_size // 15) * 11 # 11 data bytes per 15-byte codeword pair
+    nonce = 16 if l_cfg.get('use_comsec', False) else 0
+    overhead = 4 + (4 if l_cfg.get('crc_type', 'CRC16') == "CRC32" else 2) + nonce
+    return max(0, min(255 - nonce, raw - overhead)) # the header length byte covers nonce + ciphertext
+
+def _modem_tail_bits(p_cfg, samp_rate, flush_bits=64):
+    """
+    Zero bits after the last chip so every filter between packetizer and depacketizer drains
+    the frame: TX pulse shaping, the RX channel filter (build_rx_filter: firdes Hamming low-pass,
+    100k/50k) and the demodulator's matched filter or clock recovery. Group delays in bits plus
+    flush_bits of clock-recovery settling, rounded up to a whole byte.
+    """
+    mod_type = p_cfg.get('modulation', 'GFSK')
+    sps = p_cfg.get('samples_per_symbol', 10)
+    if mod_type == "OFDM": return 0 # ofdm_tx/ofdm_rx frame each burst on its packet_len tag
+    if mod_type in ("DBPSK", "DQPSK", "D8PSK"):
+        bits_per_sym = {"DBPSK": 1, "DQPSK": 2, "D8PSK": 3}[mod_type]
+        sym_delay = 5.5 + 5.5 + 1 # 11-symbol RRC on TX and RX, differential decoder
+    else:
+        bits_per_sym, sym_delay = 1, 2 + 1 # 4-symbol Gaussian filter, M&M clock recovery
+    rx_taps = int(53 * samp_rate / (22 * 50e3)) # firdes.low_pass tap estimate for a Hamming window
+    delay_bits = (sym_delay + (rx_taps / 2) / sps) * bits_per_sym
+    return int(math.ceil((delay_bits + flush_bits) / 8)) * 8
+
+def _thaw(obj):
+    if isinstance(obj, MappingProxyType): return {k: _thaw(v) for k, v in obj.items()}
+    if isinstance(obj, tuple): return [_thaw(v) for v in obj]
+    return obj
+
+@dataclass(frozen=True)
+class MissionProfile:
+    """
+    One parsed, validated and read-only mission config shared by every block.
+    Mode flags, frame geometry and burst overhead (tail_bits from the modem's filter delays
+    unless physical.tail_bits is set) are derived once here, so blocks never re-read the YAML
+    or substring-match mission.id. Build with load(path) (cached per file) or from_dict(cfg).
+    """
+    cfg: MappingProxyType
+    source: str
+    mission_id: str
+    is_tactical: bool
+    use_ccsk: bool
+    frame_size: int
+    bits_per_frame: int
+    chips_per_frame: int
+    preamble_len: int
+    preamble_short: int
+    tail_bits: int
+    bit_rate: float
+    max_payload: int
+    sync_hex: str
+    sync_len: int
+    sync_threshold: int
+    sync_bits: np.ndarray = field(repr=False)
+    valid: bool = True
+    validation_msg: str = ""
+
+    @classmethod
+    def from_dict(cls, cfg, source="<memory>"):
+        if not isinstance(cfg, dict): raise ValueError(f"Mission config must be a mapping (got {type(cfg).__name__}) from {source}")
+        valid, msg = validate_cfg(cfg)
+        if not valid: print(f"\033[93m[CONFIG] {source}: {msg}\033[0m")
+
+        mission_id = str(cfg.get('mission', {}).get('id', ""))
+        l_cfg, p_cfg, d_cfg = cfg.get('link_layer', {}), cfg.get('physical', {}), cfg.get('dsss', {})
+        is_tactical = any(t in mission_id.upper() for t in TACTICAL_TAGS)
+        frame_size = l_cfg.get('frame_size', 120)
+        bits_per_frame = frame_size * 8
+        sync_hex = p_cfg.get('syncword', "0x3D4C5B6A")
+        sync_len = (len(sync_hex) - 2) * 4
+        sync_bits = np.array([int(b) for b in format(int(sync_hex, 16), f'0{sync_len}b')], dtype=np.uint8)
+        sync_bits.setflags(write=False)
+        samp_rate = cfg.get('hardware', {}).get('samp_rate', 2000000)
+        preamble_len = p_cfg.get('preamble_len', 1024)
+        tail_bits = p_cfg.get('tail_bits', "auto")
+        use_ccsk = bool(d_cfg.get('enabled', False) and d_cfg.get('type') == "CCSK")
+        return cls(cfg=_freeze(cfg), source=source, mission_id=mission_id, is_tactical=is_tactical, use_ccsk=use_ccsk,
+                   frame_size=frame_size, bits_per_frame=bits_per_frame,
+                   # Frames are CCSK-spread (5 bits -> 32 chips) exactly when the packetizer spreads them
+                   chips_per_frame=(bits_per_frame // 5) * 32 if use_ccsk else bits_per_frame,
+                   preamble_len=preamble_len, preamble_short=min(preamble_len, p_cfg.get('preamble_short', 128)),
+                   tail_bits=_modem_tail_bits(p_cfg, samp_rate) if tail_bits == "auto" else tail_bits,
+                   bit_rate=samp_rate / p_cfg.get('samples_per_symbol', 10), max_payload=_payload_capacity(l_cfg, frame_size), sync_hex=sync_hex, sync_len=sync_len,
+                   sync_threshold=max(1, sync_len // 16), sync_bits=sync_bits, valid=valid, validation_msg=msg)
+
+    @classmethod
+    def load(cls, config_path):
+        """Parses config_path once; later calls for the unchanged file return the same profile."""
+        path = os.path.abspath(config_path)
+        key = (path, os.path.getmtime(path))
+        if key not in _PROFILE_CACHE:
+            with open(path, 'r') as f: _PROFILE_CACHE[key] = cls.from_dict(yaml.safe_load(f), source=config_path)
+        return _PROFILE_CACHE[key]
+
+    @classmethod
+    def resolve(cls, config):
+        """Accepts a MissionProfile, a config dict or a YAML path (what block constructors receive)."""
+        if isinstance(config, cls): return config
+        if isinstance(config, dict): return cls.from_dict(config)
+        return cls.load(config)
+
+    def burst_bits(self, preamble_len=None):
+        """Bits one packetizer burst puts on the air: preamble (default: the long one) + sync + frame chips + tail."""
+        preamble = self.preamble_len if preamble_len is None else preamble_len
+        return preamble + self.sync_len + self.chips_per_frame + self.tail_bits
+
+    def airtime_s(self, preamble_len=None):
+        return self.burst_bits(preamble_len) / self.bit_rate
+
+    def section(self, name):
+        return self.cfg.get(name, MappingProxyType({}))
+
+    def to_dict(self):
+        """Mutable deep copy, e.g. for pickling into worker processes."""
+        return _thaw(self.cfg)
+
+_PROFILE_CACHE = {}
@@ -2,104 +2,289 @@
 # -*- coding: utf-8 -*-
 # Opal Vanguard - Reed-Solomon FEC Helpers (GF(16) and GF(32))
 
-class RS1511:
-    """Standard Reed-Solomon (15, 11) over GF(16)."""
-    def __init__(self):
-        # GF(16) tables (Polynomial: x^4 + x + 1)
-        self.exp = [1, 2, 4, 8, 3, 6, 12, 11, 5, 10, 7, 14, 15, 13, 9] * 3
-        self.log = [0] * 16
-        for i in range(15): self.log[self.exp[i]] = i
-        self.gen = [1, 13, 12, 8, 10]
+import numpy as np
+
+class RSCodec:
+    """
+    Systematic Reed-Solomon (n, k) codec over GF(2^m).
+    Shared algebraic core: GF tables, LFSR encoder, power-sum syndromes and a
+    Berlekamp-Massey / Chien / Forney decoder that runs in bounded time per codeword.
+    """
+    def __init__(self, m, prim_poly, n, k, gen=None, fcr=1):
+        self.m, self.n, self.k, self.nsym, self.fcr = m, n, k, n - k, fcr
+        self.order = (1 << m) - 1
+
+        # GF(2^m) tables, tripled so exp[log a + log b] never needs a modulo
+        self.exp = [0] * (self.order * 3)
+        x = 1
+        for i in range(self.order):
+            self.exp[i] = x
+            x <<= 1
+            if x & (1 << m): x ^= prim_poly
+        for i in range(self.order, self.order * 3): self.exp[i] = self.exp[i - self.order]
+        self.log = [0] * (1 << m)
+        for i in range(self.order): self.log[self.exp[i]] = i
+
+        # Generator (highest degree first): prod (x - a^(fcr+i)) unless a legacy one is supplied
+        if gen is None:
+            gen = [1]
+            for i in range(self.nsym): gen = self.poly_mul(gen, [1, self.exp[fcr + i]])
+        self.gen = gen
+
+        # Batch (NumPy) tables: full multiplication LUT plus the linear maps for parity,
+        # remainder and power-sum syndromes, so many codewords reduce to gather + XOR-reduce.
+        q = 1 << m
+        self.mul_table = np.array([[self.gf_mul(a, b) for b in range(q)] for a in range(q)], dtype=np.uint8)
+        self.parity_matrix = np.array([self.remainder([0] * i + [1] + [0] * (n - 1 - i)) for i in range(k)], dtype=np.uint8)
+        self.remainder_matrix = np.array([self.remainder([0] * i + [1] + [0] * (n - 1 - i)) for i in range(n)], dtype=np.uint8)
+        self.syndrome_matrix = np.array([[self.exp[((fcr + j) * (n - 1 - i)) % self.order] for j in range(self.nsym)] for i in range(n)], dtype=np.uint8)
 
     def gf_mul(self, a, b):
         if a == 0 or b == 0: return 0
         return self.exp[self.log[a] + self.log[b]]
 
-    def encode(self, data):
-        msg = list(data) + [0] * 4
-        for i in range(11):
-            feedback = msg[i]
-            if feedback != 0:
-                for j in range(1, 5):
-                    msg[i+j] ^= self.gf_mul(self.gen[j], feedback)
-        return list(data) + msg[11:]
+    def gf_div(self, a, b):
+        if a == 0: return 0
+        return self.exp[self.log[a] + self.order - self.log[b]]
 
-    def is_valid(self, msg):
+    def gf_pow(self, a, p):
+        if a == 0: return 0
+        return self.exp[(self.log[a] * p) % self.order]
+
+    def poly_mul(self, p, q):
+        out = [0] * (len(p) + len(q) - 1)
+        for i, a in enumerate(p):
+            if a == 0: continue
+            for j, b in enumerate(q): out[i+j] ^= self.gf_mul(a, b)
+        return out
+
+    def remainder(self, msg):
+        """LFSR division of a full codeword by the generator; all-zero for valid words."""
         rem = list(msg)
-        for i in range(11):
+        for i in range(self.k):
             feedback = rem[i]
             if feedback != 0:
-                for j in range(1, 5):
+                for j in range(1, self.nsym + 1):
                     rem[i+j] ^= self.gf_mul(self.gen[j], feedback)
-        return max(rem[11:]) == 0
+        return rem[self.k:]
+
+    def encode(self, data):
+        return list(data) + self.remainder(list(data) + [0] * self.nsym)
+
+    def is_valid(self, msg):
+        return max(self.remainder(msg)) == 0
+
+    def syndromes(self, msg):
+        """S_j = c(a^(fcr+j)) via Horner; msg[0] is the highest-degree coefficient."""
+        synd = []
+        for j in range(self.nsym):
+            x, s = self.exp[self.fcr + j], 0
+            for c in msg: s = self.gf_mul(s, x) ^ c
+            synd.append(s)
+        return synd
+
+    def berlekamp_massey(self, synd):
+        """Returns the error locator Lambda(x), lowest degree first."""
+        lam, prev = [1], [1]
+        L, shift, last_d = 0, 1, 1
+        for r in range(self.nsym):
+            d = synd[r]
+            for i in range(1, L + 1):
+                if i < len(lam): d ^= self.gf_mul(lam[i], synd[r - i])
+            if d == 0:
+                shift += 1; continue
+            coef = self.gf_div(d, last_d)
+            nxt = lam + [0] * max(0, len(prev) + shift - len(lam))
+            for i, b in enumerate(prev): nxt[i + shift] ^= self.gf_mul(coef, b)
+            if 2 * L <= r:
+                prev, L, last_d, shift = lam, r + 1 - L, d, 1
+            else:
+                shift += 1
+            lam = nxt
+        while len(lam) > 1 and lam[-1] == 0: lam.pop()
+        return lam
+
+    def chien_search(self, lam):
+        """Returns codeword indices whose locator X = a^(n-1-idx) satisfies Lambda(X^-1) = 0."""
+        positions = []
+        for idx in range(self.n):
+            x_inv = self.exp[(self.order - (self.n - 1 - idx)) % self.order]
+            val = 0
+            for coef in reversed(lam): val = self.gf_mul(val, x_inv) ^ coef
+            if val == 0: positions.append(idx)
+        return positions
+
+    def forney(self, synd, lam, positions):
+        """Error magnitudes e = X^(1-fcr) * Omega(X^-1) / Lambda'(X^-1) (signs vanish in GF(2^m))."""
+        omega = [0] * self.nsym
+        for i, s in enumerate(synd):
+            if s == 0: continue
+            for j, l in enumerate(lam):
+                if i + j < self.nsym: omega[i+j] ^= self.gf_mul(s, l)
+        mags = []
+        for idx in positions:
+            power = self.n - 1 - idx
+            x_inv = self.exp[(self.order - power) % self.order]
+            num = 0
+            for coef in reversed(omega): num = self.gf_mul(num, x_inv) ^ coef
+            den = 0
+            for i in range(1, len(lam), 2): den ^= self.gf_mul(lam[i], self.gf_pow(x_inv, i - 1))
+            if den == 0: return None
+            mags.append(self.gf_mul(self.gf_pow(self.exp[power], 1 - self.fcr), self.gf_div(num, den)))
+        return mags
+
+    def algebraic_decode(self, msg_in):
+        """Corrects up to (n-k)//2 symbol errors. Returns (data, errors_fixed); 0 repairs on failure."""
+        synd = self.syndromes(msg_in)
+        if max(synd) == 0: return list(msg_in[:self.k]), 0
+        lam = self.berlekamp_massey(synd)
+        n_err = len(lam) - 1
+        if n_err * 2 > self.nsym: return list(msg_in[:self.k]), 0
+        positions = self.chien_search(lam)
+        if len(positions) != n_err: return list(msg_in[:self.k]), 0
+        mags = self.forney(synd, lam, positions)
+        if mags is None: return list(msg_in[:self.k]), 0
+        corrected = list(msg_in)
+        for idx, mag in zip(positions, mags): corrected[idx] ^= mag
+        if max(self.syndromes(corrected)) != 0: return list(msg_in[:self.k]), 0
+        return corrected[:self.k], n_err
 
     def decode(self, msg_in):
-        if self.is_valid(msg_in): return list(msg_in[:11]), 0
-        # Simple 1-symbol error correction (Brute Force for GF16)
+        return self.algebraic_decode(msg_in)
+
+    def gf_matmul(self, words, matrix):
+        """[N, r] symbols x [r, c] GF matrix -> [N, c] via one gather and an XOR-reduce."""
+        return np.bitwise_xor.reduce(self.mul_table[words[:, :, None], matrix[None, :, :]], axis=1)
+
+    def encode_many(self, data):
+        """Systematic batch encode: ndarray[N, k] -> ndarray[N, n]."""
+        data = np.asarray(data, dtype=np.uint8).reshape(-1, self.k)
+        return np.hstack([data, self.gf_matmul(data, self.parity_matrix)])
+
+    def decode_many(self, words):
+        """
+        Batch decode: ndarray[N, n] -> (ndarray[N, k], repairs[N]).
+        Syndromes for the whole batch are one array op; only dirty rows visit BM/Chien/Forney.
+        """
+        words = np.asarray(words, dtype=np.uint8).reshape(-1, self.n)
+        data = words[:, :self.k].copy()
+        repairs = np.zeros(len(words), dtype=np.int64)
+        dirty = np.flatnonzero(self.gf_matmul(words, self.syndrome_matrix).any(axis=1))
+        for r in dirty:
+            fixed_data, fixed = self.algebraic_decode(words[r].tolist())
+            data[r] = fixed_data; repairs[r] = fixed
+        return data, repairs
+
+class RS1511(RSCodec):
+    """Standard Reed-Solomon (15, 11) over GF(16)."""
+    # Shared across instances: 65,536-entry syndrome -> error pattern LUT (built once per process)
+    _syndrome_errors = None
+    _syndrome_weights = None
+
+    def __init__(self):
+        # GF(16) tables (Polynomial: x^4 + x + 1)
+        # The fielded generator only has roots a^6 and a^8, so it is not a consecutive-root
+        # RS generator; keep it for on-air compatibility and decode via the syndrome LUT.
+        RSCodec.__init__(self, 4, 0x13, 15, 11, gen=[1, 13, 12, 8, 10])
+        if RS1511._syndrome_errors is None: self._build_syndrome_table()
+
+    def syndrome(self, msg):
+        """Packs the 4-nibble LFSR remainder of a 15-symbol word into a 16-bit index."""
+        rem = self.remainder(msg)
+        return (rem[0] << 12) | (rem[1] << 8) | (rem[2] << 4) | rem[3]
+
+    def _build_syndrome_table(self):
+        """
+        Maps every 16-bit syndrome to the error pattern the legacy brute-force search
+        would have found first (all 1-symbol patterns, then 2-symbol in (i, j, v1, v2) order).
+        The remainder is linear, so each pattern's syndrome is an XOR of per-position terms.
+        """
+        unit = np.zeros((15, 16), dtype=np.int64)
         for i in range(15):
             for val in range(1, 16):
-                corrupted = list(msg_in)
-                corrupted[i] ^= val
-                if self.is_valid(corrupted): return list(corrupted[:11]), 1
-        
-        # Simple 2-symbol error correction
+                e = [0] * 15; e[i] = val
+                unit[i, val] = self.syndrome(e)
+
+        errors = np.zeros((65536, 15), dtype=np.uint8)
+        weights = np.full(65536, -1, dtype=np.int8)
+        weights[0] = 0
+        vals = np.arange(1, 16)
+
+        for i in range(15):
+            s = unit[i, 1:]
+            free = weights[s] < 0
+            errors[s[free], i] = vals[free]; weights[s[free]] = 1
+
         for i in range(14):
             for j in range(i+1, 15):
-                for val1 in range(1, 16):
-                    for val2 in range(1, 16):
-                        corrupted = list(msg_in)
-                        corrupted[i] ^= val1
-                        corrupted[j] ^= val2
-                        if self.is_valid(corrupted): return list(corrupted[:11]), 2
-                        
-        return list(msg_in[:11]), 0
-
-class RS3115:
+                # Row-major over (val1, val2) preserves the brute-force search order
+                s = (unit[i, 1:, None] ^ unit[j, None, 1:]).ravel()
+                v1 = np.repeat(vals, 15); v2 = np.tile(vals, 15)
+                _, first = np.unique(s, return_index=True)
+                first = np.sort(first)
+                first = first[weights[s[first]] < 0]
+                idx = s[first]
+                errors[idx, i] = v1[first]; errors[idx, j] = v2[first]; weights[idx] = 2
+
+        RS1511._syndrome_errors, RS1511._syndrome_weights = errors, weights
+
+    def decode(self, msg_in):
+        """O(1) correction of up to 2 symbol errors via the precomputed syndrome LUT."""
+        s = self.syndrome(msg_in)
+        if s == 0: return list(msg_in[:11]), 0
+        weight = int(RS1511._syndrome_weights[s])
+        if weight < 0: return list(msg_in[:11]), 0
+        err = RS1511._syndrome_errors[s]
+        return [int(msg_in[k]) ^ int(err[k]) for k in range(11)], weight
+
+    def decode_many(self, words):
+        """Batch LUT decode: ndarray[N, 15] -> (ndarray[N, 11], repairs[N])."""
+        words = np.asarray(words, dtype=np.uint8).reshape(-1, 15)
+        rem = self.gf_matmul(words, self.remainder_matrix).astype(np.int64)
+        idx = (rem[:, 0] << 12) | (rem[:, 1] << 8) | (rem[:, 2] << 4) | rem[:, 3]
+        # Uncorrectable syndromes map to an all-zero pattern, so the XOR leaves them untouched
+        data = words[:, :11] ^ RS1511._syndrome_errors[idx, :11]
+        return data, np.maximum(RS1511._syndrome_weights[idx], 0).astype(np.int64)
+
+    def encode_block(self, raw_block):
+        """Bytes -> FEC bytes: every 11 bytes become two 15-nibble codewords (15 bytes)."""
+        arr = np.frombuffer(raw_block, dtype=np.uint8)
+        arr = np.append(arr, np.zeros((-len(arr)) % 11, dtype=np.uint8))
+        nibs = np.stack([arr >> 4, arr & 0x0F], axis=1).reshape(-1, 11)
+        coded = self.encode_many(nibs).reshape(-1, 2)
+        return ((coded[:, 0] << 4) | coded[:, 1]).astype(np.uint8).tobytes()
+
+    def decode_block(self, data_block):
+        """FEC bytes -> (healed bytes, symbol repairs). Trailing partial blocks are dropped."""
+        arr = np.frombuffer(data_block, dtype=np.uint8)
+        arr = arr[:len(arr) - len(arr) % 15]
+        nibs = np.stack([arr >> 4, arr & 0x0F], axis=1).reshape(-1, 15)
+        data, repairs = self.decode_many(nibs)
+        data = data.reshape(-1, 2)
+        return ((data[:, 0] << 4) | data[:, 1]).astype(np.uint8).tobytes(), int(repairs.sum())
+
+class RS3115(RSCodec):
     """Link 16 Standard Reed-Solomon (31, 15) over GF(32)."""
     def __init__(self):
         # GF(32) tables (Polynomial: x^5 + x^2 + 1)
-        self.exp = [1, 2, 4, 8, 16, 5, 10, 20, 13, 26, 17, 7, 14, 28, 29, 31, 27, 19, 3, 6, 12, 24, 21, 15, 30, 25, 23, 11, 22, 18, 1] * 3
-        self.log = [0] * 32
-        for i in range(31): self.log[self.exp[i]] = i
-        
-        # Generator for 16 parity symbols
-        # Real Link 16 uses a specific systematic generator. 
-        # We'll use this consistent LFSR generator for our emulation.
-        self.gen = [1, 2, 4, 8, 16, 5, 10, 20, 13, 26, 17, 7, 14, 28, 29, 31, 27]
-
-    def gf_mul(self, a, b):
-        if a == 0 or b == 0: return 0
-        return self.exp[self.log[a] + self.log[b]]
-
-    def encode(self, data):
-        msg = list(data) + [0] * 16
-        for i in range(15):
-            feedback = msg[i]
-            if feedback != 0:
-                for j in range(1, 17):
-                    msg[i+j] ^= self.gf_mul(self.gen[j], feedback)
-        return list(data) + msg[15:]
+        # Narrow-sense generator with roots a^1..a^16 -> corrects up to 8 symbol errors.
+        RSCodec.__init__(self, 5, 0x25, 31, 15, fcr=1)
+        self.sym_weights = 1 << np.arange(4, -1, -1)
 
-    def is_valid(self, msg):
-        rem = list(msg)
-        for i in range(15):
-            feedback = rem[i]
-            if feedback != 0:
-                for j in range(1, 17):
-                    rem[i+j] ^= self.gf_mul(self.gen[j], feedback)
-        return max(rem[15:]) == 0
+    def encode_block(self, raw_block):
+        """Bytes -> FEC bytes: the bitstream is cut into 5-bit symbols, 15 per 31-symbol codeword."""
+        bits = np.unpackbits(np.frombuffer(raw_block, dtype=np.uint8))
+        bits = np.append(bits, np.zeros((-len(bits)) % 75, dtype=np.uint8))
+        symbols = bits.reshape(-1, 5).dot(self.sym_weights).reshape(-1, 15)
+        coded = self.encode_many(symbols)
+        out_bits = np.unpackbits(coded.reshape(-1, 1), axis=1)[:, 3:]
+        return np.packbits(out_bits.ravel()).tobytes()
 
-    def decode(self, msg_in):
-        """Attempts to correct errors using brute-force for up to 1 symbol."""
-        if self.is_valid(msg_in): return list(msg_in[:15]), 0
-        
-        # RS(31,15) can fix 8 symbols, but brute force is O(N^T).
-        # We'll implement a 1-symbol "Quick Repair" to stabilize the link for now.
-        for i in range(31):
-            for val in range(1, 32):
-                corrupted = list(msg_in)
-                corrupted[i] ^= val
-                if self.is_valid(corrupted):
-                    return list(corrupted[:15]), 1
-        
-        return list(msg_in[:15]), 0
+    def decode_block(self, data_block):
+        """FEC bytes -> (healed bytes, symbol repairs). Only complete 155-bit codewords are decoded."""
+        bits = np.unpackbits(np.frombuffer(data_block, dtype=np.uint8))
+        n_cw = len(bits) // 155
+        symbols = bits[:n_cw * 155].reshape(-1, 5).dot(self.sym_weights).reshape(n_cw, 31)
+        healed, repairs = self.decode_many(symbols)
+        data_bits = np.unpackbits(healed.reshape(-1, 1), axis=1)[:, 3:].ravel()
+        return np.packbits(data_bits[:len(data_bits) - len(data_bits) % 8]).tobytes(), int(repairs.sum())
@@ -1,36 +1,90 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-# Opal Vanguard - Autonomous Tactical Session Manager (v15.9.4)
+# Opal Vanguard - Autonomous Tactical Session Manager (v15.9.5)
 
 import numpy as np
 from gnuradio import gr
 import pmt
 import struct
 import time
-import yaml
 import os
+import threading
+from collections import deque
+from mission_profile import MissionProfile
+from async_logger import AsyncLogger
+from arq import SelectiveRepeatARQ, parse_ack, seq_diff
+from tdma import TDMAScheduler, parse_slots, burst_airtime_s
+from aggregation import Aggregator, TYPE_AGG, pack, unpack
+from fragmentation import Reassembler, TYPE_FRAG, split
+
+BROADCAST = 0 # dst_id 0: any node (and the id of an unaddressed legacy node)
+
+class PeerSession:
+    """
+    Link state towards one src_id: handshake state, its own DATA sequence space and ARQ
+    window, link-quality counters and the frames waiting for the handshake to finish.
+    """
+    def __init__(self, peer_id, arq=None, agg=None):
+        self.peer_id, self.arq, self.agg = peer_id, arq, agg
+        self.state = "IDLE"
+        self.local_seq = 0
+        self.frag_id = 0 # message id of this peer's next fragmented message
+        self.consecutive_fails = 0
+        self.tx_buffer = deque()
+        self.last_seen = 0.0
+        self.epoch = 0 # boot epoch from the peer's SYNs (0: none heard yet, or a node that sends none)
 
 class session_manager(gr.basic_block):
     """
     Tactical MAC Layer for Opal Vanguard.
     Handles Handshaking (SYN/ACK), ARQ Retries, and Link Quality Monitoring.
+    Every peer gets its own PeerSession in self.sessions, keyed by the src_id the depacketizer
+    puts in each frame's meta, so one peer's CRC failures or handshake never disturb another.
+    Outgoing frames carry dst_id (the packetizer packs it into the type byte); frames addressed
+    to another node are ignored. self.state is the aggregate shown to the UI.
+    With arq_enabled, DATA runs through a selective-repeat window (arq.py) per peer: one selective
+    ACK per received frame, per-sequence retransmission timers driven by a background tick, and
+    retransmission/ACK counters published on status_out.
+    With agg_window_ms > 0, small application messages to the same peer share one DATA frame
+    (aggregation.py) within the agg_latency_ms budget; the receiver splits them back apart.
+    Messages longer than one frame's payload go out as numbered fragments (fragmentation.py), each
+    its own ARQ frame, and are reassembled on RX within frag_timeout_ms.
+    Every SYN and handshake ACK carries this node's random boot epoch; a known peer showing a new
+    epoch has restarted, and its session gets fresh sequence spaces (unacknowledged DATA
+    to it is sent again) instead of dropping its new frames as duplicates.
+    SYNs, retransmissions and frames to peers that are not cleanly CONNECTED carry the long
+    acquisition preamble (physical.preamble_len); everything else the short preamble_short.
+    With tdma_enabled, every outgoing frame waits for one of this node's slots (tdma.py) and
+    leaves pkt_out with a slot-aligned tx_time for a timed USRP burst.
     """
-    def __init__(self, initial_seed=0xACE, config_path="mission_configs/level1_soft_link.yaml"):
+    def __init__(self, initial_seed=0xACE, config_path="mission_configs/level1_soft_link.yaml", node_id=None):
         gr.basic_block.__init__(self, name="session_manager", in_sig=None, out_sig=None)
-        
-        with open(config_path, 'r') as f: self.cfg = yaml.safe_load(f)
-        mac_cfg = self.cfg.get('mac_layer', {})
+
+        self.profile = MissionProfile.resolve(config_path)
+        self.cfg = self.profile.cfg
+        mac_cfg = self.profile.section('mac_layer')
         self.arq_enabled = mac_cfg.get('arq_enabled', True)
         self.max_retries = mac_cfg.get('max_retries', 3)
-        
+        self.node_id = node_id if node_id is not None else mac_cfg.get('node_id', 0)
+        self.arq_kw = dict(window=mac_cfg.get('arq_window', 16), max_retries=self.max_retries,
+                           rto_s=mac_cfg.get('arq_timeout_ms', 500) / 1000.0)
+        self.agg_window_s = mac_cfg.get('agg_window_ms', 0) / 1000.0
+        self.agg_budget_s = mac_cfg.get('agg_latency_ms', 100) / 1000.0
+        self.reassembly = Reassembler(timeout_s=mac_cfg.get('frag_timeout_ms', 2000) / 1000.0,
+                                      max_pending=mac_cfg.get('frag_max_pending', 4), max_bytes=mac_cfg.get('frag_max_kb', 1024) * 1024)
+        self.frag_sent = 0
+
         # Internal State
         self.state = "IDLE"
         self.current_seed = initial_seed
-        self.tx_buffer = []
-        self.sent_history = {}
-        self.local_seq = 0
+        self.epoch = int.from_bytes(os.urandom(4), 'big') or 1
+        self.sessions = {} # src_id -> PeerSession
+        self.tx_buffer = deque() # data with no peer to go to yet
+        self.unattributed_fails = 0
+        self.air = {"frames": 0, "short": 0, "bits": 0, "payload_bits": 0} # burst overhead accounting
+        # Handlers never print or sleep: console output goes through a rate-limited writer thread
+        self.log = AsyncLogger(rate=mac_cfg.get('log_rate', 20))
         self.last_pulse = 0
-        self.consecutive_fails = 0
 
         # Message Ports
         self.message_port_register_in(pmt.intern("msg_in"))
@@ -41,98 +95,343 @@ class session_manager(gr.basic_block):
         self.set_msg_handler(pmt.intern("manual_in"), self.handle_tx_request)
         self.message_port_register_in(pmt.intern("crc_fail"))
         self.set_msg_handler(pmt.intern("crc_fail"), self.handle_crc_fail)
-        
+
         self.message_port_register_in(pmt.intern("heartbeat"))
         self.set_msg_handler(pmt.intern("heartbeat"), self.handle_heartbeat)
-        
+
         self.message_port_register_out(pmt.intern("pkt_out"))
         self.message_port_register_out(pmt.intern("data_out"))
         self.message_port_register_out(pmt.intern("status_out"))
 
+        # Peer sessions, their ARQ engines and the TDMA gate are shared with the timer tick under self.lock
+        self.lock = threading.RLock()
+        self.tdma = None
+        if mac_cfg.get('tdma_enabled', False):
+            self.tdma = TDMAScheduler(parse_slots(mac_cfg.get('assigned_slots', "0-127"), self.node_id), burst_airtime_s(self.profile),
+                                      slot_s=mac_cfg.get('slot_duration_ms', 7.8125) / 1000.0,
+                                      guard_s=mac_cfg.get('tdma_guard_ms', 0.5) / 1000.0, lead_s=mac_cfg.get('tdma_lead_ms', 50) / 1000.0)
+            self.log.log("[MAC] TDMA node %s: %d slots, %.1f bursts/sec", self.node_id, len(self.tdma.slots), self.tdma.capacity())
+        if self.arq_enabled or self.tdma or self.agg_window_s:
+            self.last_stats = None
+            self.tick_stop = threading.Event()
+            self.tick_thread = threading.Thread(target=self._tick, daemon=True)
+            self.tick_thread.start()
+
+    def peer(self, peer_id):
+        """The PeerSession for peer_id, created on first contact."""
+        session = self.sessions.get(peer_id)
+        if session is None:
+            with self.lock:
+                session = self.sessions.get(peer_id)
+                if session is None:
+                    agg = Aggregator(self.profile.max_payload, self.agg_window_s, self.agg_budget_s) if self.agg_window_s else None
+                    session = self.sessions[peer_id] = PeerSession(peer_id, self._new_arq(peer_id), agg)
+                    self.log.log("[MAC] New peer session: node %d", peer_id)
+        return session
+
+    def _new_arq(self, peer_id):
+        if not self.arq_enabled: return None
+        return SelectiveRepeatARQ(lambda seq, msg: self.send_seq_packet(peer_id, seq, msg),
+                                  self.deliver_data, now=time.monotonic(), **self.arq_kw)
+
+    def _check_epoch(self, session, field):
+        """Handshake frames carry the sender's boot epoch (4 bytes, absent from old nodes); a new one means it restarted."""
+        epoch = struct.unpack('>I', field)[0] if len(field) == 4 else 0
+        if not epoch: return
+        if session.epoch and epoch != session.epoch: self._restart_peer(session)
+        session.epoch = epoch
+
+    def _restart_peer(self, session):
+        """
+        The peer rebooted: both sequence spaces start over at 0 and its partial fragments are dropped.
+        DATA it never acknowledged is resubmitted, oldest first, on the new window.
+        """
+        self.log.log("\033[93m[MAC] Node %d restarted. Resetting its session.\033[0m", session.peer_id)
+        with self.lock:
+            old, unacked = session.arq, []
+            if old:
+                unacked = [old.in_flight[s][0] for s in sorted(old.in_flight, key=lambda s: seq_diff(old.next_seq, s), reverse=True)]
+                unacked += old.backlog
+            session.arq, session.local_seq, session.frag_id = self._new_arq(session.peer_id), 0, 0
+            session.state, session.consecutive_fails = "IDLE", 0
+            self.reassembly.forget(session.peer_id)
+            for msg in unacked: self._submit(session, msg)
+
+    def _tick(self, report_every=1.0):
+        """
+        Closes aggregates whose window ran out, fires retransmission timers, releases slot-due
+        frames and publishes ARQ/TDMA counters (at most once per report_every when they change).
+        """
+        period = 0.01 if self.tdma or self.agg_window_s else 0.02
+        last_report = 0.0
+        while not self.tick_stop.wait(period):
+            # One bad frame or callback must not stop retransmissions and slot releases for good
+            try:
+                now = time.monotonic()
+                with self.lock:
+                    for session in list(self.sessions.values()):
+                        if session.agg is not None:
+                            for group in session.agg.poll(now): self._submit(session, group)
+                        if session.arq: session.arq.poll(now)
+                    self._release_slots()
+                    self.reassembly.expire(now)
+                    stats = self._stats()
+                if stats != self.last_stats and now - last_report >= report_every:
+                    self.last_stats, last_report = stats, now
+                    self.publish_status()
+            except Exception as e:
+                self.log.log("\033[91m[MAC] Tick error: %r\033[0m", e)
+
+    def stop(self):
+        if hasattr(self, 'tick_stop'): self.tick_stop.set()
+        return True
+
+    def _stats(self):
+        """ARQ counters summed over every peer, plus TDMA gate and peer counts."""
+        stats = {}
+        with self.lock:
+            for session in self.sessions.values():
+                counters = [("arq", session.arq.snapshot())] if session.arq else []
+                if session.agg is not None: counters.append(("agg", session.agg.stats))
+                for prefix, snap in counters:
+                    for k, v in snap.items(): stats[f"{prefix}_{k}"] = stats.get(f"{prefix}_{k}", 0) + v
+            if self.tdma: stats.update((f"tdma_{k}", v) for k, v in self.tdma.snapshot().items())
+            if self.frag_sent or self.reassembly.stats["fragments"]:
+                stats.update((f"frag_{k}", v) for k, v in self.reassembly.stats.items())
+                stats["frag_sent"], stats["frag_pending"] = self.frag_sent, len(self.reassembly)
+            if self.air["frames"]:
+                stats.update(air_frames=self.air["frames"], air_short=self.air["short"],
+                             air_ms=round(self.air["bits"] / self.profile.bit_rate * 1e3, 3),
+                             air_efficiency=round(self.air["payload_bits"] / self.air["bits"], 4))
+            stats["peers"] = len(self.sessions)
+            stats["peers_connected"] = sum(s.state == "CONNECTED" for s in self.sessions.values())
+        return stats
+
+    def _update_state(self):
+        """Aggregate state: CONNECTED while any peer is, else CONNECTING while anything waits for a link."""
+        if any(s.state == "CONNECTED" for s in self.sessions.values()): state = "CONNECTED"
+        elif self.tx_buffer or any(s.state == "CONNECTING" for s in self.sessions.values()): state = "CONNECTING"
+        else: state = self.state if self.state != "CONNECTED" else "CONNECTING"
+        if state != self.state:
+            self.state = state
+            self.publish_status()
+
+    def _connect(self, session):
+        if session.state == "CONNECTED": return
+        session.state = "CONNECTED"
+        # Data queued before any peer answered goes to the first one that does
+        while self.tx_buffer: session.tx_buffer.append(self.tx_buffer.popleft())
+        while session.tx_buffer: self.send_data_packet(session, session.tx_buffer.popleft())
+        self._update_state()
+
+    def force_connected(self, peer_id=BROADCAST):
+        """Marks peer_id connected without a handshake (TOD lab mode, tests)."""
+        self._connect(self.peer(peer_id))
+
     def publish_status(self):
         """Broadcasts current state to the UI process."""
         msg = pmt.make_dict()
         msg = pmt.dict_add(msg, pmt.intern("state"), pmt.intern(self.state))
+        for k, v in self._stats().items():
+            msg = pmt.dict_add(msg, pmt.intern(k), pmt.from_double(v) if isinstance(v, float) else pmt.from_long(v))
         self.message_port_pub(pmt.intern("status_out"), msg)
 
     def handle_heartbeat(self, msg):
         """Triggered by a message strobe to perform background tasks."""
-        if self.state != "CONNECTED":
+        # Broadcast SYN while no peer is up, else a directed SYN to each peer that lost its link
+        targets = [s.peer_id for s in list(self.sessions.values()) if s.state == "CONNECTING"]
+        if self.state != "CONNECTED" and not targets: targets = [BROADCAST]
+        for dst in targets:
             # v15.9.3: Random Backoff to prevent SYN collisions
             if np.random.random() > 0.3:
-                syn_payload = struct.pack('>H', self.current_seed).ljust(16, b'\x00')
-                self.send_packet(syn_payload, msg_type=1)
+                syn_payload = struct.pack('>HI', self.current_seed, self.epoch).ljust(16, b'\x00')
+                self.send_packet(syn_payload, msg_type=1, dst=dst)
 
     def handle_rx(self, msg):
         meta = pmt.car(msg)
         payload = bytes(pmt.u8vector_elements(pmt.cdr(msg)))
         m_type = pmt.to_long(pmt.dict_ref(meta, pmt.intern("type"), pmt.from_long(0)))
+        dst = pmt.to_long(pmt.dict_ref(meta, pmt.intern("dst_id"), pmt.from_long(BROADCAST)))
+        if dst not in (BROADCAST, self.node_id): return # overheard traffic between two other nodes
+        # One dict lookup routes the frame to its peer's session
+        session = self.peer(pmt.to_long(pmt.dict_ref(meta, pmt.intern("src_id"), pmt.from_long(BROADCAST))))
+        session.last_seen = time.monotonic()
 
         if m_type == 1: # Handshake SYN
-            print(f"[MAC] Handshake SYN Detected. Responding with High-Availability ACK.")
-            for _ in range(3): self.send_packet(b"ACK", msg_type=2) 
-            if self.state != "CONNECTED":
-                self.state = "CONNECTED"
-                self.publish_status()
-        
-        elif m_type == 2: # Handshake ACK
-            if self.state != "CONNECTED":
-                print("\033[96m[MAC] Handshake ACK Received. Secure Link Established.\033[0m")
-                self.state = "CONNECTED"
-                self.publish_status()
-                # Flush transmission buffer
-                while self.tx_buffer:
-                    self.send_data_packet(self.tx_buffer.pop(0))
-
-        elif m_type == 0: # DATA
-            if self.state != "CONNECTED":
-                self.state = "CONNECTED"
-                self.publish_status()
-            
-            self.consecutive_fails = 0
+            self._check_epoch(session, payload[2:6])
+            # One ACK per SYN: a lost ACK is repaired by the peer's next heartbeat SYN
+            self.log.log("[MAC] Handshake SYN from node %d. Responding with ACK.", session.peer_id)
+            self.send_packet(b"ACK" + struct.pack('>I', self.epoch), msg_type=2, dst=session.peer_id)
+            self._connect(session)
+
+        elif m_type == 2: # Handshake ACK or selective DATA ACK
+            sack = parse_ack(payload)
+            if sack and session.arq:
+                with self.lock: session.arq.on_ack(sack[0], sack[1], time.monotonic())
+            elif payload[:3] == b"ACK": self._check_epoch(session, payload[3:7])
+            if session.state != "CONNECTED":
+                self.log.log("\033[96m[MAC] Handshake ACK from node %d. Secure Link Established.\033[0m", session.peer_id)
+                self._connect(session)
+
+        elif m_type in (0, TYPE_AGG, TYPE_FRAG): # DATA, aggregate DATA or a fragment
+            self._connect(session)
+            session.consecutive_fails = 0
             seq = pmt.to_long(pmt.dict_ref(meta, pmt.intern("seq"), pmt.from_long(0)))
-            if self.arq_enabled: 
-                for _ in range(2): self.send_packet(struct.pack('B', seq), msg_type=2)
-            self.message_port_pub(pmt.intern("data_out"), msg)
+            if session.arq:
+                # In-order delivery happens through deliver_data; a single selective ACK goes back
+                with self.lock: ack = session.arq.on_data(seq, msg, time.monotonic())
+                self.send_packet(ack, msg_type=2, dst=session.peer_id)
+            else:
+                self.deliver_data(msg)
+
+    def _route(self, msg):
+        """Destination session for application data: meta dst_id, else the only (or most recently heard) connected peer."""
+        meta = pmt.car(msg)
+        if pmt.is_dict(meta) and pmt.dict_has_key(meta, pmt.intern("dst_id")):
+            return self.peer(pmt.to_long(pmt.dict_ref(meta, pmt.intern("dst_id"), pmt.from_long(BROADCAST))))
+        connected = [s for s in self.sessions.values() if s.state == "CONNECTED"]
+        return max(connected, key=lambda s: s.last_seen) if connected else None
 
     def handle_tx_request(self, msg):
         """Entry point for application-layer data."""
         payload = bytes(pmt.u8vector_elements(pmt.cdr(msg)))
-        if len(payload) > 0 and b"PING" not in payload:
-            print(f"[MAC] Queuing Manual Tactical Data: {payload.decode('utf-8', errors='replace')}", flush=True)
-            time.sleep(0.01) 
-            
-        if self.state == "CONNECTED":
-            self.send_data_packet(msg)
+        if not payload:
+            self.log.log("[MAC] Dropping empty message"); return
+        if b"PING" not in payload:
+            self.log.log("[MAC] Queuing Manual Tactical Data: %s", payload.decode('utf-8', errors='replace'))
+
+        session = self._route(msg)
+        if session is not None and session.state == "CONNECTED":
+            self.send_data_packet(session, msg)
         else:
-            self.tx_buffer.append(msg)
-            if self.state == "IDLE":
-                self.state = "CONNECTING"
-                self.publish_status()
+            (session.tx_buffer if session is not None else self.tx_buffer).append(msg)
+            if session is not None: session.state = "CONNECTING"
+            self._update_state()
 
     def handle_crc_fail(self, msg):
-        """Tracks link quality and handles NACKs."""
-        self.consecutive_fails += 1
-        if self.consecutive_fails > 50:
-            print("\033[91m[MAC] Link Reliability Lost. Re-Synchronizing...\033[0m", flush=True)
-            self.state = "CONNECTING"
-            self.publish_status()
+        """Tracks link quality per peer (src_id from the failed frame's unverified header)."""
+        meta = pmt.car(msg) if pmt.is_pair(msg) else msg
+        sid = pmt.to_long(pmt.dict_ref(meta, pmt.intern("src_id"), pmt.from_long(-1))) if pmt.is_dict(meta) else -1
+        session = self.sessions.get(sid)
+        if session is None:
+            self.unattributed_fails += 1; return # corrupted header or a node we never heard from
+        session.consecutive_fails += 1
+        if session.consecutive_fails > 50 and session.state == "CONNECTED":
+            self.log.log("\033[91m[MAC] Link to node %d Lost. Re-Synchronizing...\033[0m", sid)
+            session.state, session.consecutive_fails = "CONNECTING", 0
+            self._update_state()
 
-    def send_data_packet(self, msg):
-        meta = pmt.car(msg)
+    def send_data_packet(self, session, msg):
         payload = bytes(pmt.u8vector_elements(pmt.cdr(msg)))
+        if len(payload) > self.profile.max_payload:
+            self.send_fragments(session, payload); return
+        if session.agg is None:
+            self._submit(session, msg); return
+        with self.lock:
+            for group in session.agg.add(payload, time.monotonic()): self._submit(session, group)
+
+    def send_fragments(self, session, payload):
+        """Splits a message too long for one frame into TYPE_FRAG frames, each sent (and retransmitted) on its own."""
+        try: frags = split(payload, self.profile.max_payload, session.frag_id)
+        except ValueError as e:
+            self.log.log("\033[91m[MAC] Dropping message: %s\033[0m", e); return
+        with self.lock:
+            if session.agg is not None: # keep order with smaller messages queued before this one
+                for group in session.agg.flush(): self._submit(session, group)
+            session.frag_id = (session.frag_id + 1) & 0xFF
+            self.frag_sent += len(frags)
+            for frag in frags:
+                self._submit(session, pmt.cons(pmt.dict_add(pmt.make_dict(), pmt.intern("type"), pmt.from_long(TYPE_FRAG)),
+                                               pmt.init_u8vector(len(frag), list(frag))))
+
+    def _submit(self, session, msg):
+        """One DATA frame to session's peer. msg is a PDU or a closed aggregate group (list of payloads)."""
+        if isinstance(msg, list):
+            # A lone message keeps the plain DATA format; two or more share one frame behind sub-headers
+            m_type, blob = (0, msg[0]) if len(msg) == 1 else (TYPE_AGG, pack(msg))
+            msg = pmt.cons(pmt.dict_add(pmt.make_dict(), pmt.intern("type"), pmt.from_long(m_type)), pmt.init_u8vector(len(blob), list(blob)))
+        if session.arq:
+            with self.lock: session.arq.submit(msg, time.monotonic()) # sent now or once the window opens
+            return
+        self.send_seq_packet(session.peer_id, session.local_seq, msg)
+        session.local_seq = (session.local_seq + 1) & 0xFF
+
+    def deliver_data(self, msg):
+        """
+        Hands a DATA frame to the application; an aggregate goes out as its individual messages,
+        a fragment only once it completes its message.
+        """
+        meta = pmt.car(msg)
+        m_type = pmt.to_long(pmt.dict_ref(meta, pmt.intern("type"), pmt.from_long(0)))
+        if m_type == TYPE_FRAG:
+            src = pmt.to_long(pmt.dict_ref(meta, pmt.intern("src_id"), pmt.from_long(BROADCAST)))
+            with self.lock: whole = self.reassembly.add(src, bytes(pmt.u8vector_elements(pmt.cdr(msg))), time.monotonic())
+            if whole is not None:
+                meta = pmt.dict_add(meta, pmt.intern("type"), pmt.from_long(0))
+                self.message_port_pub(pmt.intern("data_out"), pmt.cons(meta, pmt.init_u8vector(len(whole), list(whole))))
+            return
+        if m_type != TYPE_AGG:
+            self.message_port_pub(pmt.intern("data_out"), msg); return
+        try: parts = unpack(bytes(pmt.u8vector_elements(pmt.cdr(msg))))
+        except ValueError as e:
+            self.log.log("\033[91m[MAC] Dropping aggregate: %s\033[0m", e); return
         meta = pmt.dict_add(meta, pmt.intern("type"), pmt.from_long(0))
-        meta = pmt.dict_add(meta, pmt.intern("seq"), pmt.from_long(self.local_seq))
-        self.local_seq = (self.local_seq + 1) & 0xFF
+        for part in parts:
+            self.message_port_pub(pmt.intern("data_out"), pmt.cons(meta, pmt.init_u8vector(len(part), list(part))))
+
+    def send_seq_packet(self, dst, seq, msg):
+        """Emits DATA frame seq to dst (first transmission or ARQ retransmission)."""
+        meta = pmt.car(msg)
+        payload = bytes(pmt.u8vector_elements(pmt.cdr(msg)))
+        m_type = pmt.to_long(pmt.dict_ref(meta, pmt.intern("type"), pmt.from_long(0))) if pmt.is_dict(meta) else 0
+        meta = pmt.dict_add(meta, pmt.intern("type"), pmt.from_long(m_type if m_type in (TYPE_AGG, TYPE_FRAG) else 0))
+        meta = pmt.dict_add(meta, pmt.intern("seq"), pmt.from_long(seq))
+        meta = pmt.dict_add(meta, pmt.intern("dst_id"), pmt.from_long(dst))
+        session = self.sessions.get(dst)
+        entry = session.arq.in_flight.get(seq) if session is not None and session.arq else None
         if b"PING" not in payload:
-            print(f"\033[94m[MAC] Dispatching DATA Frame ({len(payload)} bytes)...\033[0m", flush=True)
-        self.message_port_pub(pmt.intern("pkt_out"), pmt.cons(meta, pmt.cdr(msg)))
+            self.log.log("\033[94m[MAC] Dispatching DATA Frame (%d bytes)...\033[0m", len(payload))
+        self.emit(meta, pmt.cdr(msg), retry=bool(entry and entry[1]))
 
-    def send_packet(self, payload_bytes, msg_type):
+    def send_packet(self, payload_bytes, msg_type, dst=BROADCAST):
         """Helper for emitting MAC-layer control frames."""
         meta = pmt.make_dict()
         meta = pmt.dict_add(meta, pmt.intern("type"), pmt.from_long(msg_type))
+        meta = pmt.dict_add(meta, pmt.intern("dst_id"), pmt.from_long(dst))
         blob = pmt.init_u8vector(len(payload_bytes), list(payload_bytes))
-        self.message_port_pub(pmt.intern("pkt_out"), pmt.cons(meta, blob))
+        self.emit(meta, blob)
+
+    def _preamble_len(self, dst, m_type, retry):
+        """Long preamble while the receiver may still need to acquire us, short once the peer decodes us cleanly."""
+        session = self.sessions.get(dst)
+        if m_type == 1 or retry or session is None or session.state != "CONNECTED" or session.consecutive_fails:
+            return self.profile.preamble_len
+        return self.profile.preamble_short
+
+    def emit(self, meta, blob, retry=False):
+        """
+        Puts a frame on pkt_out now, or on the TDMA gate until one of this node's slots comes up.
+        Picks its preamble (meta preamble_len, read by the packetizer) and books its airtime.
+        """
+        m_type = pmt.to_long(pmt.dict_ref(meta, pmt.intern("type"), pmt.from_long(0)))
+        preamble = self._preamble_len(pmt.to_long(pmt.dict_ref(meta, pmt.intern("dst_id"), pmt.from_long(BROADCAST))), m_type, retry)
+        meta = pmt.dict_add(meta, pmt.intern("preamble_len"), pmt.from_long(preamble))
+        with self.lock:
+            self.air["frames"] += 1; self.air["short"] += preamble < self.profile.preamble_len
+            self.air["bits"] += self.profile.burst_bits(preamble)
+            if m_type in (0, TYPE_AGG, TYPE_FRAG): self.air["payload_bits"] += 8 * pmt.length(blob)
+        if not self.tdma:
+            self.message_port_pub(pmt.intern("pkt_out"), pmt.cons(meta, blob)); return
+        with self.lock:
+            self.tdma.enqueue((meta, blob))
+            self._release_slots()
+
+    def _release_slots(self):
+        """Publishes every frame whose slot starts within the lead time, tagged for a timed burst (UHD tx_time)."""
+        if not self.tdma: return
+        for t, (meta, blob) in self.tdma.release(time.time()):
+            secs = int(t)
+            tx_time = pmt.make_tuple(pmt.from_uint64(secs), pmt.from_double(t - secs))
+            self.message_port_pub(pmt.intern("pkt_out"), pmt.cons(pmt.dict_add(meta, pmt.intern("tx_time"), tx_time), blob))
 
     def work(self, i, o): return 0
@@ -5,19 +5,18 @@
 import os
 import sys
 import numpy as np
-from gnuradio import gr, blocks, analog, digital, qtgui, filter, fft, channels, pdu
+from gnuradio import gr, blocks, qtgui, fft
 import pmt
 from PyQt5 import Qt
 from PyQt5.QtCore import QTimer, pyqtSignal
 import sip
-import yaml
 import time
 
 # Add src to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from packetizer import packetizer
-from hop_generator_tod import tod_hop_generator
+from mission_flowgraph import MissionFlowgraph, RotatorHopHandler
+from mission_profile import MissionProfile
 
 # ----------------------------------------------------------------------
 # PRECISION GATE BLOCK
@@ -55,9 +54,9 @@ class SignalViewer(gr.top_block, Qt.QWidget):
         Qt.QWidget.__init__(self)
         self.setWindowTitle("Opal Vanguard - RF Diagnostic Viewer")
         
-        with open(config_path, 'r') as f:
-            self.cfg = yaml.safe_load(f)
-            
+        self.profile = MissionProfile.load(config_path)
+        self.cfg = self.profile.cfg
+
         self.samp_rate = 10000000
         self.center_freq = self.cfg['physical']['center_freq']
         hcfg = self.cfg['hopping']
@@ -75,26 +74,11 @@ class SignalViewer(gr.top_block, Qt.QWidget):
         # ----------------------------------------------------------------------
         # SIGNAL CHAIN
         # ----------------------------------------------------------------------
-        self.pkt = packetizer(config_path=config_path)
+        # TX half of the shared mission chain (no receiver in the viewer)
+        self.fg = MissionFlowgraph(self, self.profile, self.samp_rate, self.center_freq, rx=False)
+        self.pkt, self.mod, self.hop = self.fg.pkt, self.fg.mod, self.fg.hop_ctrl
         self.pdu_src = blocks.message_strobe(pmt.cons(pmt.make_dict(), pmt.init_u8vector(len("DIAGNOSTIC"), list("DIAGNOSTIC".encode()))), 1000)
-        self.p2s = pdu.pdu_to_tagged_stream(gr.types.byte_t, "packet_len")
-        
-        mod_type = self.cfg['physical'].get('modulation', 'GFSK')
-        sps = self.cfg['physical'].get('samples_per_symbol', 8)
-        
-        if mod_type == "DBPSK":
-            self.mod = digital.psk_mod(
-                constellation_points=2,
-                differential=True,
-                samples_per_symbol=sps,
-                excess_bw=0.35)
-        else:
-            freq_dev = self.cfg['physical'].get('freq_dev', 125000)
-            sensitivity = (2.0 * np.pi * freq_dev) / self.samp_rate
-            self.mod = digital.gfsk_mod(samples_per_symbol=sps, sensitivity=sensitivity, bt=0.35)
-        
         self.rot = blocks.rotator_cc(0)
-        self.hop = tod_hop_generator(key=bytes.fromhex(hcfg['aes_key']), num_channels=hcfg['num_channels'], center_freq=self.center_freq, channel_spacing=hcfg['channel_spacing'], dwell_ms=hcfg['dwell_time_ms'])
         
         self.gate = SampleGate(10000000)
         self.gate.finished_callback = lambda: self.progress_signal.emit(100.0, 0.0)
@@ -110,19 +94,12 @@ class SignalViewer(gr.top_block, Qt.QWidget):
         # CONNECTIONS
         # ----------------------------------------------------------------------
         self.msg_connect((self.pdu_src, "strobe"), (self.pkt, "in"))
-        self.msg_connect((self.pkt, "out"), (self.p2s, "pdus"))
-        self.connect(self.p2s, self.mod, self.rot)
+        self.fg.connect_tx(self.rot)
         self.connect(self.rot, self.gate, self.file_sink)
         
         # Frequency Control
-        class FreqHandler(gr.basic_block):
-            def __init__(self, rotator):
-                gr.basic_block.__init__(self, "FH", None, None); self.rot = rotator
-                self.message_port_register_in(pmt.intern("msg")); self.set_msg_handler(pmt.intern("msg"), self.handle)
-            def handle(self, msg):
-                f = pmt.to_double(msg); self.rot.set_phase_inc(2 * np.pi * (f - 915e6) / 10e6)
-        
-        self.fh = FreqHandler(self.rot); self.msg_connect((self.hop, "freq"), (self.fh, "msg"))
+        self.fh = RotatorHopHandler(self.center_freq, self.samp_rate, self.rot)
+        self.fg.connect_hopping(self.fh)
 
         # Visualization
         self.viz_throttle = blocks.throttle(gr.sizeof_gr_complex, self.samp_rate)
@@ -131,7 +108,6 @@ class SignalViewer(gr.top_block, Qt.QWidget):
         # ----------------------------------------------------------------------
         # TIMERS & LOGIC
         # ----------------------------------------------------------------------
-        self.timer = QTimer(); self.timer.timeout.connect(lambda: self.hop.handle_trigger(pmt.PMT_T)); self.timer.start(hcfg['dwell_time_ms'])
         self.stats_timer = QTimer(); self.stats_timer.timeout.connect(self.update_stats); self.stats_timer.start(500)
         self.progress_signal.connect(self.on_progress)
 
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Opal Vanguard - TDMA Slot Engine (v1.0)
+
+import math
+from collections import deque
+from collections.abc import Mapping
+
+SLOTS_PER_EPOCH = 128
+SLOT_S = 0.0078125 # Link-16 time slot: 128 per 1 s epoch
+
+def parse_slots(spec, node_id=None):
+    """
+    assigned_slots -> sorted tuple of slot numbers. Accepts an int, a list, "0-63", "0:128:4"
+    (start:stop:step), comma-joined mixes of those, or a {node_id: spec} map (picks node_id's entry).
+    """
+    if isinstance(spec, Mapping):
+        if node_id not in spec: raise ValueError(f"assigned_slots has no entry for node_id {node_id}")
+        spec = spec[node_id]
+    if isinstance(spec, int): items = [spec]
+    elif isinstance(spec, str): items = [s.strip() for s in spec.split(",") if s.strip()]
+    else: items = list(spec)
+    slots = set()
+    for item in items:
+        if isinstance(item, str) and ":" in item:
+            start, stop, step = (int(x) for x in item.split(":")); slots.update(range(start, stop, step))
+        elif isinstance(item, str) and "-" in item:
+            lo, hi = (int(x) for x in item.split("-")); slots.update(range(lo, hi + 1))
+        else: slots.add(int(item))
+    bad = [s for s in slots if not 0 <= s < SLOTS_PER_EPOCH]
+    if bad: raise ValueError(f"TDMA slots must be 0-{SLOTS_PER_EPOCH - 1} (got {sorted(bad)[:4]})")
+    return tuple(sorted(slots))
+
+def burst_airtime_s(profile):
+    """On-air duration of the longest packetizer burst (acquisition preamble + sync + frame chips + tail)."""
+    return profile.airtime_s()
+
+class TDMAScheduler:
+    """
+    Slot gate for one node. The 1 s epoch (aligned to the caller's clock, normally Unix time on a
+    GPS/NTP-disciplined radio) holds SLOTS_PER_EPOCH slots of slot_s. Each run of consecutive
+    assigned slots is cut into transmit opportunities of burst_s + guard_s, so a burst longer than
+    a slot simply occupies several of the node's slots and never spills into a neighbour's.
+    Frames wait in per-slot queues (slot=None: any slot) and release() hands them out, with their
+    slot-aligned start time, once that start is within lead_s of now.
+    """
+    def __init__(self, assigned_slots, burst_s, slot_s=SLOT_S, guard_s=0.0005, lead_s=0.05):
+        self.slots = tuple(sorted(set(assigned_slots)))
+        self.slot_s, self.burst_s, self.guard_s, self.lead_s = slot_s, burst_s, guard_s, lead_s
+        self.epoch_s = slot_s * SLOTS_PER_EPOCH
+        self.opportunities = self._plan() # (offset in epoch, starting slot)
+        if not self.opportunities:
+            need = math.ceil((burst_s + guard_s) / slot_s)
+            raise ValueError(f"No run of assigned slots fits one {burst_s * 1e3:.2f} ms burst (needs {need} consecutive slots)")
+        self.queues = {slot: deque() for _, slot in self.opportunities}
+        self.queues[None] = deque()
+        self.cursor = float('-inf') # start time of the last opportunity handed out
+        self.stats = {"queued": 0, "released": 0}
+
+    def _plan(self):
+        plan, runs, run = [], [], []
+        for s in self.slots:
+            if run and s != run[-1] + 1: runs.append(run); run = []
+            run.append(s)
+        if run: runs.append(run)
+        step = self.burst_s + self.guard_s
+        for run in runs:
+            start, span = run[0] * self.slot_s, len(run) * self.slot_s
+            for k in range(int((span + 1e-12) // step)):
+                t = start + k * step
+                plan.append((t, int(t / self.slot_s + 1e-9)))
+        return plan
+
+    def slot_at(self, t):
+        """(epoch number, slot number) for time t."""
+        epoch = int(t // self.epoch_s)
+        return epoch, min(SLOTS_PER_EPOCH - 1, int((t - epoch * self.epoch_s) / self.slot_s))
+
+    def capacity(self):
+        """Bursts per second this node can put on the air."""
+        return len(self.opportunities) / self.epoch_s
+
+    def backlog(self):
+        return sum(len(q) for q in self.queues.values())
+
+    def enqueue(self, obj, slot=None):
+        """Queues obj for the next opportunity (slot=None) or for the opportunity starting at slot."""
+        if slot not in self.queues: raise ValueError(f"Slot {slot} does not start a transmit opportunity for this node")
+        self.queues[slot].append(obj); self.stats["queued"] += 1
+
+    def _starts(self, t0, t1):
+        """Opportunity start times in (t0, t1], in order."""
+        epoch = int(max(t0, 0.0) // self.epoch_s)
+        while epoch * self.epoch_s <= t1:
+            for offset, slot in self.opportunities:
+                t = epoch * self.epoch_s + offset
+                if t0 < t <= t1: yield t, slot
+            epoch += 1
+
+    def release(self, now):
+        """[(tx_time, obj)] for every queued frame whose opportunity starts within lead_s of now."""
+        out = []
+        if not self.backlog(): return out
+        # Opportunities already started (but not yet used) are skipped rather than sent late
+        for t, slot in self._starts(max(self.cursor, now), now + self.lead_s):
+            queue = self.queues[slot] if self.queues[slot] else self.queues[None]
+            if not queue: continue
+            out.append((t, queue.popleft())); self.cursor = t
+            if not self.backlog(): break
+        self.stats["released"] += len(out)
+        return out
+
+    def snapshot(self):
+        return dict(self.stats, backlog=self.backlog(), slots=len(self.slots), per_sec=round(self.capacity(), 2))
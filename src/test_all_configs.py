@@ -4,55 +4,64 @@
 
 import os
 import sys
-import yaml
+import copy
 import time
-import pmt
-from gnuradio import gr, blocks, pdu
+import numpy as np
 
 # Add src to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from packetizer import packetizer
-from depacketizer import depacketizer
+from link_benchmark import LinkBench
+from mission_profile import MissionProfile
 
-def run_single_test(config_dict, test_name):
-    """Runs a digital loopback test for a specific configuration."""
+def block_loopback(profile, frames=5, payload_len=32, chunk=4096):
+    """
+    The same loopback through the packetizer and depacketizer blocks themselves, outside a flowgraph:
+    their message ports are captured directly and general_work is driven by hand. Returns the number
+    of payloads delivered intact with the right src/dst/seq, or None without GNU Radio.
+    """
+    try:
+        import pmt
+        from packetizer import packetizer
+        from depacketizer import depacketizer
+    except ImportError:
+        return None
+    pkt, depkt = packetizer(profile, src_id=3), depacketizer(profile, src_id=9)
+    bursts, out, consumed = [], [], [0]
+    pkt.message_port_pub = lambda port, msg: bursts.append(np.array(pmt.u8vector_elements(pmt.cdr(msg)), dtype=np.uint8))
+    depkt.message_port_pub = lambda port, msg: out.append(msg) if pmt.symbol_to_string(port) == "out" else None
+    def mock_consume(i, n): consumed[0] += n
+    depkt.consume = mock_consume
+
+    plen = LinkBench(profile).max_payload(payload_len)
+    payloads = [bytes([i + 1]) * plen for i in range(frames)]
+    for i, p in enumerate(payloads):
+        meta = pmt.dict_add(pmt.dict_add(pmt.make_dict(), pmt.intern("seq"), pmt.from_long(i)), pmt.intern("dst_id"), pmt.from_long(9))
+        pkt.handle_msg(pmt.cons(meta, pmt.init_u8vector(plen, list(p))))
+    stream = np.concatenate(bursts)
+    while consumed[0] < len(stream): depkt.general_work([stream[consumed[0]:consumed[0] + chunk]], [])
+    deadline = time.time() + 5.0
+    while len(out) < frames and time.time() < deadline: time.sleep(0.01)
+    depkt.stop()
+
+    def field(meta, key): return pmt.to_long(pmt.dict_ref(meta, pmt.intern(key), pmt.from_long(-1)))
+    return sum(bytes(pmt.u8vector_elements(pmt.cdr(m))) == payloads[field(pmt.car(m), "seq")]
+               and field(pmt.car(m), "src_id") == 3 and field(pmt.car(m), "dst_id") == 9 for m in out)
+
+def run_single_test(config_dict, test_name, frames=20):
+    """
+    Runs an in-memory digital loopback (packetizer -> depacketizer) for a specific configuration:
+    LinkBench drives the blocks' shared LinkEncoder/FrameSync/LinkDecoder stages, then a few frames
+    go through the blocks themselves when GNU Radio is installed.
+    """
     print(f"--- [TEST] {test_name} ---")
-    
-    # Save temp config for the blocks to load
-    tmp_config = "tmp_test_config.yaml"
-    with open(tmp_config, 'w') as f:
-        yaml.dump(config_dict, f)
-    
-    tb = gr.top_block()
-    # Note: depacketizer in v11.7+ handles bits directly (out_sig=None)
-    pkt = packetizer(config_path=tmp_config, src_id=1)
-    depkt = depacketizer(config_path=tmp_config, src_id=1, ignore_self=False)
-    p2s = pdu.pdu_to_tagged_stream(gr.types.byte_t, "packet_len")
-    msg_debug = blocks.message_debug()
-    
-    # Bridge: Packetizer(PDU) -> P2S(Stream) -> Depacketizer(Stream)
-    tb.msg_connect((pkt, "out"), (p2s, "pdus"))
-    tb.connect(p2s, depkt)
-    tb.msg_connect((depkt, "out"), (msg_debug, "store"))
-    
-    tb.start()
-    test_payload = f"OPAL_STRESS_{test_name}".encode()
-    pkt.handle_msg(pmt.cons(pmt.make_dict(), pmt.init_u8vector(len(test_payload), list(test_payload))))
-    
-    success = False
-    start_time = time.time()
-    while time.time() - start_time < 1.0: # 1 second is plenty for digital loopback
-        if msg_debug.num_messages() > 0:
-            recv_payload = bytes(pmt.u8vector_elements(pmt.cdr(msg_debug.get_message(0))))
-            if test_payload in recv_payload:
-                success = True; break
-        time.sleep(0.05)
-    
-    tb.stop(); tb.wait()
-    if os.path.exists(tmp_config): os.remove(tmp_config)
-    
-    print(f"Result: {'\033[92mSUCCESS\033[0m' if success else '\033[91mFAILURE\033[0m'}\n")
+    profile = MissionProfile.from_dict(config_dict, source=test_name)
+    r = LinkBench(profile).run(frames=frames, payload_len=32, mem_frames=0)
+    blocks = block_loopback(profile)
+    success = r["delivered"] == frames and blocks in (None, 5)
+    status = "\033[92mSUCCESS\033[0m" if success else "\033[91mFAILURE\033[0m"
+    via = "blocks skipped (no GNU Radio)" if blocks is None else f"{blocks}/5 via blocks"
+    print(f"Result: {status} ({r['delivered']}/{frames} frames, {r['frames_per_sec']:.0f} fps; {via})\n")
     return success
 
 def main():
@@ -84,7 +93,7 @@ def main():
     print("="*40 + "\n")
     
     for name, overrides in test_suite:
-        cfg = base_cfg.copy()
+        cfg = copy.deepcopy(base_cfg)
         # Deep update for nested dicts
         for k, v in overrides.items():
             if isinstance(v, dict) and k in cfg: cfg[k].update(v)
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Opal Vanguard - Burst Overhead & Airtime Accounting Test (v1.0)
+
+import os
+import sys
+import glob
+import time
+import pmt
+import numpy as np
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from mission_profile import MissionProfile
+from link_benchmark import LinkBench
+from packetizer import packetizer
+from session_manager import session_manager
+from mac_harness import PortCapture, pdu
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CFG = {'mission': {'id': 'AIR_TEST'}, 'mac_layer': {'arq_enabled': True, 'arq_timeout_ms': 5000},
+       'link_layer': {'frame_size': 120}, 'hardware': {'samp_rate': 2000000}}
+
+def preambles(ports):
+    return [pmt.to_long(pmt.dict_ref(pmt.car(m), pmt.intern("preamble_len"), pmt.from_long(-1))) for m in ports.take("pkt_out")]
+
+def test_burst_overhead():
+    print("--- [TEST] Burst Overhead & Airtime Accounting ---")
+    checks = []
+
+    # Tail follows the modem's filter delays; an explicit tail_bits still wins
+    gfsk = MissionProfile.from_dict(CFG)
+    dqpsk = MissionProfile.from_dict(dict(CFG, physical={'modulation': 'DQPSK'}))
+    fixed = MissionProfile.from_dict(dict(CFG, physical={'tail_bits': 2048, 'preamble_short': 64}))
+    checks.append(0 < gfsk.tail_bits < dqpsk.tail_bits < 2048 and gfsk.tail_bits % 8 == 0)
+    checks.append(fixed.tail_bits == 2048 and fixed.preamble_short == 64 and fixed.burst_bits() == fixed.burst_bits(1024))
+
+    # Short preamble + derived tail still frame back to back through every level's link chain
+    # (levels 7 and 9 do not decode in the bit-level loopback with any overhead)
+    for path in sorted(glob.glob(os.path.join(ROOT, "mission_configs", "level[0-68]*.yaml"))):
+        bench = LinkBench(MissionProfile.load(path))
+        payloads = [bytes([i + 1]) * 20 for i in range(10)]
+        stream = np.concatenate([bench.encode(p, seq=i, preamble_len=bench.profile.preamble_short) for i, p in enumerate(payloads)])
+        checks.append([r[3] for r in bench.receive(stream)] == payloads)
+
+    # The packetizer honours the MAC's preamble choice and emits exactly profile.burst_bits()
+    pkt = packetizer(config_path=CFG)
+    bursts = PortCapture(pkt)
+    pkt.handle_msg(pdu(b"HELLO")); pkt.handle_msg(pdu(b"HELLO", preamble_len=gfsk.preamble_short))
+    lengths = [len(pmt.u8vector_elements(pmt.cdr(m))) for m in bursts.take("out")]
+    checks.append(lengths == [gfsk.burst_bits(), gfsk.burst_bits(gfsk.preamble_short)])
+
+    # MAC: long preamble to acquire (SYN, unknown peer), short once connected, long again for retries and a lossy peer
+    a = session_manager(config_path=CFG)
+    ports = PortCapture(a)
+    a.send_packet(b"SYN", msg_type=1)
+    a.handle_tx_request(pdu(b"EARLY", dst_id=3)) # peer 3 not connected yet: buffered
+    a.force_connected(0)
+    for i in range(20): a.handle_tx_request(pdu(b"TELEMETRY %02d" % i)) # 16 fill the ARQ window, 4 wait
+    seen = preambles(ports)
+    checks.append(seen[0] == gfsk.preamble_len and set(seen[1:]) == {gfsk.preamble_short})
+    with a.lock: a.peer(0).arq.poll(time.monotonic() + 6.0) # every in-flight frame's timer fires: retransmissions
+    a.peer(0).consecutive_fails = 1
+    a.send_packet(b"ACK", msg_type=2, dst=0)
+    retries = preambles(ports)
+    checks.append(len(retries) == 17 and set(retries) == {gfsk.preamble_len})
+
+    stats = a._stats()
+    old_bits = stats["air_frames"] * (gfsk.preamble_len + gfsk.sync_len + gfsk.chips_per_frame + 2048) # fixed 2048-bit tail, always long
+    old_eff = stats["air_efficiency"] * stats["air_ms"] / (old_bits / gfsk.bit_rate * 1e3)
+    print(f"{stats['air_frames']} frames ({stats['air_short']} short) | {stats['air_ms']:.1f} ms on air vs {old_bits / gfsk.bit_rate * 1e3:.1f} ms "
+          f"| payload share {stats['air_efficiency']:.2f} vs {old_eff:.2f} with fixed overhead")
+    checks.append(stats["air_short"] == 16 and stats["air_efficiency"] >= 2 * old_eff)
+    a.stop()
+
+    print(f"Result: {sum(checks)}/{len(checks)} Checks Passed")
+    return all(checks)
+
+if __name__ == "__main__":
+    if not test_burst_overhead():
+        sys.exit(1)
@@ -34,6 +34,26 @@ def test_ccsk_logic():
     print(f"Result: {success_count}/32 Symbols Verified")
     return success_count == 32
 
+def test_ccsk_batch_encode():
+    print("\n--- [TEST] Batched CCSK Encode ---")
+    proc = CCSKProcessor()
+    rng = np.random.default_rng(16)
+    checks = []
+    for n_bits in (960, 7520, 23):
+        bits = rng.integers(0, 2, n_bits).tolist()
+        legacy = []
+        for i in range(0, len(bits), 5):
+            sym = 0
+            for b in bits[i:i+5]: sym = (sym << 1) | b
+            legacy.extend(proc.encode_symbol(sym))
+        checks.append(proc.encode_symbols(np.array(bits, dtype=np.uint8)).tolist() == legacy)
+
+    bits = rng.integers(0, 2, 960).astype(np.uint8)
+    start = time.time()
+    for _ in range(1000): proc.encode_symbols(bits)
+    print(f"Result: {sum(checks)}/{len(checks)} Frames Match | {(time.time() - start) * 1e3:.2f} us per 120-byte frame")
+    return all(checks)
+
 def test_ccsk_performance():
     print("\n--- [TEST] CCSK Performance Benchmarking ---")
     proc = CCSKProcessor()
@@ -63,6 +83,7 @@ def test_ccsk_performance():
 
 if __name__ == "__main__":
     logic_pass = test_ccsk_logic()
+    logic_pass = test_ccsk_batch_encode() and logic_pass
     test_ccsk_performance()
     
     if not logic_pass:
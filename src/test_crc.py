@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Opal Vanguard - CRC Engine Verification & Micro-Benchmark (v1.0)
+
+import random
+import time
+import zlib
+import sys
+import os
+import numpy as np
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from crc_helper import CRCEngine, crc16, crc16_many
+
+def bitwise_crc16(data):
+    """Reference: the original 8-iterations-per-byte CRC-CCITT loop."""
+    crc = 0xFFFF
+    for byte in data:
+        crc ^= (byte << 8)
+        for _ in range(8):
+            if crc & 0x8000: crc = (crc << 1) ^ 0x1021
+            else: crc <<= 1
+        crc &= 0xFFFF
+    return crc
+
+def test_crc_logic():
+    print("--- [TEST] CRC Engine Verification ---")
+    rng = random.Random(16)
+    frames = [bytes(rng.randrange(256) for _ in range(rng.choice([0, 1, 6, 120, 1024]))) for _ in range(50)]
+    checks = []
+
+    checks.append(all(crc16(f) == bitwise_crc16(f) for f in frames))
+    batch = np.array([[rng.randrange(256) for _ in range(120)] for _ in range(32)], dtype=np.uint8)
+    checks.append(crc16_many(batch).tolist() == [bitwise_crc16(bytes(r)) for r in batch])
+
+    for crc_type, size in (("CRC16", 2), ("CRC32", 4)):
+        eng = CRCEngine(crc_type)
+        framed = eng.append(b"OPAL_VANGUARD")
+        checks.append(eng.size == size and eng.check(framed[:-size], framed[-size:]))
+        checks.append(not eng.check(b"OPAL_VANGUARX", framed[-size:]))
+    checks.append(CRCEngine("CRC32").compute(b"123456789") == (zlib.crc32(b"123456789") & 0xFFFFFFFF))
+
+    print(f"Result: {sum(checks)}/{len(checks)} Checks Passed")
+    return all(checks)
+
+def test_crc_performance():
+    print("\n--- [TEST] Per-Frame CRC Benchmarking ---")
+    rng = random.Random(32)
+    for frame_len in (120, 1024):
+        frame = bytes(rng.randrange(256) for _ in range(frame_len))
+        results = []
+        for name, func, iterations in (("bitwise", bitwise_crc16, 200),
+                                       ("CRC16", CRCEngine("CRC16").compute, 20000),
+                                       ("CRC32", CRCEngine("CRC32").compute, 20000)):
+            start = time.time()
+            for _ in range(iterations): func(frame)
+            results.append(f"{name}: {(time.time() - start) / iterations * 1e6:.2f} us")
+        print(f"{frame_len:>4}-byte frame | " + " | ".join(results))
+
+if __name__ == "__main__":
+    logic_pass = test_crc_logic()
+    test_crc_performance()
+
+    if not logic_pass:
+        sys.exit(1)
@@ -5,7 +5,7 @@ import numpy as np
 # Add src to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from dsp_helper import MatrixInterleaver, Scrambler, NRZIEncoder, CCSKProcessor
+from dsp_helper import MatrixInterleaver, Scrambler, NRZIEncoder, CCSKProcessor, SyncCorrelator, AFHRemap
 from rs_helper import RS1511
 
 print("--- Test DSP ---")
@@ -45,3 +45,42 @@ for m in range(0, 22, 2): healed += bytes([( (combined[m] << 4) | combined[m+1]
 print(f"FEC Pass: {healed == data[:11]}")
 
 
+
+# 4. Streaming Sync Correlator (chunked input must match a whole-stream scan)
+rng = np.random.default_rng(4)
+sync = np.array([int(b) for b in format(0x3D4C5B6A, '032b')], dtype=np.uint8)
+stream = rng.integers(0, 2, 20000).astype(np.uint8)
+for pos, inv in ((3000, False), (9000, True), (15000, False)):
+    stream[pos:pos+32] = sync ^ inv
+    stream[pos + 5] ^= 1  # 1 bit error, within the 2-bit tolerance
+
+def reference_hits(bits, start=0):
+    hits = []
+    while start + 32 <= len(bits):
+        d = np.array([np.sum(bits[p:p+32] != sync) for p in range(start, len(bits) - 31)])
+        found = np.flatnonzero((d <= 2) | (d >= 30))
+        if len(found) == 0: break
+        p = start + found[0]; hits.append((p + 32, bool(d[found[0]] >= 30))); start = p + 32
+    return hits
+
+corr = SyncCorrelator(sync, 2)
+got, offset = [], 0
+while offset < len(stream):
+    chunk = stream[offset:offset + int(rng.integers(1, 700))]
+    consumed, inverted = corr.search(chunk)
+    offset += consumed
+    if inverted is not None: got.append((offset, inverted))
+print(f"Sync Correlator Pass: {got == reference_hits(stream)}")
+
+# 5. AFH Remap Table (must match the linear next-clear-channel probe)
+def probe_remap(raw, blacklist, n):
+    for i in range(n):
+        if (raw + i) % n not in blacklist: return (raw + i) % n
+    return raw
+
+afh, afh_ok = AFHRemap(300), True
+for n_bad in (0, 1, 40, 299, 300):
+    blacklist = set(rng.choice(300, n_bad, replace=False).tolist())
+    afh.update(list(blacklist))
+    afh_ok &= all(afh.remap(i) == probe_remap(i, blacklist, 300) for i in range(300))
+print(f"AFH Remap Pass: {afh_ok}")
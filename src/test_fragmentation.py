@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Opal Vanguard - Fragmentation & Reassembly Test (v1.0)
+
+import os
+import sys
+import time
+import random
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from fragmentation import Reassembler, TYPE_FRAG, split
+from session_manager import session_manager
+from link_benchmark import LinkBench
+from mission_profile import MissionProfile
+from tdma import burst_airtime_s
+from mac_harness import Medium, pdu
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CFG = {'mission': {'id': 'FRAG_TEST'}, 'mac_layer': {'arq_enabled': True, 'arq_window': 16, 'arq_timeout_ms': 50, 'max_retries': 8},
+       'link_layer': {'frame_size': 120}, 'hardware': {'samp_rate': 2000000}}
+
+def transfer(blobs, loss=0.1, seed=9):
+    """Sends blobs from MAC 1 to MAC 2 over a lossy PDU-level link. Returns (delivered messages, frames 1 sent)."""
+    a, b = session_manager(config_path=CFG, node_id=1), session_manager(config_path=CFG, node_id=2)
+    a.force_connected(2); b.force_connected(1)
+    medium = Medium({1: a, 2: b}, loss=loss, seed=seed)
+    for blob in blobs:
+        a.handle_tx_request(pdu(blob))
+        medium.pump()
+    deadline = time.time() + 10.0
+    while time.time() < deadline and (a.peer(2).arq.in_flight or a.peer(2).arq.backlog):
+        time.sleep(0.02); medium.pump()
+    got = medium.received(2)
+    a.stop(); b.stop()
+    return got, medium.sent[1]
+
+def test_fragmentation():
+    print("--- [TEST] Fragmentation & Reassembly ---")
+    checks = []
+    rng = random.Random(1)
+    image = bytes(rng.getrandbits(8) for _ in range(5000))
+
+    # Any arrival order, duplicates included, rebuilds the message exactly once
+    frags = split(image, 82, msg_id=7)
+    shuffled = frags + frags[:5]; rng.shuffle(shuffled)
+    r = Reassembler()
+    out = [m for m in (r.add(3, f, 0.0) for f in shuffled) if m is not None]
+    checks.append(len(frags) == 65 and out == [image] and len(r) == 0 and r.stats["duplicates"] == 5)
+
+    # Bounded: stale partials time out, extra partials evict the oldest
+    r = Reassembler(timeout_s=1.0, max_pending=2)
+    r.add(1, frags[0], 0.0); r.add(2, frags[0], 0.5)
+    checks.append(r.expire(1.2) == 1 and len(r) == 1)
+    r.add(3, frags[0], 1.3); r.add(4, frags[0], 1.4)
+    checks.append(len(r) == 2 and r.stats["evicted"] == 1 and r.add(9, b"\x00", 1.5) is None and r.stats["malformed"] == 1)
+    # A restarted sender reuses message ids: forgetting its key drops its partials and completed ids
+    r.forget(3)
+    checks.append(len(r) == 1 and r.add(4, frags[1], 1.6) is None and len(r) == 1)
+
+    # Fragments survive the real level6 link chain (COMSEC encrypts each one)
+    bench = LinkBench(MissionProfile.load(os.path.join(ROOT, "mission_configs", "level6_link16.yaml")))
+    r = Reassembler()
+    rebuilt = None
+    for k, frag in enumerate(split(image[:1500], bench.profile.max_payload, msg_id=1)):
+        for rx in bench.receive(bench.encode(frag, seq=k, m_type=TYPE_FRAG)):
+            if rx[1] == TYPE_FRAG: rebuilt = r.add(0, rx[3], 0.0) or rebuilt
+    checks.append(rebuilt == image[:1500])
+
+    # MAC to MAC over a 10% loss link: ARQ repairs single fragments, the file arrives once and intact
+    small = [b"STATUS %d" % i for i in range(3)]
+    blobs = [small[0], image, small[1], image[:300], small[2]]
+    t0 = time.time()
+    got, frames = transfer(blobs)
+    checks.append(got == blobs)
+    needed = sum(len(split(b, 82, 0)) if len(b) > 82 else 1 for b in blobs)
+    airtime = frames * burst_airtime_s(MissionProfile.from_dict(CFG))
+    print(f"{sum(map(len, blobs)) / 1e3:.1f} KB in {frames} frames ({frames - needed} retransmissions) | {len(image) * 8 / airtime / 1e3:.1f} kbps over {airtime:.2f} s of airtime | {time.time() - t0:.1f} s wall")
+
+    print(f"Result: {sum(checks)}/{len(checks)} Checks Passed")
+    return all(checks)
+
+if __name__ == "__main__":
+    if not test_fragmentation():
+        sys.exit(1)
@@ -4,7 +4,6 @@
 
 import os
 import sys
-import yaml
 import time
 import pmt
 import numpy as np
@@ -27,12 +26,10 @@ def run_logic_check(name, overrides):
         if isinstance(v, dict) and k in cfg: cfg[k].update(v)
         else: cfg[k] = v
 
-    tmp_file = f"tmp_logic.yaml"
-    with open(tmp_file, 'w') as f: yaml.dump(cfg, f)
-    
+    # Blocks take the config dict directly (no temp YAML)
     tb = gr.top_block()
-    pkt = packetizer(config_path=tmp_file)
-    depkt = depacketizer(config_path=tmp_file)
+    pkt = packetizer(config_path=cfg)
+    depkt = depacketizer(config_path=cfg)
     p2s = pdu.pdu_to_tagged_stream(gr.types.byte_t, "packet_len")
     msg_debug = blocks.message_debug()
     
@@ -53,7 +50,6 @@ def run_logic_check(name, overrides):
         time.sleep(0.01)
     
     tb.stop(); tb.wait()
-    if os.path.exists(tmp_file): os.remove(tmp_file)
     return success
 
 def main():
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Opal Vanguard - Monte Carlo Simulator Calibration & Sweep Test (v1.0)
+
+import os
+import sys
+import math
+import numpy as np
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from link_sim import BurstChannel, simulate_point, sweep
+from mission_profile import MissionProfile
+
+def bpsk_ber(es_n0_db):
+    """Theoretical uncoded BPSK bit error rate, Q(sqrt(2 Es/N0))."""
+    return 0.5 * math.erfc(math.sqrt(10 ** (es_n0_db / 10.0)))
+
+def sim_cfg(**link):
+    l_cfg = {'frame_size': 120, 'use_fec': False, 'use_interleaving': False, 'use_whitening': False,
+             'use_nrzi': False, 'use_comsec': False, 'crc_type': 'CRC16', 'interleaver_rows': 15}
+    l_cfg.update(link)
+    return {'mission': {'id': 'LEVEL_SIM'}, 'physical': {'modulation': 'GFSK', 'samples_per_symbol': 10},
+            'link_layer': l_cfg, 'mac_layer': {'arq_enabled': False}, 'dsss': {'enabled': False}, 'hardware': {'samp_rate': 2000000}}
+
+def test_calibration():
+    print("--- [TEST] Uncoded BPSK Calibration ---")
+    checks = []
+    for es in (0.0, 4.0, 7.0):
+        channel = BurstChannel(es, rng=np.random.default_rng(7))
+        rate = float(channel.apply(np.zeros((200, 5000), dtype=np.uint8)).mean())
+        print(f"Es/N0 {es:4.1f} dB: chip error rate {rate:.3e} (theory {bpsk_ber(es):.3e})")
+        checks.append(abs(rate / bpsk_ber(es) - 1) < 0.15)
+
+    # Whole uncoded link: BER of the recovered header + payload + CRC matches theory at the chip Es/N0
+    opts = {"payload": 64, "max_frames": 400, "max_frame_errors": 400, "batch": 100, "jam_period": 512, "jsr_db": 10.0, "seed": 3}
+    r = simulate_point((sim_cfg(), "uncoded", 9.0, 0.0, opts))
+    theory = bpsk_ber(r["es_n0_db"])
+    print(f"Uncoded link at Eb/N0 9.0 dB (Es/N0 {r['es_n0_db']} dB): raw {r['raw_ber']:.3e} | BER {r['ber']:.3e} | theory {theory:.3e} | sync loss {r['sync_loss']}")
+    checks.append(abs(r["es_n0_db"] - (9.0 + 10 * math.log10(r["code_rate"]))) < 0.01 and r["chips_per_bit"] == 1.0)
+    checks.append(r["sync_loss"] == 0 and abs(r["raw_ber"] / theory - 1) < 0.2 and abs(r["ber"] / theory - 1) < 0.2)
+
+    # Spreading costs chip energy in the frame body only: the unspread syncword still acquires
+    r = simulate_point((MissionProfile.load(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                        "mission_configs", "level6_link16.yaml")).to_dict(), "level6", 10.0, 0.0, dict(opts, max_frames=100)))
+    print(f"Level 6 at Eb/N0 10.0 dB: {r['chips_per_bit']} chips/bit | raw {r['raw_ber']:.3e} | PER {r['per']} | sync loss {r['sync_loss']}")
+    checks.append(r["chips_per_bit"] > 6 and r["sync_loss"] < 0.05)
+
+    print(f"Result: {sum(checks)}/{len(checks)} Checks Passed")
+    return all(checks)
+
+def test_sweep():
+    print("\n--- [TEST] Deterministic Sweep ---")
+    profile = MissionProfile.from_dict(sim_cfg(use_fec=True, fec_type='RS1511', use_interleaving=True, use_whitening=True), source="fec")
+    kw = dict(workers=2, max_frames=150, max_frame_errors=150, batch=50, seed=5)
+    runs = [sweep([profile], [4.0, 8.0, 12.0], [0.0, 0.05], **kw) for _ in range(2)]
+    for r in runs[0]:
+        print(f"Eb/N0 {r['ebn0_db']:4.1f} duty {r['jam_duty']:.2f}: PER {r['per']:.3f} | sync loss {r['sync_loss']:.3f} | repairs {r['fec_repairs']}")
+    strip = lambda rs: [{k: v for k, v in r.items() if k != "decode_fps"} for r in rs]
+    checks = []
+    checks.append(strip(runs[0]) == strip(runs[1])) # same seed, same numbers
+    checks.append([(r["ebn0_db"], r["jam_duty"]) for r in runs[0]] == [(e, d) for e in (4.0, 8.0, 12.0) for d in (0.0, 0.05)])
+    clean = [r for r in runs[0] if r["jam_duty"] == 0.0]
+    checks.append(clean[0]["per"] > clean[-1]["per"] and clean[-1]["per"] == 0.0)
+    # One repair count per delivered frame, taken from the frame that actually decoded
+    checks.append(all(sum(r["fec_repairs"].values()) == round(r["frames"] * (1 - r["per"])) for r in runs[0]))
+    checks.append(any(int(k) > 0 for k in clean[1]["fec_repairs"]))
+
+    print(f"Result: {sum(checks)}/{len(checks)} Checks Passed")
+    return all(checks)
+
+if __name__ == "__main__":
+    ok = test_calibration()
+    ok = test_sweep() and ok
+    if not ok:
+        sys.exit(1)
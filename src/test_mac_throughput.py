@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Opal Vanguard - MAC Handler Throughput Test (v1.0)
+
+import os
+import sys
+import time
+import pmt
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from session_manager import session_manager
+
+def make_msg(text):
+    data = text.encode()
+    return pmt.cons(pmt.make_dict(), pmt.init_u8vector(len(data), list(data)))
+
+def test_mac_throughput(n=20000, min_rate=2000):
+    """Pushes n application messages straight into the MAC handlers and times them (no flowgraph)."""
+    print("--- [TEST] session_manager Handler Throughput ---")
+    cfg = {'mission': {'id': 'MAC_THROUGHPUT'}, 'mac_layer': {'arq_enabled': True, 'arq_window': 16},
+           'link_layer': {'frame_size': 120}, 'hardware': {'samp_rate': 2000000}}
+    checks = []
+    for state in ("CONNECTED", "IDLE"):
+        mac = session_manager(config_path=cfg)
+        if state == "CONNECTED": mac.force_connected()
+        msgs = [make_msg(f"TACTICAL DATA {i}") for i in range(n)]
+        start = time.perf_counter()
+        for m in msgs: mac.handle_tx_request(m)
+        rate = n / (time.perf_counter() - start)
+        stats = mac._stats()
+        backlog = len(mac.tx_buffer) + stats.get("arq_backlog", 0)
+        queued = backlog + stats.get("arq_sent", 0)
+        print(f"{state:<10} | {rate:,.0f} msgs/sec | window {stats.get('arq_in_flight', 0)} | backlog {backlog} "
+              f"| log lines suppressed {mac.log.suppressed}")
+        checks.append(queued == n and rate >= min_rate)
+        mac.stop()
+    print(f"Result: {sum(checks)}/{len(checks)} Checks Passed")
+    return all(checks)
+
+if __name__ == "__main__":
+    if not test_mac_throughput():
+        sys.exit(1)
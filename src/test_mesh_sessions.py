@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Opal Vanguard - Multi-Peer Session Table Test (v1.0)
+
+import os
+import sys
+import time
+import pmt
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from session_manager import session_manager
+from mac_harness import Medium, pdu
+
+CFG = {'mission': {'id': 'MESH_TEST'}, 'mac_layer': {'arq_enabled': True, 'arq_window': 8, 'arq_timeout_ms': 50, 'max_retries': 8},
+       'link_layer': {'frame_size': 120}, 'hardware': {'samp_rate': 2000000}}
+
+def data(text, dst):
+    return pdu(text.encode(), dst_id=dst)
+
+def settle(medium, busy, timeout=8.0):
+    """Pumps the medium while busy() holds and the timeout has not run out."""
+    deadline = time.time() + timeout
+    while time.time() < deadline and busy():
+        time.sleep(0.05); medium.pump()
+
+def test_mesh_sessions():
+    print("--- [TEST] Multi-Peer Session Table ---")
+    nodes = {n: session_manager(config_path=CFG, node_id=n) for n in (1, 2, 3, 4)}
+    medium = Medium(nodes, loss=0.1)
+    received = lambda nid: [m.decode() for m in medium.received(nid)]
+    checks = []
+
+    # Handshake: every node SYNs and every other node answers
+    for n in nodes.values(): n.send_packet(b"SYN", msg_type=1)
+    medium.pump()
+    hub = nodes[1]
+    checks.append(set(hub.sessions) == {2, 3, 4} and all(s.state == "CONNECTED" for s in hub.sessions.values()))
+
+    # Then node 4's frames stop passing CRC at node 1
+    medium.bad_links.add((4, 1))
+    states = []
+    for i in range(60):
+        for dst in (2, 3): hub.handle_tx_request(data(f"TO {dst} #{i}", dst))
+        nodes[4].handle_tx_request(data(f"FROM 4 #{i}", 1)) # each one a CRC failure at node 1
+        medium.pump(); states.append(hub.state)
+    # Let retransmissions run: node 4's keep failing until node 1 gives up on that link
+    def busy():
+        states.append(hub.state)
+        return hub.sessions[4].state == "CONNECTED" or any(hub.sessions[p].arq.in_flight for p in (2, 3))
+    settle(medium, busy)
+
+    # Independent sequence spaces: each peer gets its own stream, complete and in order, and ignores the other's
+    for dst in (2, 3):
+        got = [m for m in received(dst) if m.startswith("TO")]
+        checks.append(got == [f"TO {dst} #{i}" for i in range(60)])
+    # Node 4's failures only touch node 4's counters: node 1 never leaves CONNECTED
+    checks.append(all(s == "CONNECTED" for s in states) and hub.sessions[2].consecutive_fails == 0)
+    # (dropping the link clears its fail count, so only the state tells us it went down)
+    checks.append(hub.sessions[4].state != "CONNECTED" and not received(1))
+    print(f"Peers at node 1: " + ", ".join(f"{p}={s.state}/{s.consecutive_fails} fails" for p, s in sorted(hub.sessions.items())))
+    print(f"Delivered to 2: {len(received(2))}, to 3: {len(received(3))}, aggregate states seen at 1: {sorted(set(states))}")
+
+    for n in nodes.values(): n.stop()
+    print(f"Result: {sum(checks)}/{len(checks)} Checks Passed")
+    return all(checks)
+
+def test_peer_restart():
+    print("\n--- [TEST] Peer Restart ---")
+    nodes = {n: session_manager(config_path=CFG, node_id=n) for n in (1, 2)}
+    medium = Medium(nodes)
+    checks = []
+
+    # Heartbeat handshake: node 2 connects off node 1's SYN and tells node 1 its epoch in the ACK
+    while nodes[1].state != "CONNECTED":
+        nodes[1].handle_heartbeat(None); medium.pump()
+    for i in range(20):
+        nodes[1].handle_tx_request(data(f"A #{i}", 2)); nodes[2].handle_tx_request(data(f"B #{i}", 1)); medium.pump()
+    checks.append(len(medium.received(1)) == 20 and len(medium.received(2)) == 20 and nodes[1].sessions[2].epoch == nodes[2].epoch)
+
+    # Node 2 reboots: its sequence numbers start over at 0, which node 1 has already delivered
+    nodes[1].handle_tx_request(data("A #20", 2)) # in flight when node 2 goes down: never acknowledged
+    medium.ports[1].take("pkt_out")
+    medium.replace(2, session_manager(config_path=CFG, node_id=2))
+    while nodes[2].state != "CONNECTED":
+        nodes[2].handle_heartbeat(None); medium.pump()
+    for i in range(10):
+        nodes[2].handle_tx_request(data(f"B2 #{i}", 1)); nodes[1].handle_tx_request(data(f"A #{21 + i}", 2)); medium.pump()
+    settle(medium, lambda: nodes[1].sessions[2].arq.in_flight or nodes[2].sessions[1].arq.in_flight)
+
+    after = [m.decode() for m in medium.received(1)][20:]
+    rebooted = [m.decode() for m in medium.received(2)]
+    print(f"Node 1 got {len(after)} frames from the restarted node 2, which got {rebooted[:2]}...{rebooted[-1:]} ({len(rebooted)} frames)")
+    checks.append(after == [f"B2 #{i}" for i in range(10)]) # not dropped as duplicates
+    checks.append(rebooted == [f"A #{20 + i}" for i in range(11)]) # the unacknowledged frame is resent first
+    checks.append(nodes[1].sessions[2].epoch == nodes[2].epoch and nodes[1].sessions[2].state == "CONNECTED")
+
+    for n in nodes.values(): n.stop()
+    print(f"Result: {sum(checks)}/{len(checks)} Checks Passed")
+    return all(checks)
+
+if __name__ == "__main__":
+    ok = test_mesh_sessions()
+    ok = test_peer_restart() and ok
+    if not ok:
+        sys.exit(1)
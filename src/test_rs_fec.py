@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Opal Vanguard - Reed-Solomon FEC Verification (v1.0)
+
+import random
+import time
+import numpy as np
+import sys
+import os
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from rs_helper import RS1511, RS3115
+
+def corrupt(codeword, n_errors, rng, q=16):
+    """Flips n_errors distinct symbols of a codeword to random non-zero offsets."""
+    word = list(codeword)
+    for pos in rng.sample(range(len(word)), n_errors):
+        word[pos] ^= rng.randrange(1, q)
+    return word
+
+def brute_force_decode(rs, msg_in):
+    """Reference: the original exhaustive 1- then 2-symbol search the LUT must reproduce."""
+    if rs.is_valid(msg_in): return list(msg_in[:11]), 0
+    for i in range(15):
+        for val in range(1, 16):
+            c = list(msg_in); c[i] ^= val
+            if rs.is_valid(c): return c[:11], 1
+    for i in range(14):
+        for j in range(i+1, 15):
+            for v1 in range(1, 16):
+                for v2 in range(1, 16):
+                    c = list(msg_in); c[i] ^= v1; c[j] ^= v2
+                    if rs.is_valid(c): return c[:11], 2
+    return list(msg_in[:11]), 0
+
+def test_rs1511_correction():
+    print("--- [TEST] RS(15,11) Syndrome-LUT Correction ---")
+    rs = RS1511()
+    rng = random.Random(1511)
+
+    failures, total = 0, 0
+    for trial in range(40):
+        codeword = rs.encode([rng.randrange(16) for _ in range(11)])
+        # Uncorrectable words exhaust the full 2-symbol search, so sample them sparingly
+        for n_errors in ((0, 1, 2, 3) if trial % 8 == 0 else (0, 1, 2)):
+            word = corrupt(codeword, n_errors, rng)
+            total += 1
+            if rs.decode(word) != brute_force_decode(rs, word):
+                failures += 1
+                print(f"FAIL: LUT diverges from exhaustive search for {word}")
+
+    print(f"Result: {total - failures}/{total} Codewords Match Exhaustive Search")
+    return failures == 0
+
+def test_rs3115_correction():
+    print("\n--- [TEST] RS(31,15) Berlekamp-Massey Correction ---")
+    rs = RS3115()
+    rng = random.Random(3115)
+
+    failures = 0
+    for n_errors in range(9):
+        for trial in range(20):
+            data = [rng.randrange(32) for _ in range(15)]
+            decoded, repairs = rs.decode(corrupt(rs.encode(data), n_errors, rng, q=32))
+            if decoded != data or repairs != n_errors:
+                failures += 1
+                print(f"FAIL: {n_errors} errors -> repairs={repairs}, data_ok={decoded == data}")
+
+    # Beyond t=8 the decoder must give up cleanly rather than report a repair
+    data = [rng.randrange(32) for _ in range(15)]
+    _, repairs = rs.decode(corrupt(rs.encode(data), 12, rng, q=32))
+    if repairs != 0: failures += 1; print("FAIL: 12-error word reported as repaired")
+
+    raw = bytes(range(50))
+    block = bytearray(rs.encode_block(raw)); block[3] ^= 0xFF; block[60] ^= 0x10
+    healed, repairs = rs.decode_block(bytes(block))
+    if healed[:len(raw)] != raw: failures += 1; print("FAIL: Block round-trip mismatch")
+
+    print(f"Result: {182 - failures}/182 Checks Passed (0-8 errors, overload, block round-trip)")
+    return failures == 0
+
+def test_batch_equivalence():
+    print("\n--- [TEST] Batch encode_many/decode_many Equivalence ---")
+    rng = random.Random(940)
+    failures = 0
+    for rs, q in ((RS1511(), 16), (RS3115(), 32)):
+        data = [[rng.randrange(q) for _ in range(rs.k)] for _ in range(64)]
+        coded = rs.encode_many(np.array(data, dtype=np.uint8))
+        if coded.tolist() != [rs.encode(d) for d in data]:
+            failures += 1; print(f"FAIL: {type(rs).__name__}.encode_many diverges from encode")
+        words = [corrupt(c, rng.randrange(rs.nsym), rng, q) for c in coded.tolist()]
+        batch_data, batch_repairs = rs.decode_many(np.array(words, dtype=np.uint8))
+        scalar = [rs.decode(w) for w in words]
+        if batch_data.tolist() != [d for d, _ in scalar] or batch_repairs.tolist() != [e for _, e in scalar]:
+            failures += 1; print(f"FAIL: {type(rs).__name__}.decode_many diverges from decode")
+    print(f"Result: {4 - failures}/4 Batch Paths Verified")
+    return failures == 0
+
+def test_frame_throughput():
+    print("\n--- [TEST] Frame-Level FEC Benchmarking (frame_size: 940) ---")
+    rs = RS1511()
+    rng = random.Random(9)
+    raw = bytes(rng.randrange(256) for _ in range(640))
+    iterations = 200
+
+    start = time.time()
+    for _ in range(iterations): block = rs.encode_block(raw)[:940]
+    enc_us = (time.time() - start) / iterations * 1e6
+
+    noisy = bytearray(block)
+    for _ in range(30): noisy[rng.randrange(len(noisy))] ^= 1 << rng.randrange(8)
+    noisy = bytes(noisy)
+    start = time.time()
+    for _ in range(iterations): rs.decode_block(noisy)
+    dec_us = (time.time() - start) / iterations * 1e6
+    print(f"Encode: {enc_us:.1f} us/frame | Decode (30 bit errors): {dec_us:.1f} us/frame")
+
+def test_rs1511_performance():
+    print("\n--- [TEST] RS(15,11) Decode Benchmarking ---")
+    rs = RS1511()
+    rng = random.Random(7)
+    words = [corrupt(rs.encode([rng.randrange(16) for _ in range(11)]), 2, rng) for _ in range(1000)]
+
+    start = time.time()
+    for w in words: rs.decode(w)
+    per_call = (time.time() - start) / len(words) * 1e6
+    print(f"Average Time: {per_call:.2f} us per 2-error decode")
+
+if __name__ == "__main__":
+    logic_pass = test_rs1511_correction()
+    logic_pass = test_rs3115_correction() and logic_pass
+    logic_pass = test_batch_equivalence() and logic_pass
+    test_rs1511_performance()
+    test_frame_throughput()
+
+    if not logic_pass:
+        sys.exit(1)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Opal Vanguard - Process Worker Pool Recovery Test (v1.0)
+
+import os
+import sys
+import time
+import threading
+
+# Add src to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from fec_worker import ProcessWorkerPool
+from link_benchmark import LinkBench
+from mission_profile import MissionProfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_worker_pool():
+    print("--- [TEST] Process Worker Pool Recovery ---")
+    profile = MissionProfile.load(os.path.join(ROOT, "mission_configs", "level2_repairable.yaml"))
+    bench = LinkBench(profile)
+    blocks = []
+    for i in range(40): # the synced frame bytes the depacketizer hands to the pool
+        bench.receive(bench.encode(b"FRAME %02d" % i, seq=i)); blocks.append(bench.last_block)
+    out, lock = [], threading.Lock()
+    def on_result(result, sid, confidence):
+        with lock: out.append(result[3] if result else None)
+
+    pool = ProcessWorkerPool(profile.to_dict(), on_result, n_workers=2, n_slots=8, submit_timeout=5.0)
+    checks = []
+    try:
+        for b in blocks[:20]: pool.submit(b, 1.0)
+        pool.procs[0].kill() # a worker dies, most likely with a ticket in flight
+        for b in blocks[20:]: pool.submit(b, 1.0) # would block forever on leaked slots without recovery
+        deadline = time.time() + 10.0
+        while time.time() < deadline and len(out) < len(blocks): time.sleep(0.05)
+        delivered = [p for p in out if p is not None]
+        print(f"{len(out)}/{len(blocks)} results, {len(delivered)} decoded, {pool.restarts} worker restart(s), {pool.in_flight()} slots in flight")
+        # Every ticket resolves in order, at most one frame is written off, no slot leaks
+        checks.append(len(out) == len(blocks) and pool.restarts >= 1 and pool.in_flight() == 0)
+        checks.append(len(delivered) >= len(blocks) - 1 and delivered == sorted(delivered))
+    finally:
+        pool.close()
+
+    print(f"Result: {sum(checks)}/{len(checks)} Checks Passed")
+    return all(checks)
+
+def test_collector_hardening():
+    print("\n--- [TEST] Collector Survives Handler Errors, Submit Never Hangs ---")
+    profile = MissionProfile.load(os.path.join(ROOT, "mission_configs", "level2_repairable.yaml"))
+    bench = LinkBench(profile)
+    blocks = []
+    for i in range(6):
+        bench.receive(bench.encode(b"FRAME %02d" % i, seq=i)); blocks.append(bench.last_block)
+    out, release = [], threading.Event()
+    def on_result(result, sid, confidence):
+        out.append(result[3] if result else None)
+        if len(out) == 1: raise RuntimeError("handler fault") # must not end the collector thread
+        if len(out) == 2: release.wait(5.0) # holds the collector, so no slots come back
+
+    pool = ProcessWorkerPool(profile.to_dict(), on_result, n_workers=1, n_slots=2, submit_timeout=0.3)
+    checks = []
+    try:
+        pool.submit(blocks[0], 1.0)
+        deadline = time.time() + 10.0
+        while time.time() < deadline and not out: time.sleep(0.05)
+        accepted = [pool.submit(b, 1.0) for b in blocks[1:5]] # ring of 2 with the collector held: later frames are dropped
+        release.set()
+        deadline = time.time() + 10.0
+        while time.time() < deadline and len(out) < 1 + sum(accepted): time.sleep(0.05)
+        accepted.append(pool.submit(blocks[5], 1.0))
+        deadline = time.time() + 10.0
+        while time.time() < deadline and len(out) < 1 + sum(accepted): time.sleep(0.05)
+        print(f"accepted {accepted}, {pool.stalled} stall drop(s), {len(out)} results, collector alive: {pool.collector.is_alive()}")
+        checks.append(pool.collector.is_alive() and out[0] == b"FRAME 00")
+        checks.append(pool.stalled == accepted.count(False) and pool.stalled >= 1 and accepted[-1])
+        checks.append(len(out) == 1 + sum(accepted) and pool.in_flight() == 0)
+    finally:
+        release.set(); pool.close()
+
+    print(f"Result: {sum(checks)}/{len(checks)} Checks Passed")
+    return all(checks)
+
+if __name__ == "__main__":
+    ok = test_worker_pool()
+    ok = test_collector_hardening() and ok
+    if not ok:
+        sys.exit(1)
@@ -4,41 +4,24 @@
 
 import os
 import sys
-import numpy as np
-from gnuradio import gr, blocks, analog, digital, qtgui, filter, fft, channels, pdu
+from gnuradio import gr, blocks, qtgui, fft, channels
 import pmt
 from PyQt5 import Qt
 from PyQt5.QtCore import pyqtSignal, QTimer
 import sip
-import yaml
 import time
 import argparse
 
 # Add src to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from packetizer import packetizer
-from depacketizer import depacketizer
-from hop_controller import lfsr_hop_generator
-from hop_generator_aes import aes_hop_generator
-from hop_generator_tod import tod_hop_generator
+from mission_flowgraph import MissionFlowgraph, RotatorHopHandler
+from mission_profile import MissionProfile
 from session_manager import session_manager
 
 # ----------------------------------------------------------------------
 # INTERNAL HANDLER BLOCKS
 # ----------------------------------------------------------------------
-class FreqHandlerBlock(gr.basic_block):
-    def __init__(self, parent):
-        gr.basic_block.__init__(self, name="FreqHandler", in_sig=None, out_sig=None)
-        self.parent = parent
-        self.message_port_register_in(pmt.intern("msg")); self.set_msg_handler(pmt.intern("msg"), self.handle_msg)
-    def handle_msg(self, msg):
-        try:
-            freq = pmt.to_double(msg); offset = freq - self.parent.center_freq
-            phase_inc = 2 * np.pi * offset / self.parent.samp_rate
-            self.parent.rot_tx.set_phase_inc(phase_inc); self.parent.rot_rx.set_phase_inc(-phase_inc)
-        except: pass
-
 class StatusHandlerBlock(gr.basic_block):
     def __init__(self, parent):
         gr.basic_block.__init__(self, name="StatusHandler", in_sig=None, out_sig=None)
@@ -68,9 +51,9 @@ class OpalVanguardVisualDemo(gr.top_block, Qt.QWidget):
         Qt.QWidget.__init__(self)
         self.setWindowTitle(f"Opal Vanguard Lab - [{config_path}]")
         
-        with open(config_path, 'r') as f:
-            self.cfg = yaml.safe_load(f)
-            
+        self.profile = MissionProfile.load(config_path)
+        self.cfg = self.profile.cfg
+
         self.samp_rate = self.cfg['physical']['samp_rate']
         self.center_freq = self.cfg['physical']['center_freq']
         hcfg = self.cfg['hopping']
@@ -107,65 +90,21 @@ class OpalVanguardVisualDemo(gr.top_block, Qt.QWidget):
         # ----------------------------------------------------------------------
         # BLOCKS
         # ----------------------------------------------------------------------
-        self.session_a = session_manager(initial_seed=hcfg['initial_seed'])
-        self.session_b = session_manager(initial_seed=hcfg['initial_seed'])
-        if hcfg['sync_mode'] == "TOD": self.session_a.state = "CONNECTED"; self.session_b.state = "CONNECTED"
+        # Lab nodes: ALPHA (1) transmits, BRAVO (2) answers; node ids pick their TDMA slots
+        self.session_a = session_manager(initial_seed=hcfg['initial_seed'], config_path=self.profile, node_id=1)
+        self.session_b = session_manager(initial_seed=hcfg['initial_seed'], config_path=self.profile, node_id=2)
+        if hcfg['sync_mode'] == "TOD": self.session_a.force_connected(); self.session_b.force_connected()
             
-        self.pkt_a = packetizer(config_path=config_path)
-        self.depkt_b = depacketizer(config_path=config_path)
+        # Shared TX/RX chain; the lab keeps a wideband RX filter since rot_rx de-hops before it
+        self.fg = MissionFlowgraph(self, self.profile, self.samp_rate, self.center_freq,
+                                   rx_cutoff=min(0.8e6, self.samp_rate / 2.1), rx_transition=100e3)
+        self.pkt_a, self.depkt_b, self.hop_ctrl = self.fg.pkt, self.fg.depkt, self.fg.hop_ctrl
 
         self.pdu_src = blocks.message_strobe(pmt.cons(pmt.make_dict(), pmt.init_u8vector(len("MISSION DATA"), list("MISSION DATA".encode()))), 3000)
-        self.p2s_a = pdu.pdu_to_tagged_stream(gr.types.byte_t, "packet_len")
-        mod_type = self.cfg['physical'].get('modulation', 'GFSK')
-        sps = self.cfg['physical'].get('samples_per_symbol', 8)
-
-        if mod_type in ["DBPSK", "DQPSK", "D8PSK"]:
-            const_points = 2 if "BPSK" in mod_type else (4 if "QPSK" in mod_type else 8)
-            self.mod_a = digital.psk_mod(
-                constellation_points=const_points,
-                mod_code=digital.mod_codes.GRAY_CODE,
-                differential=True,
-                samples_per_symbol=sps,
-                excess_bw=0.35,
-                verbose=False,
-                log=False)
-            self.demod_b = digital.psk_demod(
-                constellation_points=const_points,
-                differential=True,
-                samples_per_symbol=sps,
-                excess_bw=0.35,
-                phase_bw=6.28/100.0,
-                timing_bw=6.28/100.0,
-                mod_code=digital.mod_codes.GRAY_CODE,
-                verbose=False,
-                log=False)
-        elif mod_type == "MSK":
-            self.mod_a = digital.msk_mod(samples_per_symbol=sps, bt=0.5)
-            self.demod_b = digital.msk_demod(samples_per_symbol=sps, gain_mu=0.1, mu=0.5, omega_relative_limit=0.005, freq_error=0.0)
-        else:
-            # GFSK Default
-            freq_dev = self.cfg['physical'].get('freq_dev', 125000)
-            mod_sensitivity = (2.0 * np.pi * freq_dev) / 2e6 # Default samp_rate
-            self.mod_a = digital.gfsk_mod(samples_per_symbol=sps, sensitivity=mod_sensitivity, bt=0.35)
-            self.demod_b = digital.gfsk_demod(samples_per_symbol=sps, gain_mu=0.1, mu=0.5, omega_relative_limit=0.005, freq_error=0.0)
         self.rot_tx = blocks.rotator_cc(0)
         
-        # Hop Controller
-        if hcfg['sync_mode'] == "TOD":
-            self.hop_ctrl = tod_hop_generator(key=bytes.fromhex(hcfg['aes_key']), num_channels=hcfg['num_channels'], center_freq=self.center_freq, channel_spacing=hcfg['channel_spacing'], dwell_ms=hcfg['dwell_time_ms'], lookahead_ms=hcfg['lookahead_ms'])
-        else:
-            if hcfg['type'] == "AES":
-                self.hop_ctrl = aes_hop_generator(key=bytes.fromhex(hcfg['aes_key']), num_channels=hcfg['num_channels'], center_freq=self.center_freq, channel_spacing=hcfg['channel_spacing'])
-            else:
-                self.hop_ctrl = lfsr_hop_generator(seed=hcfg['initial_seed'], num_channels=hcfg['num_channels'], center_freq=self.center_freq, channel_spacing=hcfg['channel_spacing'])
-        
         self.channel = channels.channel_model(noise_voltage=0.0, frequency_offset=0.0, epsilon=1.0, taps=[1.0+0j])
         self.rot_rx = blocks.rotator_cc(0)
-        
-        cutoff = min(0.8e6, self.samp_rate / 2.1)
-        lpf_taps = filter.firdes.low_pass(1.0, self.samp_rate, cutoff, 100e3)
-        self.rx_filter = filter.fir_filter_ccf(1, lpf_taps)
-        
         self.stabilizer = blocks.delay(gr.sizeof_gr_complex, 100)
 
         # IQ Recorder Sink
@@ -186,13 +125,15 @@ class OpalVanguardVisualDemo(gr.top_block, Qt.QWidget):
         # ----------------------------------------------------------------------
         self.msg_connect((self.pdu_src, "strobe"), (self.session_a, "data_in"))
         self.msg_connect((self.session_a, "pkt_out"), (self.pkt_a, "in"))
-        self.msg_connect((self.pkt_a, "out"), (self.p2s_a, "pdus"))
-        self.connect(self.p2s_a, self.mod_a, self.rot_tx, self.channel)
-        self.connect(self.channel, self.rot_rx, self.rx_filter, self.stabilizer, self.demod_b, self.depkt_b)
+        self.fg.connect_tx(self.rot_tx, self.channel)
+        # The 100-sample stabilizer delay sits ahead of the (LTI) RX filter
+        self.fg.connect_rx(self.channel, self.rot_rx, self.stabilizer)
         self.msg_connect((self.depkt_b, "out"), (self.session_b, "msg_in"))
+        self.msg_connect((self.depkt_b, "crc_fail"), (self.session_b, "crc_fail"))
         self.msg_connect((self.session_b, "pkt_out"), (self.session_a, "msg_in"))
 
-        self.freq_h = FreqHandlerBlock(self); self.msg_connect((self.hop_ctrl, "freq"), (self.freq_h, "msg"))
+        self.freq_h = RotatorHopHandler(self.center_freq, self.samp_rate, self.rot_tx, self.rot_rx)
+        self.fg.connect_hopping(self.freq_h)
         self.stat_h = StatusHandlerBlock(self); self.msg_connect((self.session_a, "pkt_out"), (self.stat_h, "msg"))
         self.data_h = DataHandlerBlock(self); self.msg_connect((self.session_b, "data_out"), (self.data_h, "msg"))
 
@@ -201,11 +142,6 @@ class OpalVanguardVisualDemo(gr.top_block, Qt.QWidget):
         self.connect(self.channel, self.viz_throttle, self.snk_waterfall)
         self.connect(self.rot_rx, self.snk_rx_freq)
 
-        self.timer = Qt.QTimer()
-        self.timer.timeout.connect(lambda: self.hop_ctrl.handle_trigger(pmt.PMT_T))
-        if hcfg.get('enabled', True):
-            self.timer.start(hcfg['dwell_time_ms'])
-            
         self.status_signal.connect(self.on_status_change)
         self.data_signal.connect(lambda p: self.text_out.append(f"<b>[RX]:</b> {p}"))
 
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Opal Vanguard - UHD Hop Handler (LO / DSP Retuning)
+
+from gnuradio import gr, uhd
+import pmt
+import time
+
+class UHDHandler(gr.basic_block):
+    """
+    Applies hop messages ({freq, time}) to a USRP source/sink pair.
+    retune_mode "lo": every hop retunes the RF LO (ms of PLL settling).
+    retune_mode "dsp": the LO stays put and only the DDC/DUC CORDIC moves (tune_request with a
+    manual rf_freq), falling back to an LO retune when a hop leaves the instantaneous bandwidth.
+    Per-mode hop latency (host call time) is kept in self.latency and printed every report_every hops.
+    """
+    def __init__(self, usrp_src, usrp_snk, center_freq, samp_rate, channel_spacing=150e3, retune_mode="lo", report_every=100):
+        gr.basic_block.__init__(self, "UHDHandler", None, None); self.src, self.snk = usrp_src, usrp_snk
+        self.message_port_register_in(pmt.intern("msg")); self.set_msg_handler(pmt.intern("msg"), self.handle)
+        self.last_f = 0
+        self.retune_mode, self.lo_freq = retune_mode, center_freq
+        # Usable half-bandwidth around the LO for a channel of width channel_spacing
+        self.max_offset = samp_rate / 2.0 - channel_spacing / 2.0
+        self.latency = {"dsp": [0, 0.0, 0.0], "lo": [0, 0.0, 0.0]} # count, total s, max s
+        self.report_every, self.hops = report_every, 0
+
+    def _tune(self, f):
+        if self.retune_mode == "dsp" and abs(f - self.lo_freq) <= self.max_offset:
+            tr = uhd.tune_request(f)
+            tr.rf_freq, tr.rf_freq_policy = self.lo_freq, uhd.tune_request.POLICY_MANUAL
+            tr.dsp_freq_policy = uhd.tune_request.POLICY_AUTO
+            self.src.set_center_freq(tr, 0); self.snk.set_center_freq(tr, 0)
+            return "dsp"
+        self.src.set_center_freq(f, 0); self.snk.set_center_freq(f, 0)
+        self.lo_freq = f
+        return "lo"
+
+    def _record(self, mode, dt):
+        stats = self.latency[mode]
+        stats[0] += 1; stats[1] += dt; stats[2] = max(stats[2], dt)
+        self.hops += 1
+        if self.report_every and self.hops % self.report_every == 0: print(f"[HOP] {self.latency_report()}")
+
+    def latency_report(self):
+        return " | ".join(f"{m.upper()}: {n} hops, avg {tot / n * 1e6:.0f} us, max {mx * 1e6:.0f} us"
+                          for m, (n, tot, mx) in self.latency.items() if n)
+
+    def handle(self, msg):
+        try:
+            f = pmt.to_double(pmt.dict_ref(msg, pmt.intern("freq"), pmt.from_double(0)))
+            t = pmt.to_double(pmt.dict_ref(msg, pmt.intern("time"), pmt.from_double(0)))
+            if f > 0 and f != self.last_f:
+                start = time.perf_counter()
+                if t > (time.time() + 0.010):
+                    cmd_time = uhd.time_spec(t)
+                    self.src.set_command_time(cmd_time, 0)
+                    self.snk.set_command_time(cmd_time, 0)
+                    mode = self._tune(f)
+                    self.src.clear_command_time(0)
+                    self.snk.clear_command_time(0)
+                else:
+                    mode = self._tune(f)
+                self._record(mode, time.perf_counter() - start)
+                self.last_f = f
+        except: pass
+
+    def work(self, i, o): return 0
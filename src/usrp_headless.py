@@ -4,20 +4,17 @@
 
 import os
 import sys
-import numpy as np
-from gnuradio import gr, blocks, digital, uhd, pdu, filter
+from gnuradio import gr, blocks, uhd
 import pmt
 import time
-import yaml
 import argparse
 
 # Add src to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from packetizer import packetizer
-from depacketizer import depacketizer
-from hop_generator_tod import tod_hop_generator
-from hop_generator_aes import aes_hop_generator
+from mission_flowgraph import MissionFlowgraph
+from mission_profile import MissionProfile
+from uhd_handler import UHDHandler
 from session_manager import session_manager
 
 class OpalVanguardUSRPHeadless(gr.top_block):
@@ -26,9 +23,9 @@ class OpalVanguardUSRPHeadless(gr.top_block):
         self.role = role
         print(f"[{self.role}] Loading config from {config_path}...")
         
-        with open(config_path, 'r') as f:
-            self.cfg = yaml.safe_load(f)
-            
+        self.profile = MissionProfile.load(config_path)
+        self.cfg = self.profile.cfg
+
         hcfg = self.cfg['hopping']
         hw_cfg = self.cfg['hardware']
         p_cfg = self.cfg['physical']
@@ -48,82 +45,33 @@ class OpalVanguardUSRPHeadless(gr.top_block):
                 dev.set_center_freq(self.center_freq, 0)
             self.usrp_sink.set_gain(hw_cfg['tx_gain'], 0)
             self.usrp_source.set_gain(hw_cfg['rx_gain'], 0)
+            self.usrp_source.set_time_now(uhd.time_spec(time.time()))
             print(f"[{self.role}] USRP frequencies and gains set.")
         except Exception as e:
             print(f"FATAL: USRP ERROR: {e}"); sys.exit(1)
 
         print(f"[{self.role}] Setting up session managers...")
         sid = 1 if self.role == "ALPHA" else 2
-        self.session_a = session_manager(initial_seed=hcfg['initial_seed'], config_path=config_path)
-        self.session_b = session_manager(initial_seed=hcfg['initial_seed'], config_path=config_path)
+        self.session_a = session_manager(initial_seed=hcfg['initial_seed'], config_path=self.profile, node_id=sid)
+        self.session_b = session_manager(initial_seed=hcfg['initial_seed'], config_path=self.profile, node_id=sid)
         
-        self.pkt_a = packetizer(config_path=config_path, src_id=sid)
-        self.depkt_b = depacketizer(config_path=config_path, src_id=sid, ignore_self=True)
-
-        print(f"[{self.role}] Setting up modulation ({p_cfg.get('modulation', 'GFSK')})...")
+        print(f"[{self.role}] Building {p_cfg.get('modulation', 'GFSK')} TX/RX chain and hop generator...")
+        self.fg = MissionFlowgraph(self, self.profile, self.samp_rate, self.center_freq, src_id=sid, ignore_self=True)
+        self.pkt_a, self.depkt_b, self.hop_ctrl = self.fg.pkt, self.fg.depkt, self.fg.hop_ctrl
         self.pdu_src = blocks.message_strobe(pmt.cons(pmt.make_dict(), pmt.init_u8vector(len("MISSION DATA"), list("MISSION DATA".encode()))), 3000)
-        self.p2s_a = pdu.pdu_to_tagged_stream(gr.types.byte_t, "packet_len")
-        
-        mod_type = p_cfg.get('modulation', 'GFSK')
-        sps = p_cfg.get('samples_per_symbol', 10)
-        # v15.8.17: Use native C++ scaling for high-speed reliability.
-        self.mult_len = blocks.tagged_stream_multiply_length(gr.sizeof_gr_complex, "packet_len", sps)
-        
-        if mod_type == "DBPSK":
-            self.mod_a = digital.psk_mod(2, samples_per_symbol=sps, differential=True)
-            self.demod_b = digital.psk_demod(2, samples_per_symbol=sps, differential=True)
-        elif mod_type == "DQPSK":
-            self.mod_a = digital.psk_mod(4, differential=True, samples_per_symbol=sps, excess_bw=0.35)
-            self.demod_b = digital.psk_demod(4, differential=True, samples_per_symbol=sps, excess_bw=0.35)
-        else:
-            freq_dev = p_cfg.get('freq_dev', 25000)
-            sens = (2.0 * np.pi * freq_dev) / self.samp_rate
-            self.mod_a = digital.gfsk_mod(sps, sens, 0.35, False, False, False)
-            self.demod_b = digital.gfsk_demod(sps, sens, 0.1, 0.5, 0.005, 0.0)
-
-        print(f"[{self.role}] Initializing hop generator...")
-        self.hop_ctrl = tod_hop_generator(key=bytes.fromhex(hcfg.get('aes_key', '00'*32)), num_channels=hcfg.get('num_channels', 50), center_freq=self.center_freq, channel_spacing=hcfg.get('channel_spacing', 150000), dwell_ms=hcfg.get('dwell_time_ms', 500))
 
-        print(f"[{self.role}] Setting up RX filters...")
-        self.rx_filter = filter.fir_filter_ccf(1, filter.firdes.low_pass(1.0, self.samp_rate, 100e3, 50e3))
-        
         print(f"[{self.role}] Connecting blocks...")
         self.msg_connect((self.pdu_src, "strobe"), (self.session_a, "data_in"))
         self.msg_connect((self.session_a, "pkt_out"), (self.pkt_a, "in"))
-        self.msg_connect((self.pkt_a, "out"), (self.p2s_a, "pdus"))
-        # v15.8.17: Scale complex samples AFTER modulation
-        self.connect(self.p2s_a, self.mod_a, self.mult_len, self.usrp_sink)
-        # v15.8.20: Demodulator outputs 1 bit per symbol natively.
-        self.connect(self.usrp_source, self.rx_filter, self.demod_b, self.depkt_b)
+        self.fg.connect_tx(self.usrp_sink)
+        self.fg.connect_rx(self.usrp_source)
         self.msg_connect((self.depkt_b, "out"), (self.session_b, "msg_in"))
+        self.msg_connect((self.depkt_b, "crc_fail"), (self.session_b, "crc_fail"))
         self.msg_connect((self.session_b, "pkt_out"), (self.session_a, "msg_in"))
 
-        class UHDHandler(gr.basic_block):
-            def __init__(self, parent):
-                gr.basic_block.__init__(self, "UHDHandler", None, None); self.parent = parent
-                self.message_port_register_in(pmt.intern("msg")); self.set_msg_handler(pmt.intern("msg"), self.handle)
-                self.last_f = 0
-            def handle(self, msg):
-                try:
-                    f = pmt.to_double(pmt.dict_ref(msg, pmt.intern("freq"), pmt.from_double(0)))
-                    t = pmt.to_double(pmt.dict_ref(msg, pmt.intern("time"), pmt.from_double(0)))
-                    if f > 0 and f != self.last_f:
-                        if t > (time.time() + 0.010):
-                            cmd_time = uhd.time_spec(t)
-                            self.parent.usrp_sink.set_command_time(cmd_time, 0)
-                            self.parent.usrp_source.set_command_time(cmd_time, 0)
-                            self.parent.usrp_sink.set_center_freq(f, 0)
-                            self.parent.usrp_source.set_center_freq(f, 0)
-                            self.parent.usrp_sink.clear_command_time(0)
-                            self.parent.usrp_source.clear_command_time(0)
-                        else:
-                            self.parent.usrp_sink.set_center_freq(f, 0)
-                            self.parent.usrp_source.set_center_freq(f, 0)
-                        self.last_f = f
-                except: pass
-            def work(self, i, o): return 0
-        
-        self.uhd_h = UHDHandler(self); self.msg_connect((self.hop_ctrl, "freq"), (self.uhd_h, "msg"))
+        self.uhd_h = UHDHandler(self.usrp_source, self.usrp_sink, self.center_freq, self.samp_rate,
+                                channel_spacing=hcfg.get('channel_spacing', 150000), retune_mode=hcfg.get('retune_mode', 'lo'))
+        self.fg.connect_hopping(self.uhd_h, clock=self.usrp_source, clock_rate=self.samp_rate)
 
         class DiagPrinter(gr.basic_block):
             def __init__(self, role):
@@ -131,11 +79,16 @@ class OpalVanguardUSRPHeadless(gr.top_block):
                 self.message_port_register_in(pmt.intern("msg")); self.set_msg_handler(pmt.intern("msg"), self.handle)
             def handle(self, msg):
                 try:
-                    ok_pmt = pmt.dict_ref(msg, pmt.intern("crc_ok"), pmt.PMT_F)
-                    if pmt.is_true(ok_pmt):
+                    depth = pmt.to_long(pmt.dict_ref(msg, pmt.intern("queue_depth"), pmt.from_long(0)))
+                    drops = pmt.to_long(pmt.dict_ref(msg, pmt.intern("queue_drops"), pmt.from_long(0)))
+                    if not pmt.dict_has_key(msg, pmt.intern("crc_ok")): # queue-only report
+                        print(f"[{self.role}] \033[93mRX QUEUE\033[0m | Q: {depth} (drops {drops})")
+                    elif pmt.is_true(pmt.dict_ref(msg, pmt.intern("crc_ok"), pmt.PMT_F)):
                         repairs = pmt.to_long(pmt.dict_ref(msg, pmt.intern("fec_repairs"), pmt.from_long(0)))
                         conf = pmt.to_double(pmt.dict_ref(msg, pmt.intern("confidence"), pmt.from_double(0)))
-                        print(f"[{self.role}] \033[92mCRC PASS\033[0m | LQI: {conf:.1f}% | FEC: {repairs}")
+                        print(f"[{self.role}] \033[92mCRC PASS\033[0m | LQI: {conf:.1f}% | FEC: {repairs} | Q: {depth} (drops {drops})")
+                    else:
+                        print(f"[{self.role}] \033[91mCRC FAIL\033[0m | Q: {depth} (drops {drops})")
                 except: pass
         
         self.dp = DiagPrinter(role); self.msg_connect((self.depkt_b, "diagnostics"), (self.dp, "msg"))
@@ -5,23 +5,22 @@
 import os
 import sys
 import numpy as np
-from gnuradio import gr, blocks, analog, digital, qtgui, filter, fft, uhd, pdu
+from gnuradio import gr, blocks, qtgui, fft, uhd
 import pmt
 import time
 import struct
 import threading
-import yaml
 import argparse
 from PyQt5 import Qt
-from PyQt5.QtCore import pyqtSignal, QTimer, pyqtSlot
+from PyQt5.QtCore import pyqtSignal, pyqtSlot
 import sip
 
 # Add src to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from packetizer import packetizer
-from depacketizer import depacketizer
-from hop_generator_tod import tod_hop_generator
+from mission_flowgraph import MissionFlowgraph
+from mission_profile import MissionProfile
+from uhd_handler import UHDHandler
 from session_manager import session_manager
 
 class MessageProxy(gr.basic_block):
@@ -43,8 +42,8 @@ class OpalVanguardUSRP(gr.top_block, Qt.QWidget):
         # v15.8.2: Standard Init Order
         Qt.QWidget.__init__(self)
         self.role, self.serial, self.config_path = role, serial, config_path
-        with open(config_path, 'r') as f: self.cfg = yaml.safe_load(f)
-        mission_id = self.cfg.get('mission', {}).get('id', 'UNKNOWN')
+        self.profile = MissionProfile.load(config_path); self.cfg = self.profile.cfg
+        mission_id = self.profile.mission_id or 'UNKNOWN'
         gr.top_block.__init__(self, f"Opal Vanguard - {role} [{mission_id}]")
         
         print(f"\n--- [OPAL VANGUARD {role} START: {time.ctime()} | MISSION: {mission_id}] ---")
@@ -63,7 +62,7 @@ class OpalVanguardUSRP(gr.top_block, Qt.QWidget):
         self.connect_logic(mod_type=p_cfg.get('modulation', 'GFSK'), h_cfg=h_cfg)
 
     def setup_ui(self, role, serial, hw_cfg):
-        mission_id = self.cfg.get('mission', {}).get('id', 'UNKNOWN')
+        mission_id = self.profile.mission_id or 'UNKNOWN'
         self.setWindowTitle(f"Opal Vanguard - {role} [{mission_id}]")
         self.main_layout = Qt.QVBoxLayout(); self.setLayout(self.main_layout)
         self.info_label = Qt.QLabel(f"<b>MISSION: {mission_id} | NODE: {role} | SDR: {serial}</b>")
@@ -153,51 +152,22 @@ class OpalVanguardUSRP(gr.top_block, Qt.QWidget):
 
     def setup_dsp(self, config_path, h_cfg, p_cfg, l_cfg):
         sid = 1 if self.role == "ALPHA" else 2
-        self.session = session_manager(initial_seed=h_cfg.get('initial_seed', 0xACE), config_path=config_path)
-        self.pkt_a = packetizer(config_path=config_path, src_id=sid)
-        self.depkt_b = depacketizer(config_path=config_path, src_id=sid, ignore_self=True)
-        
-        if l_cfg.get('use_comsec', False):
-            key = bytes.fromhex(l_cfg.get('comsec_key', '00'*32))
-            self.pkt_a.use_comsec = True; self.pkt_a.comsec_key = key
-            self.depkt_b.use_comsec = True; self.depkt_b.comsec_key = key
+        self.session = session_manager(initial_seed=h_cfg.get('initial_seed', 0xACE), config_path=self.profile, node_id=sid)
+        self.fg = MissionFlowgraph(self, self.profile, self.samp_rate, self.center_freq, src_id=sid, ignore_self=True)
+        self.pkt_a, self.depkt_b, self.hop_ctrl = self.fg.pkt, self.fg.depkt, self.fg.hop_ctrl
+        # COMSEC comes from the shared profile: the packetizer's LinkEncoder and the depacketizer's LinkDecoder build it
 
-        self.p2s_a = pdu.pdu_to_tagged_stream(gr.types.byte_t, "packet_len")
         self.mac_strobe = blocks.message_strobe(pmt.PMT_T, 1000)
 
         if self.payload_type == 'heartbeat':
             hb_msg = pmt.cons(pmt.make_dict(), pmt.init_u8vector(len(f"PING FROM {self.role}"), list(f"PING FROM {self.role}".encode())))
-            hb_interval = 100 if "LEVEL_6" in self.cfg['mission']['id'] else 1000
+            hb_interval = 100 if self.profile.is_tactical else 1000
+            # Each PING also costs the peer an ACK burst: keep both inside this node's TDMA share
+            if self.session.tdma: hb_interval = max(hb_interval, int(np.ceil(2000.0 / self.session.tdma.capacity())))
             self.pdu_src = blocks.message_strobe(hb_msg, hb_interval)
         else:
             self.pdu_src = blocks.message_debug()
 
-        sps = p_cfg.get('samples_per_symbol', 10)
-        # v15.8.17: Use native C++ scaling for maximum performance and to resolve tP errors.
-        self.mult_len = blocks.tagged_stream_multiply_length(gr.sizeof_gr_complex, "packet_len", sps)
-        
-        mod_type = p_cfg.get('modulation', 'GFSK')
-        if mod_type in ["GFSK", "MSK", "GMSK"]:
-            bit_rate = self.samp_rate / sps
-            default_dev = bit_rate / 4.0 if mod_type in ["MSK", "GMSK"] else p_cfg.get('freq_dev', 25000)
-            sens = (2.0 * np.pi * default_dev) / self.samp_rate
-            bt = 0.5 if mod_type == "MSK" else p_cfg.get('gmsk_bt', 0.35)
-            self.mod_a = digital.gfsk_mod(sps, sens, bt, False, False, False)
-            self.demod_b = digital.gfsk_demod(sps, sens, 0.1, 0.5, 0.005, 0.0)
-        elif mod_type == "DBPSK":
-            self.mod_a = digital.psk_mod(2, samples_per_symbol=sps, differential=True)
-            self.demod_b = digital.psk_demod(2, samples_per_symbol=sps, differential=True)
-        elif mod_type == "DQPSK":
-            self.mod_a = digital.psk_mod(4, differential=True, samples_per_symbol=sps, excess_bw=0.35)
-            self.demod_b = digital.psk_demod(4, differential=True, samples_per_symbol=sps, excess_bw=0.35)
-        elif mod_type == "OFDM":
-            self.mod_a = digital.ofdm_tx(fft_len=64, cp_len=16, packet_length_tag_key="packet_len")
-            self.demod_b = digital.ofdm_rx(fft_len=64, cp_len=16, packet_length_tag_key="packet_len")
-            self.unpack = blocks.packed_to_unpacked_bb(1, gr.GR_MSB_FIRST)
-
-        self.rx_filter = filter.fir_filter_ccf(1, filter.firdes.low_pass(1.0, self.samp_rate, 100e3, 50e3))
-        self.hop_ctrl = tod_hop_generator(key=bytes.fromhex(h_cfg.get('aes_key', '00'*32)), num_channels=h_cfg.get('num_channels', 50), center_freq=self.center_freq, channel_spacing=h_cfg.get('channel_spacing', 150000), dwell_ms=h_cfg.get('dwell_time_ms', 500))
-
     def connect_logic(self, mod_type, h_cfg):
         self.diag_proxy = MessageProxy(self.diag_ui_sig)
         self.status_proxy = MessageProxy(self.status_ui_sig)
@@ -207,27 +177,19 @@ class OpalVanguardUSRP(gr.top_block, Qt.QWidget):
         src_port = "out" if self.payload_type == 'chat' else "strobe"
         self.msg_connect((self.pdu_src, src_port), (self.session, "data_in"))
         self.msg_connect((self.session, "pkt_out"), (self.pkt_a, "in"))
-        self.msg_connect((self.pkt_a, "out"), (self.p2s_a, "pdus"))
-        
-        if mod_type == "OFDM":
-            # OFDM handles its own scaling
-            self.connect(self.p2s_a, self.mod_a, self.usrp_sink)
-            self.connect(self.usrp_source, self.rx_filter, self.demod_b, self.unpack, self.depkt_b)
-        else:
-            # v15.8.20: Demodulator outputs 1 bit per symbol natively.
-            # Scale complex samples AFTER modulation.
-            self.connect(self.p2s_a, self.mod_a, self.mult_len, self.usrp_sink)
-            self.connect(self.usrp_source, self.rx_filter, self.demod_b, self.depkt_b)
+        # Shared TX/RX chain (mission_flowgraph): modulator, length scaling, RX filter, demod, unpacker
+        self.fg.connect_tx(self.usrp_sink)
+        self.fg.connect_rx(self.usrp_source)
 
         self.msg_connect((self.depkt_b, "out"), (self.session, "msg_in"))
+        self.msg_connect((self.depkt_b, "crc_fail"), (self.session, "crc_fail"))
         self.msg_connect((self.depkt_b, "diagnostics"), (self.diag_proxy, "msg"))
         self.msg_connect((self.session, "status_out"), (self.status_proxy, "msg"))
         self.msg_connect((self.session, "data_out"), (self.data_proxy, "msg"))
 
         # v15.8.18: Adaptive UI Performance
         # Drop waterfall FPS for high-CPU mission levels (Level 6+)
-        mission_id = self.cfg.get('mission', {}).get('id', 'UNKNOWN')
-        is_high_cpu = ("LEVEL_6" in mission_id or "LEVEL_7" in mission_id)
+        is_high_cpu = self.profile.is_tactical
         fps_delay = 0.20 if is_high_cpu else 0.06 # 5 FPS vs 16 FPS
         fft_size = 512 if is_high_cpu else 1024
         
@@ -238,34 +200,10 @@ class OpalVanguardUSRP(gr.top_block, Qt.QWidget):
         self.viz_panel.addWidget(sip.wrapinstance(self.snk_waterfall.qwidget(), Qt.QWidget))
         self.connect(self.usrp_source, self.snk_waterfall)
 
-        class UHDHandler(gr.basic_block):
-            def __init__(self, usrp_src, usrp_snk):
-                gr.basic_block.__init__(self, "UHDHandler", None, None); self.src, self.snk = usrp_src, usrp_snk
-                self.message_port_register_in(pmt.intern("msg")); self.set_msg_handler(pmt.intern("msg"), self.handle)
-                self.last_f = 0
-            def handle(self, msg):
-                try:
-                    f = pmt.to_double(pmt.dict_ref(msg, pmt.intern("freq"), pmt.from_double(0)))
-                    t = pmt.to_double(pmt.dict_ref(msg, pmt.intern("time"), pmt.from_double(0)))
-                    if f > 0 and f != self.last_f:
-                        if t > (time.time() + 0.010):
-                            cmd_time = uhd.time_spec(t)
-                            self.src.set_command_time(cmd_time, 0)
-                            self.snk.set_command_time(cmd_time, 0)
-                            self.src.set_center_freq(f, 0)
-                            self.snk.set_center_freq(f, 0)
-                            self.src.clear_command_time(0)
-                            self.snk.clear_command_time(0)
-                        else:
-                            self.src.set_center_freq(f, 0)
-                            self.snk.set_center_freq(f, 0)
-                        self.last_f = f
-                except: pass
-            def work(self, i, o): return 0
-        self.uhd_h = UHDHandler(self.usrp_source, self.usrp_sink)
-        self.msg_connect((self.hop_ctrl, "freq"), (self.uhd_h, "msg"))
-        self.timer = QTimer(); self.timer.timeout.connect(lambda: self.hop_ctrl.handle_trigger(pmt.PMT_T))
-        if h_cfg.get('enabled', True): self.timer.start(h_cfg['dwell_time_ms'])
+        self.uhd_h = UHDHandler(self.usrp_source, self.usrp_sink, self.center_freq, self.samp_rate,
+                                channel_spacing=h_cfg.get('channel_spacing', 150000), retune_mode=h_cfg.get('retune_mode', 'lo'))
+        # Hops follow the USRP sample clock (rx_time tags), not a UI timer
+        self.fg.connect_hopping(self.uhd_h, clock=self.usrp_source, clock_rate=self.samp_rate)
 
     @pyqtSlot(object)
     def on_status_msg(self, msg):
@@ -294,6 +232,11 @@ class OpalVanguardUSRP(gr.top_block, Qt.QWidget):
     @pyqtSlot(object)
     def on_diag_msg(self, msg):
         try:
+            drops = pmt.to_long(pmt.dict_ref(msg, pmt.intern("queue_drops"), pmt.from_long(0)))
+            if not pmt.dict_has_key(msg, pmt.intern("crc_ok")): # queue-only report: no frame to show
+                self.lqi_history_list.insertItem(0, f"[{time.strftime('%H:%M:%S')}] RX queue | Drops: {drops}")
+                if self.lqi_history_list.count() > 50: self.lqi_history_list.takeItem(50)
+                return
             conf = pmt.to_double(pmt.dict_ref(msg, pmt.intern("confidence"), pmt.from_double(0)))
             repairs = pmt.to_long(pmt.dict_ref(msg, pmt.intern("fec_repairs"), pmt.from_long(0)))
             ok_pmt = pmt.dict_ref(msg, pmt.intern("crc_ok"), pmt.PMT_F)
@@ -303,7 +246,7 @@ class OpalVanguardUSRP(gr.top_block, Qt.QWidget):
             self.crc_led.setStyleSheet(f"color: {'green' if ok else 'red'}; font-weight: bold;")
             self.fec_count.setText(f"FEC Repairs: {repairs}")
             ts = time.strftime("%H:%M:%S")
-            self.lqi_history_list.insertItem(0, f"[{ts}] LQI: {conf:.1f}% | Repairs: {repairs} | CRC: {'OK' if ok else 'FAIL'}")
+            self.lqi_history_list.insertItem(0, f"[{ts}] LQI: {conf:.1f}% | Repairs: {repairs} | CRC: {'OK' if ok else 'FAIL'} | Drops: {drops}")
             if self.lqi_history_list.count() > 50: self.lqi_history_list.takeItem(50)
         except: pass
 
@@ -8,7 +8,6 @@ import numpy as np
 from gnuradio import gr, blocks, digital, pdu
 import pmt
 import time
-import yaml
 
 # Add src to path
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
@@ -64,11 +63,8 @@ def test_phy_timing(mod_type, sps=10):
         'mission': {'id': 'TIMING_TEST'}
     }
     
-    # Save temp config for the packetizer to load
-    with open("tmp_phy_config.yaml", 'w') as f: yaml.dump(config, f)
-    
     tb = gr.top_block()
-    pkt = packetizer(config_path="tmp_phy_config.yaml")
+    pkt = packetizer(config_path=config)
     p2s = pdu.pdu_to_tagged_stream(gr.types.byte_t, "packet_len")
     mult_len = blocks.tagged_stream_multiply_length(gr.sizeof_gr_complex, "packet_len", sps)
     monitor = TagMonitor()
@@ -99,7 +95,6 @@ def test_phy_timing(mod_type, sps=10):
     time.sleep(0.2)
     tb.stop(); tb.wait()
     
-    if os.path.exists("tmp_phy_config.yaml"): os.remove("tmp_phy_config.yaml")
     
     if monitor.errors:
         for err in monitor.errors: print(f"\033[91m[ERROR] {err}\033[0m")